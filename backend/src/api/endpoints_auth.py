@@ -73,31 +73,17 @@ def registrar_aluno(
 def login(data: LoginRequest, db: Session = Depends(get_db)) -> Token:
     """Endpoint de login: valida credenciais e retorna access + refresh tokens.
 
-    Se o email pertence a uma `Universidade`, delega para `login_university` (placeholder).
-    Se o email pertencer a um `Usuário`, delega para `login_user` (placeholder)
+    O email é resolvido para `Universidade` ou `Usuario` em uma única consulta
+    (`resolver_identidade`); a senha é verificada em `login_identidade`.
     """
-    
-    # Verifica se é uma universidade (login separado)
-    
-    university = db.query(Universidade).filter(Universidade.email == data.email).first()
-    if university:
-        # Delegar para o serviço especializado (em service_auth)
-        token = service_auth.login_university(university=university, password=data.password)
-        if not token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Credenciais inválidas (university)",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return token
-
-    # Autentica usuário padrão via service
-    token = service_auth.login_user(db=db, email=data.email, password=data.password)
+    identidade = service_auth.resolver_identidade(db, data.email)
+    token = service_auth.login_identidade(db, identidade, data.password) if identidade else None
     if not token:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
-                            detail="Credenciais inválidas",
-                            headers={"WWW-Authenticate": "Bearer"})
-
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciais inválidas (university)" if identidade and identidade.is_universidade else "Credenciais inválidas",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return token
 
 @router.post("/refresh",
@@ -124,8 +110,10 @@ def refresh_token(token: str = Depends(service_auth.oauth2_scheme)) -> Token:
             headers={"WWW-Authenticate": "Bearer"},
         )
         
-    access_token = security.create_access_token(subject=str(email), tag=getattr(current_payload, "tag", None))
-    refresh_token = security.create_refresh_token(subject=str(email), tag=getattr(current_payload, "tag", None))
+    # Mantém tag e uid/role do token de refresh (ausentes em tokens antigos)
+    claims = {"tag": current_payload.tag, "uid": current_payload.uid, "role": current_payload.role}
+    access_token = security.create_access_token(subject=str(email), **claims)
+    refresh_token = security.create_refresh_token(subject=str(email), **claims)
     return Token(
         access_token=access_token,
         refresh_token=refresh_token,
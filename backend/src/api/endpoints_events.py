@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, BackgroundTasks, UploadFile, File, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import Any, Literal
 from ..core.config import settings
-from ..database.connection import get_db 
-from ..services import service_events, service_auth
+from ..database.connection import get_db, SessionLocal
+from ..services import service_events, service_auth, service_import, service_deletion
 from ..schemas import schema
 from ..schemas.jwt import TokenPayload
 from datetime import date
@@ -17,13 +19,15 @@ router = APIRouter(prefix=f"{settings.API_V1_STR.rstrip('/')}/events", tags=["Ev
 def criar_evento(
     payload: schema.EventoComplexoCreate,
     db: Session = Depends(get_db),
-    current_user_email: str = Depends(service_auth.get_current_user_email)):
+    current_user_email: str = Depends(service_auth.get_current_user_email),
+    identidade: service_auth.Identidade = Depends(service_auth.get_identidade_atual)):
     try:
         novo_evento = service_events.criar_evento_logica(
             db=db,
             dados=payload.evento,
             disciplina=payload.disciplina,
-            current_email = current_user_email
+            current_email = current_user_email,
+            identidade=identidade
         )
 
    
@@ -39,14 +43,125 @@ def criar_evento(
         )
     
 
+@router.post(
+    "/import/disciplinas",
+    response_model=schema.ImportacaoResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def importar_disciplinas(
+    payload: list[dict[str, Any]],
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(service_auth.get_current_user)
+):
+    """
+    Importa em lote disciplinas do semestre (lista JSON com os campos de DisciplinaImportItem).
+
+    Todas as linhas são validadas antes de qualquer gravação; as inválidas voltam em `erros`
+    com o número da linha. As válidas são gravadas em segundo plano, em lotes; acompanhe
+    o progresso em GET /import/disciplinas/{id_importacao}.
+    """
+    return _iniciar_importacao(db, payload, current_user, background_tasks)
+
+
+@router.post(
+    "/import/disciplinas/csv",
+    response_model=schema.ImportacaoResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+def importar_disciplinas_csv(
+    background_tasks: BackgroundTasks,
+    arquivo: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: TokenPayload = Depends(service_auth.get_current_user)
+):
+    """
+    Igual a POST /import/disciplinas, recebendo um CSV (UTF-8) com cabeçalho
+    nome,horario,data_inicio,data_termino,descricao,local_padrao,id_universidade,email_professor,id_curso,creditos.
+    """
+    # Rota síncrona (threadpool): a validação consulta o banco e não pode rodar no event loop
+    linhas = service_import.ler_csv_disciplinas(arquivo.file.read())
+    return _iniciar_importacao(db, linhas, current_user, background_tasks)
+
+
+def _iniciar_importacao(db: Session, linhas: list[dict], current_user: TokenPayload, background_tasks: BackgroundTasks):
+    try:
+        estado, validas = service_import.iniciar_importacao_disciplinas(db, linhas, current_user)
+        if validas:
+            background_tasks.add_task(service_import.executar_importacao_disciplinas, estado["id_importacao"], validas)
+        return estado
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro interno ao importar disciplinas: {str(e)}"
+        )
+
+
+@router.get("/import/disciplinas/{id_importacao}", response_model=schema.ImportacaoResponse, status_code=status.HTTP_200_OK)
+def consultar_importacao_disciplinas(
+    id_importacao: str,
+    current_user: TokenPayload = Depends(service_auth.get_current_user)
+):
+    """
+    Retorna o progresso de uma importação em lote (processadas/importadas) e os erros por linha.
+    """
+    return service_import.pegar_importacao(id_importacao, current_user)
+
+
+@router.get("/{id_evento}/deletion", response_model=schema.ExclusaoEventoResponse, status_code=status.HTTP_200_OK)
+def consultar_exclusao_evento(
+    id_evento: int,
+    db: Session = Depends(get_db),
+    current_user_email: str = Depends(service_auth.get_current_user_email)
+):
+    """
+    Retorna o progresso da exclusão em segundo plano do evento (linhas removidas por tabela).
+    """
+    return service_deletion.pegar_exclusao(db, id_evento, current_user_email)
+
+
+@router.post("/batch-delete", response_model=schema.EventosDeleteLoteResponse, status_code=status.HTTP_200_OK)
+def deletar_eventos_em_lote(
+    payload: schema.EventosDeleteLote,
+    db: Session = Depends(get_db),
+    current_user_email: str = Depends(service_auth.get_current_user_email)
+):
+    """
+    Deleta vários eventos (e suas dependências) em uma única transação.
+    Apenas eventos do usuário autenticado são removidos; os demais ids voltam em `nao_removidos`.
+    """
+    try:
+        return service_events.deletar_eventos_em_lote(db, payload.ids, current_user_email)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro interno ao deletar eventos: {str(e)}"
+        )
+
+
 @router.delete("/{id_evento}", status_code=status.HTTP_200_OK)
-def deletar_evento_endpoint(id_evento: int, db: Session = Depends(get_db),
+def deletar_evento_endpoint(id_evento: int, response: Response, background_tasks: BackgroundTasks,
+                            background: bool = False, db: Session = Depends(get_db),
                             current_user_email: str = Depends(service_auth.get_current_user_email)):
     """
     Deleta um evento e toda a sua cadeia de dependências.
+
+    Com `background=true` (eventos muito grandes), o evento é marcado como excluído e some
+    na hora das consultas; os dependentes são removidos em lotes em segundo plano (202) e o
+    progresso fica em GET /{id_evento}/deletion.
     """
 
     try:
+        if background:
+            estado, iniciar = service_deletion.marcar_exclusao_evento(db, id_evento, current_user_email)
+            if iniciar:
+                background_tasks.add_task(service_deletion.executar_exclusao_evento, id_evento)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return schema.ExclusaoEventoResponse.model_validate(estado)
         return service_events.deletar_evento(db, id_evento, current_email= current_user_email)
     except HTTPException as e:
         # Erros lançados no service retornam diretamente
@@ -60,26 +175,80 @@ def deletar_evento_endpoint(id_evento: int, db: Session = Depends(get_db),
     
 
 
+def _stream_ocorrencias_ndjson(current_user_email: str, **filtros):
+    """
+    Gera as ocorrências do usuário em NDJSON (um objeto por linha).
+    Usa sessão própria porque o corpo é enviado depois que a requisição já retornou.
+    """
+    db = SessionLocal()
+    try:
+        # Filtros e cursor são validados aqui, antes de a resposta começar
+        ocorrencias = service_events.iterar_ocorrencias_de_evento_usuario(db, current_user_email, **filtros)
+    except Exception:
+        db.close()
+        raise
+
+    def linhas():
+        try:
+            for _, info in ocorrencias:
+                yield schema.OcorrenciaEventoComIdResponse.model_validate(info).model_dump_json(exclude_none=True) + "\n"
+        finally:
+            ocorrencias.close()
+            db.close()
+
+    return StreamingResponse(linhas(), media_type="application/x-ndjson")
+
+
 @router.get("/", response_model=list[schema.OcorrenciaEventoComIdResponse], status_code=status.HTTP_200_OK, response_model_exclude_none=True)
 def listar_ocorrencias_de_evento_de_um_usuario(
+    response: Response,
     db: Session = Depends(get_db),
     current_user_email: str = Depends(service_auth.get_current_user_email),
     data: date | None = None,
-    categoria: str | None = None
+    categoria: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+    formato: Literal["json", "ndjson"] = "json"
 ):
     """
     Lista todas as ocorrencias de eventos associados ao usuário autenticado, com filtros opcionais por data e categoria.
+    Para visões de calendário use o intervalo `start` (inclusivo) / `end` (exclusivo), ex: start=2025-03-03&end=2025-03-10.
     Retorna o id_evento junto com cada ocorrência para identificação no frontend.
     Campos None não são incluídos na resposta (ex: 'dias' só aparece para eventos tipo Disciplina).
+
+    Paginação: com `limit`, a resposta traz no header `X-Next-Cursor` o cursor da próxima página
+    (ausente na última); repita a chamada com `cursor=<valor>` e os mesmos filtros.
+    Com `formato=ndjson` as ocorrências (a partir do `cursor`, se houver) são enviadas em streaming,
+    uma por linha, sem montar a lista completa; `limit` é ignorado nesse modo.
     """
     try:
-        ocorrencias = service_events.listar_ocorrencias_de_evento_usuario(
+        if formato == "ndjson":
+            return _stream_ocorrencias_ndjson(
+                current_user_email,
+                data=data,
+                categoria=categoria,
+                inicio=start,
+                fim=end,
+                cursor=cursor
+            )
+
+        ocorrencias, proximo_cursor = service_events.listar_ocorrencias_de_evento_usuario(
             db=db,
             user_email=current_user_email,
             data=data,
-            categoria=categoria
+            categoria=categoria,
+            inicio=start,
+            fim=end,
+            limite=limit,
+            cursor=cursor
         )
+        if proximo_cursor:
+            response.headers["X-Next-Cursor"] = proximo_cursor
         return ocorrencias
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -103,6 +272,9 @@ def listar_ocorrencias_evento(id_evento: int, db: Session = Depends(get_db)):
 @router.get("/{id_evento}/participants", response_model=list[schema.ParticipantResponse], status_code=status.HTTP_200_OK)
 def listar_participantes_evento(
     id_evento: int, 
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=1000),
+    after: int | None = None,
     db: Session = Depends(get_db)
 ):
     """
@@ -110,12 +282,21 @@ def listar_participantes_evento(
 
     Parâmetros:
         - id_evento: ID do evento
+        - limit: Tamanho da página (opcional)
+        - after: id_convidado a partir do qual continuar; com `limit`, o valor da próxima
+          página vem no header `X-Next-Cursor` (ausente na última)
     """
     try:
         participantes = service_events.listar_participantes_evento(
             db=db,
-            id_evento=id_evento
+            id_evento=id_evento,
+            # Um item a mais indica que existe próxima página
+            limite=limit + 1 if limit is not None else None,
+            apos=after
         )
+        if limit is not None and len(participantes) > limit:
+            participantes = participantes[:limit]
+            response.headers["X-Next-Cursor"] = str(participantes[-1]["id_convidado"])
         return participantes
     except HTTPException as e:
         raise e
@@ -129,6 +310,7 @@ def listar_participantes_evento(
 def adicionar_participante_evento(
     id_evento: int, 
     email_usuario: str,
+    detalhar: bool = False,
     db: Session = Depends(get_db),
     current_user: TokenPayload = Depends(service_auth.get_current_user)
 ):
@@ -138,6 +320,8 @@ def adicionar_participante_evento(
     Parâmetros:
         - id_evento: ID do evento
         - email_usuario: Email do usuário a ser adicionado como participante
+        - detalhar: Em convites todos@<dominio>, retornar também as listas de usuários
+          (por padrão apenas os totais)
 
     Apenas o proprietário do evento pode adicionar participantes.
     """
@@ -146,7 +330,8 @@ def adicionar_participante_evento(
             db=db,
             id_evento=id_evento,
             email_usuario=email_usuario,
-            current_user=current_user
+            current_user=current_user,
+            detalhar=detalhar
         )
         return resultado
     except HTTPException as e:
@@ -210,24 +395,6 @@ def obter_evento(id_evento: int, db: Session = Depends(get_db)):
             detail=f"Erro interno ao obter evento: {str(e)}"
         )
 
-@router.delete("/{id_evento}", status_code=status.HTTP_200_OK)
-def deletar_evento_endpoint(id_evento: int, db: Session = Depends(get_db)):
-    """
-    Deleta um evento e toda a sua cadeia de dependências.
-    """
-
-    try:
-        return service_events.deletar_evento(db, id_evento)
-    except HTTPException as e:
-        # Erros lançados no service retornam diretamente
-        raise e
-    except Exception as e:
-        # Erros inesperados
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erro interno ao deletar evento: {str(e)}"
-        )
-
 @router.get("/{id_evento}/{date}", response_model=schema.OcorrenciaEventoResponse, status_code=status.HTTP_200_OK, response_model_exclude_none=True)
 def obter_ocorrencia_evento_data(id_evento: int, date: date, db: Session = Depends(get_db), current_user_email: str = Depends(service_auth.get_current_user_email)):
     """
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.config import settings
+from ..database.connection import get_async_db
+from ..services import service_events, service_auth
+from ..schemas import schema
+from datetime import date
+
+# Mesmas rotas de leitura de endpoints_events sobre AsyncSession (aiomysql), para comparar
+# o caminho sync (/api/events) com o async (/api/async/events) sob a mesma carga.
+router = APIRouter(prefix=f"{settings.API_V1_STR.rstrip('/')}/async/events", tags=["Eventos (async)"])
+
+
+@router.get("/", response_model=list[schema.OcorrenciaEventoComIdResponse], status_code=status.HTTP_200_OK, response_model_exclude_none=True)
+async def listar_ocorrencias_de_evento_de_um_usuario(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_email: str = Depends(service_auth.get_current_user_email),
+    data: date | None = None,
+    categoria: str | None = None,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None
+):
+    """
+    Igual a GET /api/events/ (filtros, ordem e paginação por `X-Next-Cursor`), sem o modo ndjson.
+    """
+    try:
+        ocorrencias, proximo_cursor = await service_events.listar_ocorrencias_de_evento_usuario_async(
+            db=db,
+            user_email=current_user_email,
+            data=data,
+            categoria=categoria,
+            inicio=start,
+            fim=end,
+            limite=limit,
+            cursor=cursor
+        )
+        if proximo_cursor:
+            response.headers["X-Next-Cursor"] = proximo_cursor
+        return ocorrencias
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro interno ao listar ocorrencias de eventos do usuário: {str(e)}"
+        )
+
+
+@router.get("/{id_evento}/participants", response_model=list[schema.ParticipantResponse], status_code=status.HTTP_200_OK)
+async def listar_participantes_evento(
+    id_evento: int,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=1000),
+    after: int | None = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Igual a GET /api/events/{id_evento}/participants.
+    """
+    try:
+        participantes = await service_events.listar_participantes_evento_async(
+            db=db,
+            id_evento=id_evento,
+            # Um item a mais indica que existe próxima página
+            limite=limit + 1 if limit is not None else None,
+            apos=after
+        )
+        if limit is not None and len(participantes) > limit:
+            participantes = participantes[:limit]
+            response.headers["X-Next-Cursor"] = str(participantes[-1]["id_convidado"])
+        return participantes
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro interno ao listar participantes do evento: {str(e)}"
+        )
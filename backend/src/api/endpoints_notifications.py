@@ -1,13 +1,46 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from ..core.config import settings
-from ..database.connection import get_db
-from ..services import service_notifications
+from ..database.connection import get_db, SessionLocal
+from ..services import service_notifications, service_auth
 from ..schemas import schema
+from ..schemas.jwt import TokenPayload
+from ..core.broker import broker
+import json
 
 router = APIRouter(prefix=f"{settings.API_V1_STR.rstrip('/')}/notifications", tags=["Notificações"])
 
 
+def _verificar_dono_caixa(identidade: service_auth.Identidade, id_user: int):
+	if identidade.is_universidade or identidade.id != id_user:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="Acesso negado às notificações de outro usuário.",
+		)
+
+
+def _dono_da_caixa(id_user: int, identidade: service_auth.Identidade = Depends(service_auth.get_identidade_atual)) -> int:
+	"""Garante que o usuário autenticado é o dono da caixa de entrada `id_user`."""
+	_verificar_dono_caixa(identidade, id_user)
+	return id_user
+
+
+def _dono_do_stream(id_user: int, payload: TokenPayload = Depends(service_auth.get_current_user)) -> int:
+	"""
+	Como `get_identidade_atual` + dono da caixa, mas sem a sessão de get_db: ela ficaria aberta
+	durante toda a conexão SSE. Tokens antigos (sem uid) são resolvidos numa sessão própria.
+	"""
+	identidade = service_auth.identidade_do_token(payload)
+	if identidade is None:
+		with SessionLocal() as db:
+			identidade = service_auth.resolver_identidade(db, payload.sub)
+		if identidade is None:
+			raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Proprietário não encontrado.")
+	_verificar_dono_caixa(identidade, id_user)
+	return id_user
+
+
 @router.post("/", response_model=schema.NotificacaoResponse, status_code=status.HTTP_201_CREATED)
 def criar_notificacao_endpoint(dados: schema.NotificacaoCreate, db: Session = Depends(get_db)):
 	try:
@@ -22,10 +55,61 @@ def criar_notificacao_endpoint(dados: schema.NotificacaoCreate, db: Session = De
 		)
 
 
+@router.post("/broadcast", response_model=schema.NotificacaoBroadcastResponse, status_code=status.HTTP_201_CREATED)
+def criar_broadcast_endpoint(
+	dados: schema.NotificacaoBroadcastCreate,
+	db: Session = Depends(get_db),
+	current_user: TokenPayload = Depends(service_auth.get_current_user),
+):
+	"""
+	Aviso para um público inteiro (convidados de um evento, alunos de um curso ou um domínio de
+	email), gravado uma única vez e exibido em GET /user/{id_user} de cada destinatário.
+	"""
+	try:
+		return service_notifications.criar_broadcast(db, dados, current_user)
+	except HTTPException as e:
+		raise e
+	except Exception as e:
+		raise HTTPException(
+			status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			detail=f"Erro interno ao criar aviso: {str(e)}",
+		)
+
+
+@router.put("/user/{id_user}/broadcasts/lidas", status_code=status.HTTP_200_OK)
+def marcar_broadcasts_lidos(id_user: int = Depends(_dono_da_caixa), ate_id: int = Query(..., ge=1), db: Session = Depends(get_db)):
+	"""Marca como lidos os avisos (broadcasts) do usuário com id <= ate_id."""
+	try:
+		return service_notifications.marcar_broadcasts_lidos(db, id_user, ate_id)
+	except HTTPException as e:
+		raise e
+	except Exception as e:
+		raise HTTPException(
+			status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			detail=f"Erro interno ao marcar avisos como lidos: {str(e)}",
+		)
+
+
 @router.get("/user/{id_user}", response_model=list[schema.NotificacaoResponse], status_code=status.HTTP_200_OK)
-def listar_notificacoes(id_user: int, db: Session = Depends(get_db)):
+def listar_notificacoes(
+	response: Response,
+	id_user: int = Depends(_dono_da_caixa),
+	limit: int = Query(settings.NOTIFICACOES_LIMITE_PADRAO, ge=1, le=settings.NOTIFICACOES_LIMITE_MAXIMO),
+	cursor: str | None = None,
+	db: Session = Depends(get_db),
+):
+	"""
+	Caixa de entrada do usuário, da notificação mais recente para a mais antiga, em páginas de
+	`limit` itens. O cursor da próxima página vem no header `X-Next-Cursor` (ausente na última);
+	repita a chamada com `cursor=<valor>`.
+	"""
 	try:
-		return service_notifications.listar_notificacoes_por_usuario(db, id_user)
+		notificacoes, proximo_cursor = service_notifications.listar_notificacoes_por_usuario(db, id_user, limit, cursor)
+		if proximo_cursor:
+			response.headers["X-Next-Cursor"] = proximo_cursor
+		return notificacoes
+	except HTTPException as e:
+		raise e
 	except Exception as e:
 		raise HTTPException(
 			status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -33,10 +117,108 @@ def listar_notificacoes(id_user: int, db: Session = Depends(get_db)):
 		)
 
 
+@router.get("/user/{id_user}/unread-count", response_model=schema.NotificacoesNaoLidasResponse, status_code=status.HTTP_200_OK)
+def contar_nao_lidas(id_user: int = Depends(_dono_da_caixa), db: Session = Depends(get_db)):
+	"""Total de notificações não lidas (pessoais e avisos), para o frontend consultar periodicamente."""
+	try:
+		return service_notifications.contar_nao_lidas(db, id_user)
+	except HTTPException as e:
+		raise e
+	except Exception as e:
+		raise HTTPException(
+			status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			detail=f"Erro interno ao contar notificações não lidas: {str(e)}",
+		)
+
+
+@router.get("/user/{id_user}/stream")
+async def stream_notificacoes(id_user: int = Depends(_dono_do_stream)):
+	"""
+	Notificações novas do usuário em tempo real (Server-Sent Events), no lugar de consultar
+	GET /user/{id_user} periodicamente. Cada mensagem é um evento `notificacao` com o JSON da
+	notificação; sem novidades, um comentário de keepalive a cada SSE_KEEPALIVE segundos.
+	Ao (re)conectar, o cliente deve buscar a primeira página da listagem para não perder nada.
+
+	Exige o token do próprio usuário no header Authorization (o EventSource nativo não envia
+	headers; use um cliente SSE baseado em fetch).
+	"""
+	async def eventos():
+		assinatura = broker.assinar(id_user)
+		try:
+			yield "retry: 5000\n\n"
+			while True:
+				mensagem = await assinatura.proxima(settings.SSE_KEEPALIVE)
+				if mensagem is None:
+					yield ": keepalive\n\n"
+					continue
+				yield f"event: {mensagem['tipo']}\ndata: {json.dumps(mensagem['dados'])}\n\n"
+		finally:
+			broker.cancelar(assinatura)
+
+	return StreamingResponse(
+		eventos(),
+		media_type="text/event-stream",
+		# Sem cache nem buffer de proxy (nginx), para cada evento sair na hora
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+
+@router.put("/user/{id_user}/lidas", status_code=status.HTTP_200_OK)
+def marcar_todas_lidas(id_user: int = Depends(_dono_da_caixa), db: Session = Depends(get_db)):
+	try:
+		return service_notifications.marcar_todas_lidas(db, id_user)
+	except HTTPException as e:
+		raise e
+	except Exception as e:
+		raise HTTPException(
+			status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			detail=f"Erro interno ao marcar notificações como lidas: {str(e)}",
+		)
+
+
+@router.put("/{id_notificacao}/lida", response_model=schema.NotificacaoResponse, status_code=status.HTTP_200_OK)
+def marcar_notificacao_lida(
+	id_notificacao: int,
+	db: Session = Depends(get_db),
+	identidade: service_auth.Identidade = Depends(service_auth.get_identidade_atual),
+):
+	try:
+		notif = service_notifications.pegar_notificacao(db, id_notificacao)
+		_verificar_dono_caixa(identidade, notif.id_usuario)
+		return service_notifications.marcar_notificacao_lida(db, notif)
+	except HTTPException as e:
+		raise e
+	except Exception as e:
+		raise HTTPException(
+			status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			detail=f"Erro interno ao marcar notificação como lida: {str(e)}",
+		)
+
+
+@router.delete("/user/{id_user}", status_code=status.HTTP_200_OK)
+def limpar_notificacoes(id_user: int = Depends(_dono_da_caixa), apenas_lidas: bool = False, db: Session = Depends(get_db)):
+	"""Limpa a caixa de entrada do usuário: todas as notificações ou, com `apenas_lidas=true`, só as lidas."""
+	try:
+		return service_notifications.limpar_notificacoes_usuario(db, id_user, apenas_lidas)
+	except HTTPException as e:
+		raise e
+	except Exception as e:
+		raise HTTPException(
+			status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+			detail=f"Erro interno ao limpar notificações: {str(e)}",
+		)
+
+
 @router.delete("/{id_notificacao}", status_code=status.HTTP_200_OK)
-def deletar_notificacao(id_notificacao: int, db: Session = Depends(get_db)):
+def deletar_notificacao(
+	id_notificacao: int,
+	db: Session = Depends(get_db),
+	identidade: service_auth.Identidade = Depends(service_auth.get_identidade_atual),
+):
 	try:
-		return service_notifications.deletar_notificacao(db, id_notificacao)
+		notif = service_notifications.pegar_notificacao(db, id_notificacao)
+		_verificar_dono_caixa(identidade, notif.id_usuario)
+		return service_notifications.deletar_notificacao(db, notif)
 	except HTTPException as e:
 		raise e
 	except Exception as e:
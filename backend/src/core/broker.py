@@ -0,0 +1,155 @@
+from collections import defaultdict
+import asyncio
+import json
+import threading
+from .config import settings
+
+# Pub/sub das notificações em tempo real (GET /notifications/user/{id}/stream, SSE).
+# Os serviços publicam depois do commit, de qualquer thread; cada conexão SSE assina o id do
+# usuário e recebe as mensagens em uma fila própria no event loop. Dois backends:
+# - "memoria": entrega só às conexões deste processo (um único worker);
+# - "redis": publica no canal BROKER_CANAL e cada worker repassa às suas conexões locais.
+# Escolhido por BROKER_BACKEND.
+
+
+class Assinatura:
+    """Fila de mensagens de uma conexão. Se o cliente não acompanha (fila cheia), as novas
+    mensagens são descartadas; ele recupera o que perdeu pela listagem paginada."""
+
+    def __init__(self, id_usuario: int, tamanho_fila: int):
+        self.id_usuario = id_usuario
+        self.fila = asyncio.Queue(tamanho_fila)
+        self.loop = asyncio.get_running_loop()
+
+    def _entregar(self, mensagem: dict):
+        try:
+            self.fila.put_nowait(mensagem)
+        except asyncio.QueueFull:
+            pass
+
+    async def proxima(self, timeout: float) -> dict | None:
+        """Próxima mensagem, ou None se nada chegar em `timeout` segundos."""
+        try:
+            return await asyncio.wait_for(self.fila.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BrokerMemoria:
+    """Backend em memória: as assinaturas ficam por id de usuário neste processo."""
+
+    nome = "memoria"
+
+    def __init__(self, tamanho_fila: int):
+        self.tamanho_fila = tamanho_fila
+        self._assinaturas = defaultdict(set)  # id_usuario -> {Assinatura}
+        self._lock = threading.Lock()
+
+    def assinar(self, id_usuario: int) -> Assinatura:
+        """Registra uma conexão do usuário. Deve ser chamado dentro do event loop."""
+        assinatura = Assinatura(id_usuario, self.tamanho_fila)
+        with self._lock:
+            self._assinaturas[id_usuario].add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        with self._lock:
+            conexoes = self._assinaturas.get(assinatura.id_usuario)
+            if conexoes is not None:
+                conexoes.discard(assinatura)
+                if not conexoes:
+                    del self._assinaturas[assinatura.id_usuario]
+
+    def _entregar_local(self, ids_usuarios, mensagem: dict):
+        # Só os usuários com conexão aberta neste processo; o resto da lista é ignorado
+        with self._lock:
+            alvos = [
+                assinatura
+                for id_usuario in self._assinaturas.keys() & set(ids_usuarios)
+                for assinatura in self._assinaturas[id_usuario]
+            ]
+        for assinatura in alvos:
+            try:
+                assinatura.loop.call_soon_threadsafe(assinatura._entregar, mensagem)
+            except RuntimeError:
+                pass  # loop já encerrado
+
+    def publicar(self, ids_usuarios, mensagem: dict):
+        """Envia `mensagem` ({"tipo", "dados"}) às conexões dos usuários (pode ser chamado de qualquer thread)."""
+        self._entregar_local(ids_usuarios, mensagem)
+
+    async def iniciar(self):
+        pass
+
+    async def encerrar(self):
+        pass
+
+    def estado(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.nome,
+                "usuarios": len(self._assinaturas),
+                "conexoes": sum(len(conexoes) for conexoes in self._assinaturas.values()),
+            }
+
+
+class BrokerRedis(BrokerMemoria):
+    """Backend Redis: `publicar` vai para o canal e uma task por worker (iniciada no lifespan)
+    escuta o canal e entrega às conexões locais, inclusive as mensagens do próprio worker."""
+
+    nome = "redis"
+
+    def __init__(self, url: str, canal: str, tamanho_fila: int):
+        super().__init__(tamanho_fila)
+        # Dependência só deste backend
+        import redis
+        import redis.asyncio
+        self.canal = canal
+        self._cliente = redis.Redis.from_url(url)
+        self._cliente_async = redis.asyncio.Redis.from_url(url)
+        self._tarefa = None
+
+    def publicar(self, ids_usuarios, mensagem: dict):
+        self._cliente.publish(self.canal, json.dumps({"ids_usuarios": list(ids_usuarios), "mensagem": mensagem}))
+
+    async def _escutar(self):
+        while True:
+            try:
+                async with self._cliente_async.pubsub() as pubsub:
+                    await pubsub.subscribe(self.canal)
+                    async for item in pubsub.listen():
+                        if item["type"] != "message":
+                            continue
+                        dados = json.loads(item["data"])
+                        self._entregar_local(dados["ids_usuarios"], dados["mensagem"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Broker Redis desconectado, reconectando: {e}")
+                await asyncio.sleep(1)
+
+    async def iniciar(self):
+        self._tarefa = asyncio.create_task(self._escutar())
+
+    async def encerrar(self):
+        if self._tarefa is not None:
+            self._tarefa.cancel()
+            try:
+                await self._tarefa
+            except asyncio.CancelledError:
+                pass
+            self._tarefa = None
+        await self._cliente_async.aclose()
+        self._cliente.close()
+
+
+def criar_broker() -> BrokerMemoria:
+    """Backend configurado em BROKER_BACKEND ("memoria" ou "redis")."""
+    if settings.BROKER_BACKEND == "redis":
+        return BrokerRedis(settings.REDIS_URL, settings.BROKER_CANAL, settings.SSE_FILA_MAX)
+    if settings.BROKER_BACKEND == "memoria":
+        return BrokerMemoria(settings.SSE_FILA_MAX)
+    raise ValueError(f"BROKER_BACKEND inválido: {settings.BROKER_BACKEND!r} (use 'memoria' ou 'redis')")
+
+
+broker = criar_broker()
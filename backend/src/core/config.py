@@ -12,6 +12,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str # Deve ser carregada do ambiente/arquivo
     ACCESS_TOKEN_EXPIRE_MINUTES: int # Deve ser carregada
     REFRESH_TOKEN_EXPIRE_DAYS: int # Deve ser carregada
+    # Cache de tokens já validados em get_current_user (0 = desligado)
+    TOKEN_CACHE_MAX: int = 10000
+    TOKEN_CACHE_TTL: int = 300 # segundos; a entrada nunca passa do `exp` do token
 
     DATABASE_USER: str 
     DATABASE_PASSWORD: str
@@ -19,11 +22,77 @@ class Settings(BaseSettings):
     DATABASE_PORT: int
     DATABASE_NAME: str
 
+    # Engine / pool de conexões (ver database/connection.py e GET /health/db)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30 # segundos esperando uma conexão livre antes de falhar
+    DB_POOL_RECYCLE: int = 1800 # segundos; abaixo do wait_timeout do MySQL
+    DB_POOL_PRE_PING: bool = True
+    # Pool próprio do engine async (aiomysql: rotas /async e remetente de emails), criado só no primeiro uso
+    DB_ASYNC_POOL_SIZE: int = 5
+    DB_ASYNC_MAX_OVERFLOW: int = 5
+    DB_ECHO: bool = False # loga todo o SQL emitido (apenas para desenvolvimento)
+    DB_ISOLATION_LEVEL: str | None = None # ex: "READ COMMITTED"; None = padrão do servidor
+
+    # Tamanho dos lotes de INSERT multi-valores (ver database/bulk.py)
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+
+    # Tamanho dos lotes de DELETE na exclusão de eventos em segundo plano
+    BULK_DELETE_CHUNK_SIZE: int = 1000
+    EXCLUSAO_RESERVA: int = 300 # segundos sem renovação antes de outro worker retomar a exclusão
+
+    # Caixa de notificações: itens por página em GET /notifications/user/{id} (padrão e máximo)
+    NOTIFICACOES_LIMITE_PADRAO: int = 50
+    NOTIFICACOES_LIMITE_MAXIMO: int = 200
+    # Retenção (job em segundo plano): notificações mais antigas que RETENCAO_DIAS e, por usuário,
+    # as que passam das MAX_POR_USUARIO mais recentes são removidas em lotes de BULK_DELETE_CHUNK_SIZE.
+    # 0 desativa cada regra.
+    NOTIFICACOES_RETENCAO_DIAS: int = 180
+    NOTIFICACOES_MAX_POR_USUARIO: int = 1000
+    NOTIFICACOES_RETENCAO_INTERVALO: float = 3600 # segundos entre execuções do job
+
+    # Estado de importações/exclusões em segundo plano já concluídas: segundos em que continua
+    # consultável (GET .../import/disciplinas/{id}, GET .../{id}/deletion) antes de ser descartado
+    PROGRESSO_RETENCAO_SEGUNDOS: int = 3600
+
+    # Convites com mais usuários que isso retornam só os totais (listas via GET /participants paginado)
+    CONVITE_LIMITE_DETALHES: int = 500
+
+    # Senhas: custo do bcrypt e pool de processos que executa hash/verificação (0 = na própria thread)
+    BCRYPT_ROUNDS: int = 12
+    HASH_POOL_WORKERS: int = 2
+    HASH_MAX_PENDENTES: int = 64 # operações aguardando o pool; acima disso responde 503
+    HASH_FILA_TIMEOUT: float = 5.0 # segundos esperando uma vaga na fila antes do 503
+
+    # Códigos/tokens de recuperação de senha e progresso de importações (core/ttl_store.py):
+    # "memoria" (um worker) ou "sql" (tabela armazenamento_ttl, compartilhada entre workers)
+    TTL_STORE_BACKEND: str = "memoria"
+    TTL_STORE_MAX_ITENS: int = 10000 # limite do backend em memória
+
     # SMTP Configuration
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
+    SMTP_STARTTLS: bool = True # false para servidores de depuração locais
+    SMTP_TIMEOUT: float = 30
+    SMTP_CONEXAO_OCIOSA: int = 60 # segundos sem envios antes de fechar a conexão reaproveitada
+
+    # Outbox de emails (services/service_email.py)
+    EMAIL_REMETENTE: str = "" # From; vazio = SMTP_USER (ou nao-responda@agendai.local sem SMTP_USER)
+    EMAIL_LOTE: int = 50
+    EMAIL_INTERVALO: float = 10 # segundos entre verificações quando não há envio pendente
+    EMAIL_MAX_TENTATIVAS: int = 5
+    EMAIL_BACKOFF_BASE: int = 30 # segundos; dobra a cada nova falha
+    EMAIL_RESERVA: int = 300 # segundos em que um lote reservado ("enviando") fica com o worker antes de voltar à fila
+
+    # Notificações em tempo real (core/broker.py): "memoria" (um único worker) ou "redis"
+    # (pub/sub compartilhado entre workers em REDIS_URL)
+    BROKER_BACKEND: str = "memoria"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    BROKER_CANAL: str = "agendai:notificacoes"
+    SSE_FILA_MAX: int = 100 # mensagens pendentes por conexão; acima disso as novas são descartadas
+    SSE_KEEPALIVE: float = 15 # segundos sem mensagens antes de enviar um comentário de keepalive
 
     model_config = SettingsConfigDict(
         env_file=".env"
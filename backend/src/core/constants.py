@@ -40,3 +40,22 @@ NUM_PARA_DIA = {
     "6": "SEX",
     "7": "SAB",
 }
+
+# Dias da semana (0=segunda ... 6=domingo) cobertos por cada tipo de recorrência.
+# "unico" e "semanal" usam o dia da semana de data_inicio.
+DIAS_RECORRENCIA = {
+    "diario": "0123456",
+    "diario_uteis": "01234",
+}
+
+# Posição de cada dia na semana, para ordenar os dias de uma disciplina em Python.
+# Aceita tanto os nomes completos quanto as abreviações gravadas a partir de NUM_PARA_DIA.
+ORDEM_DIAS = {
+    "Segunda": 0, "SEG": 0,
+    "Terça": 1, "TER": 1,
+    "Quarta": 2, "QUA": 2,
+    "Quinta": 3, "QUI": 3,
+    "Sexta": 4, "SEX": 4,
+    "Sábado": 5, "SAB": 5,
+    "Domingo": 6, "DOM": 6,
+}
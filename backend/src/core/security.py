@@ -5,20 +5,137 @@ from jose import jwt, JWTError
 from .config import settings
 from ..schemas.jwt import TokenPayload
 from fastapi import HTTPException, status
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+import hashlib
+import threading
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes com custo diferente de BCRYPT_ROUNDS são marcados por `needs_update` e refeitos no login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
-def verificar_senha(senha_pura: str, senha_hash: str) -> bool:
+# ----------------------------------------------------------------------
+# POOL DE PROCESSOS PARA O BCRYPT
+# ----------------------------------------------------------------------
+# Cada hash/verificação custa ~200-300 ms de CPU. Rodam em um pool de processos limitado
+# (fora do GIL e das threads que atendem as requisições); no máximo HASH_MAX_PENDENTES
+# operações esperam na fila, acima disso a requisição falha rápido com 503.
+_pool_hash = None
+_pool_lock = threading.Lock()
+_vagas_hash = threading.BoundedSemaphore(settings.HASH_MAX_PENDENTES)
+metricas_hash = {
+    "pendentes": 0,
+    "concluidas": 0,
+    "rejeitadas": 0,
+    "tempo_fila_total_ms": 0.0,
+    "tempo_execucao_total_ms": 0.0,
+}
+
+
+def _medir(funcao, *args):
+    # Executado no processo do pool: retorna o resultado e o tempo de CPU gasto
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def _pegar_pool() -> ProcessPoolExecutor | None:
+    global _pool_hash
+    if settings.HASH_POOL_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool_hash is None:
+            _pool_hash = ProcessPoolExecutor(max_workers=settings.HASH_POOL_WORKERS)
+        return _pool_hash
+
+
+def _executar_hash(funcao, *args):
+    """Executa `funcao` no pool de hash (ou na própria thread com HASH_POOL_WORKERS=0)."""
+    if not _vagas_hash.acquire(timeout=settings.HASH_FILA_TIMEOUT):
+        with _pool_lock:
+            metricas_hash["rejeitadas"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado processando senhas. Tente novamente em instantes.",
+            headers={"Retry-After": "1"},
+        )
+    with _pool_lock:
+        metricas_hash["pendentes"] += 1
+    inicio = time.perf_counter()
+    try:
+        pool = _pegar_pool()
+        if pool is None:
+            resultado, duracao = _medir(funcao, *args)
+        else:
+            resultado, duracao = pool.submit(_medir, funcao, *args).result()
+        total = time.perf_counter() - inicio
+        with _pool_lock:
+            metricas_hash["concluidas"] += 1
+            metricas_hash["tempo_execucao_total_ms"] += duracao * 1000
+            metricas_hash["tempo_fila_total_ms"] += max(total - duracao, 0) * 1000
+        return resultado
+    finally:
+        with _pool_lock:
+            metricas_hash["pendentes"] -= 1
+        _vagas_hash.release()
+
+
+def estado_pool_hash() -> dict:
+    """Métricas do pool de hash (fila e tempos médios), para GET /health/hash."""
+    with _pool_lock:
+        concluidas = metricas_hash["concluidas"]
+        return {
+            "workers": settings.HASH_POOL_WORKERS,
+            "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            "max_pendentes": settings.HASH_MAX_PENDENTES,
+            "pendentes": metricas_hash["pendentes"],
+            "concluidas": concluidas,
+            "rejeitadas": metricas_hash["rejeitadas"],
+            "tempo_medio_fila_ms": round(metricas_hash["tempo_fila_total_ms"] / concluidas, 2) if concluidas else 0.0,
+            "tempo_medio_execucao_ms": round(metricas_hash["tempo_execucao_total_ms"] / concluidas, 2) if concluidas else 0.0,
+        }
+
+
+def encerrar_pool_hash():
+    global _pool_hash
+    with _pool_lock:
+        if _pool_hash is not None:
+            _pool_hash.shutdown(wait=False, cancel_futures=True)
+            _pool_hash = None
+
+
+# Funções de módulo (e não métodos de pwd_context) para serem enviadas aos processos do pool
+def _verificar(senha_pura: str, senha_hash: str) -> bool:
     return pwd_context.verify(senha_pura, senha_hash)
 
-def pegar_senha_hash(senha: str) -> str:
+def _verificar_e_atualizar(senha_pura: str, senha_hash: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(senha_pura, senha_hash)
+
+def _gerar_hash(senha: str) -> str:
     return pwd_context.hash(senha)
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None, tag: Optional[str] = None) -> str:
+
+def verificar_senha(senha_pura: str, senha_hash: str) -> bool:
+    return _executar_hash(_verificar, senha_pura, senha_hash)
+
+def verificar_e_atualizar_senha(senha_pura: str, senha_hash: str) -> tuple[bool, str | None]:
+    """Verifica a senha e, se o hash estiver desatualizado (custo/esquema), devolve o novo hash.
+
+    Retorna (senha correta, novo hash ou None).
+    """
+    return _executar_hash(_verificar_e_atualizar, senha_pura, senha_hash)
+
+def pegar_senha_hash(senha: str) -> str:
+    return _executar_hash(_gerar_hash, senha)
+
+def create_access_token(subject: str, expires_delta: Optional[timedelta] = None, tag: Optional[str] = None,
+                        uid: Optional[int] = None, role: Optional[str] = None) -> str:
     """Cria um JWT de acesso (access token).
 
     subject: normalmente o identificador do usuário (ex: email ou user_id)
     expires_delta: timedelta opcional para sobrescrever a expiração padrão nas settings
+    uid/role: id numérico e tipo ("universidade"/"usuario") do principal, para os serviços
+    não precisarem buscar o id pelo email
     Retorna: token JWT (string)
     """
     if expires_delta is None:
@@ -28,10 +145,14 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None,
     if tag is not None:
         # adiciona a claim 'tag' no payload (somente para frontend distinguir telas)
         to_encode["tag"] = tag
+    if uid is not None and role is not None:
+        to_encode["uid"] = uid
+        to_encode["role"] = role
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def create_refresh_token(subject: str, expires_delta: Optional[timedelta] = None, tag: Optional[str] = None) -> str:
+def create_refresh_token(subject: str, expires_delta: Optional[timedelta] = None, tag: Optional[str] = None,
+                         uid: Optional[int] = None, role: Optional[str] = None) -> str:
     """Cria um JWT de refresh (refresh token).
 
     Por padrão usa REFRESH_TOKEN_EXPIRE_DAYS das settings. expires_delta pode sobrescrever.
@@ -42,6 +163,9 @@ def create_refresh_token(subject: str, expires_delta: Optional[timedelta] = None
     to_encode = {"sub": subject, "type": "refresh", "exp": int(expire.timestamp())}
     if tag is not None:
         to_encode["tag"] = tag
+    if uid is not None and role is not None:
+        to_encode["uid"] = uid
+        to_encode["role"] = role
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
@@ -62,4 +186,56 @@ def decode_token(token: str) -> TokenPayload:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
+
+
+# ----------------------------------------------------------------------
+# CACHE DE TOKENS JÁ VALIDADOS
+# ----------------------------------------------------------------------
+# sha256(token) -> (TokenPayload, expira_em). LRU limitado a TOKEN_CACHE_MAX entradas; cada
+# entrada vale até o `exp` do token (no máximo TOKEN_CACHE_TTL segundos). Só tokens válidos
+# entram no cache: inválidos/expirados continuam passando por decode_token (401).
+_cache_tokens = OrderedDict()
+_cache_tokens_lock = threading.Lock()
+metricas_cache_tokens = {"hits": 0, "misses": 0}
+
+
+def decode_token_cache(token: str) -> TokenPayload:
+    """Igual a `decode_token`, reaproveitando o TokenPayload de tokens já validados. Cada
+    chamada recebe uma cópia: alterações no payload de uma requisição não vazam para outras."""
+    chave = hashlib.sha256(token.encode()).digest()
+    agora = time.time()
+    with _cache_tokens_lock:
+        entrada = _cache_tokens.get(chave)
+        if entrada is not None:
+            payload, expira_em = entrada
+            if agora < expira_em:
+                _cache_tokens.move_to_end(chave)
+                metricas_cache_tokens["hits"] += 1
+                return payload.model_copy()
+            del _cache_tokens[chave]
+        metricas_cache_tokens["misses"] += 1
+
+    payload = decode_token(token)
+
+    expira_em = agora + settings.TOKEN_CACHE_TTL
+    if payload.exp is not None:
+        expira_em = min(expira_em, payload.exp)
+    if settings.TOKEN_CACHE_MAX > 0 and expira_em > agora:
+        with _cache_tokens_lock:
+            _cache_tokens[chave] = (payload.model_copy(), expira_em)
+            _cache_tokens.move_to_end(chave)
+            while len(_cache_tokens) > settings.TOKEN_CACHE_MAX:
+                _cache_tokens.popitem(last=False)
+    return payload
+
+
+def estado_cache_tokens() -> dict:
+    """Tamanho e acertos/falhas do cache de tokens, para GET /health/tokens."""
+    with _cache_tokens_lock:
+        return {
+            "tamanho": len(_cache_tokens),
+            "max": settings.TOKEN_CACHE_MAX,
+            "hits": metricas_cache_tokens["hits"],
+            "misses": metricas_cache_tokens["misses"],
+        }
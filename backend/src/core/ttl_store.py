@@ -0,0 +1,155 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+import heapq
+import json
+import threading
+import time
+from .config import settings
+from ..models import models
+from ..database.connection import SessionLocal
+
+# Armazenamento chave -> dict com expiração (códigos e tokens de recuperação de senha).
+# Dois backends com a mesma interface:
+# - "memoria": por processo, com expiração ativa e limite de itens (um único worker);
+# - "sql": tabela armazenamento_ttl, compartilhada entre todos os workers/instâncias.
+# Escolhido por TTL_STORE_BACKEND; cada uso tem seu prefixo de chave.
+
+
+class Armazenamento(ABC):
+    """Interface dos backends. `valor` é um dict serializável em JSON."""
+
+    def __init__(self, prefixo: str):
+        self.prefixo = prefixo
+
+    def _chave(self, chave: str) -> str:
+        return f"{self.prefixo}:{chave}"
+
+    @abstractmethod
+    def definir(self, chave: str, valor: dict, ttl_segundos: int):
+        ...
+
+    @abstractmethod
+    def pegar(self, chave: str) -> dict | None:
+        """Valor da chave, ou None se não existir ou já tiver expirado."""
+
+    @abstractmethod
+    def consumir(self, chave: str) -> dict | None:
+        """Lê e remove a chave de forma atômica (uso único): só um chamador recebe o valor."""
+
+    @abstractmethod
+    def remover(self, chave: str):
+        ...
+
+
+class ArmazenamentoMemoria(Armazenamento):
+    """Backend em memória: itens expirados saem a cada operação (heap por expiração) e, acima
+    de `max_itens`, os mais antigos são descartados."""
+
+    def __init__(self, prefixo: str, max_itens: int):
+        super().__init__(prefixo)
+        self.max_itens = max_itens
+        self._itens = OrderedDict()  # chave -> (valor, expira_em)
+        self._expiracoes = []  # heap de (expira_em, chave); entradas sobrescritas são ignoradas
+        self._lock = threading.Lock()
+
+    def _expurgar(self, agora: float):
+        while self._expiracoes and self._expiracoes[0][0] <= agora:
+            expira_em, chave = heapq.heappop(self._expiracoes)
+            item = self._itens.get(chave)
+            if item is not None and item[1] == expira_em:
+                del self._itens[chave]
+        # Entradas órfãs (chaves sobrescritas/removidas) não deixam o heap crescer sem limite
+        if len(self._expiracoes) > 2 * max(len(self._itens), 1) + 64:
+            self._expiracoes = [(expira_em, chave) for chave, (_, expira_em) in self._itens.items()]
+            heapq.heapify(self._expiracoes)
+
+    def definir(self, chave: str, valor: dict, ttl_segundos: int):
+        chave = self._chave(chave)
+        agora = time.monotonic()
+        expira_em = agora + ttl_segundos
+        with self._lock:
+            self._expurgar(agora)
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            heapq.heappush(self._expiracoes, (expira_em, chave))
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def pegar(self, chave: str) -> dict | None:
+        with self._lock:
+            self._expurgar(time.monotonic())
+            item = self._itens.get(self._chave(chave))
+            return item[0] if item is not None else None
+
+    def consumir(self, chave: str) -> dict | None:
+        with self._lock:
+            self._expurgar(time.monotonic())
+            item = self._itens.pop(self._chave(chave), None)
+            return item[0] if item is not None else None
+
+    def remover(self, chave: str):
+        with self._lock:
+            self._itens.pop(self._chave(chave), None)
+
+    def __len__(self):
+        with self._lock:
+            self._expurgar(time.monotonic())
+            return len(self._itens)
+
+
+class ArmazenamentoSQL(Armazenamento):
+    """Backend na tabela armazenamento_ttl (sessão própria por operação). As linhas expiradas
+    são apagadas a cada escrita pelo índice de `expira_em`."""
+
+    def __init__(self, prefixo: str, sessao=SessionLocal):
+        super().__init__(prefixo)
+        self._sessao = sessao
+
+    def definir(self, chave: str, valor: dict, ttl_segundos: int):
+        chave = self._chave(chave)
+        agora = datetime.utcnow()
+        tabela = models.ArmazenamentoTTL
+        with self._sessao() as db:
+            db.execute(delete(tabela).where(tabela.expira_em <= agora))
+            db.execute(delete(tabela).where(tabela.chave == chave))
+            db.add(tabela(chave=chave, valor=json.dumps(valor), expira_em=agora + timedelta(seconds=ttl_segundos)))
+            db.commit()
+
+    def pegar(self, chave: str) -> dict | None:
+        tabela = models.ArmazenamentoTTL
+        with self._sessao() as db:
+            valor = db.scalar(select(tabela.valor).where(
+                tabela.chave == self._chave(chave),
+                tabela.expira_em > datetime.utcnow()
+            ))
+        return json.loads(valor) if valor is not None else None
+
+    def consumir(self, chave: str) -> dict | None:
+        chave = self._chave(chave)
+        tabela = models.ArmazenamentoTTL
+        with self._sessao() as db:
+            agora = datetime.utcnow()
+            valor = db.scalar(select(tabela.valor).where(tabela.chave == chave, tabela.expira_em > agora))
+            if valor is None:
+                return None
+            # Só o worker cujo DELETE removeu a linha fica com o valor
+            removidas = db.execute(delete(tabela).where(tabela.chave == chave, tabela.expira_em > agora)).rowcount
+            db.commit()
+        return json.loads(valor) if removidas else None
+
+    def remover(self, chave: str):
+        tabela = models.ArmazenamentoTTL
+        with self._sessao() as db:
+            db.execute(delete(tabela).where(tabela.chave == self._chave(chave)))
+            db.commit()
+
+
+def criar_armazenamento(prefixo: str) -> Armazenamento:
+    """Backend configurado em TTL_STORE_BACKEND ("memoria" ou "sql") para o prefixo dado."""
+    if settings.TTL_STORE_BACKEND == "sql":
+        return ArmazenamentoSQL(prefixo)
+    if settings.TTL_STORE_BACKEND == "memoria":
+        return ArmazenamentoMemoria(prefixo, settings.TTL_STORE_MAX_ITENS)
+    raise ValueError(f"TTL_STORE_BACKEND inválido: {settings.TTL_STORE_BACKEND!r} (use 'memoria' ou 'sql')")
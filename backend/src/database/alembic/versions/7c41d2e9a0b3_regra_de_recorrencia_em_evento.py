@@ -0,0 +1,34 @@
+"""regra de recorrencia em evento e excecoes em ocorrencia_evento
+
+Revision ID: 7c41d2e9a0b3
+Revises: 00b5e1114fa5
+Create Date: 2026-01-12 10:14:37.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41d2e9a0b3'
+down_revision: Union[str, Sequence[str], None] = '00b5e1114fa5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Eventos existentes ficam com dias_semana NULL e continuam usando as
+    # ocorrências já gravadas; apenas eventos novos passam a usar a regra.
+    op.add_column('evento', sa.Column('dias_semana', sa.String(length=7), nullable=True))
+    op.add_column('ocorrencia_evento', sa.Column('data_original', sa.DateTime(), nullable=True))
+    op.add_column('ocorrencia_evento', sa.Column('cancelada', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ocorrencia_evento', 'cancelada')
+    op.drop_column('ocorrencia_evento', 'data_original')
+    op.drop_column('evento', 'dias_semana')
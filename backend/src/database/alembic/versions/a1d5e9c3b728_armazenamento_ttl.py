@@ -0,0 +1,35 @@
+"""armazenamento_ttl: store compartilhado com expiracao
+
+Revision ID: a1d5e9c3b728
+Revises: f6a2d8c4e907
+Create Date: 2026-02-23 10:12:45.803114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d5e9c3b728'
+down_revision: Union[str, Sequence[str], None] = 'f6a2d8c4e907'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('armazenamento_ttl',
+    sa.Column('chave', sa.String(length=255), nullable=False),
+    sa.Column('valor', sa.Text(), nullable=False),
+    sa.Column('expira_em', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('chave')
+    )
+    op.create_index(op.f('ix_armazenamento_ttl_expira_em'), 'armazenamento_ttl', ['expira_em'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_armazenamento_ttl_expira_em'), table_name='armazenamento_ttl')
+    op.drop_table('armazenamento_ttl')
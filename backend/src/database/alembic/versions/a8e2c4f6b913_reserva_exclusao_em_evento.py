@@ -0,0 +1,28 @@
+"""reserva da exclusao em segundo plano em evento
+
+Revision ID: a8e2c4f6b913
+Revises: f7d3b2c8e416
+Create Date: 2026-03-30 09:41:22.718406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8e2c4f6b913'
+down_revision: Union[str, Sequence[str], None] = 'f7d3b2c8e416'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('evento', sa.Column('exclusao_reservada_em', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('evento', 'exclusao_reservada_em')
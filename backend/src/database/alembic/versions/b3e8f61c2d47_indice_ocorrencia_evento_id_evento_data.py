@@ -0,0 +1,28 @@
+"""indice composto em ocorrencia_evento (id_evento, data)
+
+Revision ID: b3e8f61c2d47
+Revises: 7c41d2e9a0b3
+Create Date: 2026-01-19 15:42:08.117362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e8f61c2d47'
+down_revision: Union[str, Sequence[str], None] = '7c41d2e9a0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_ocorrencia_evento_id_evento_data', 'ocorrencia_evento', ['id_evento', 'data'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ocorrencia_evento_id_evento_data', table_name='ocorrencia_evento')
@@ -0,0 +1,68 @@
+"""triggers que mantem usuario.dominio_reverso
+
+Revision ID: b7f1c3d9a524
+Revises: a8e2c4f6b913
+Create Date: 2026-04-06 10:12:48.530917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f1c3d9a524'
+down_revision: Union[str, Sequence[str], None] = 'a8e2c4f6b913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mesmo resultado de models.inverter_dominio ("vitor@aluno.uece.br" -> "br.uece.aluno"). Uma
+# coluna gerada não serve: o número de partes do domínio é variável e colunas geradas do MySQL
+# não aceitam laços nem funções armazenadas. Com os triggers, todo caminho de escrita (ORM,
+# update()/insert() do Core, inserções em lote e SQL direto) preenche a coluna.
+FUNCAO = """
+CREATE FUNCTION fn_inverter_dominio(email VARCHAR(255)) RETURNS VARCHAR(255)
+DETERMINISTIC NO SQL
+BEGIN
+    DECLARE dominio VARCHAR(255);
+    DECLARE parte VARCHAR(255);
+    DECLARE invertido VARCHAR(255) DEFAULT NULL;
+    IF email IS NULL OR LOCATE('@', email) = 0 THEN
+        RETURN NULL;
+    END IF;
+    SET dominio = LOWER(SUBSTRING_INDEX(email, '@', -1));
+    WHILE LOCATE('.', dominio) > 0 DO
+        SET parte = SUBSTRING_INDEX(dominio, '.', -1);
+        SET invertido = CONCAT_WS('.', invertido, parte);
+        SET dominio = LEFT(dominio, CHAR_LENGTH(dominio) - CHAR_LENGTH(parte) - 1);
+    END WHILE;
+    RETURN CONCAT_WS('.', invertido, dominio);
+END
+"""
+
+TRIGGERS = {
+    "trg_usuario_dominio_reverso_insert": "BEFORE INSERT",
+    "trg_usuario_dominio_reverso_update": "BEFORE UPDATE",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(FUNCAO)
+    for nome, momento in TRIGGERS.items():
+        op.execute(f"""
+            CREATE TRIGGER {nome} {momento} ON usuario FOR EACH ROW
+            SET NEW.dominio_reverso = fn_inverter_dominio(NEW.email)
+        """)
+
+    # Recalcular os usuários existentes (linhas gravadas por caminhos que pularam o ORM)
+    op.execute(sa.text("UPDATE usuario SET dominio_reverso = fn_inverter_dominio(email)"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nome in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {nome}")
+    op.execute("DROP FUNCTION IF EXISTS fn_inverter_dominio")
@@ -0,0 +1,42 @@
+"""email_pendente: outbox de emails
+
+Revision ID: c2f8a6d4e190
+Revises: a1d5e9c3b728
+Create Date: 2026-03-02 15:40:27.116852
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2f8a6d4e190'
+down_revision: Union[str, Sequence[str], None] = 'a1d5e9c3b728'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('email_pendente',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('destinatario', sa.String(length=255), nullable=False),
+    sa.Column('assunto', sa.String(length=255), nullable=False),
+    sa.Column('corpo', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), server_default='pendente', nullable=False),
+    sa.Column('tentativas', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('proxima_tentativa', sa.DateTime(), nullable=False),
+    sa.Column('ultimo_erro', sa.String(length=500), nullable=True),
+    sa.Column('criado_em', sa.DateTime(), nullable=False),
+    sa.Column('enviado_em', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_email_pendente_status_proxima', 'email_pendente', ['status', 'proxima_tentativa'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_email_pendente_status_proxima', table_name='email_pendente')
+    op.drop_table('email_pendente')
@@ -0,0 +1,34 @@
+"""valor de armazenamento_ttl como mediumtext
+
+Revision ID: c3e9a7f1d482
+Revises: b7f1c3d9a524
+Create Date: 2026-04-08 16:25:03.184270
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e9a7f1d482'
+down_revision: Union[str, Sequence[str], None] = 'b7f1c3d9a524'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('armazenamento_ttl', 'valor',
+               existing_type=sa.Text(),
+               type_=sa.Text(length=16777215),
+               existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('armazenamento_ttl', 'valor',
+               existing_type=sa.Text(length=16777215),
+               type_=sa.Text(),
+               existing_nullable=False)
@@ -0,0 +1,94 @@
+"""agenda_usuario: read model da agenda por usuario
+
+Revision ID: c5a9d2f7e813
+Revises: b3e8f61c2d47
+Create Date: 2026-01-26 09:31:52.640218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9d2f7e813'
+down_revision: Union[str, Sequence[str], None] = 'b3e8f61c2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Colunas preenchidas a partir do evento (e) e da disciplina (d) nos dois backfills abaixo
+_COLUNAS = """
+    email_usuario, id_evento, is_proprietario, nome, descricao, categoria, recorrencia,
+    local_padrao, data_inicio, data_termino, horario_inicio, horario_termino, dias_semana,
+    horario_disciplina, dias, primeira_data, ultima_data
+"""
+
+_VALORES = """
+    e.id, e.email_proprietario = {email}, e.nome, e.descricao, e.categoria, e.recorrencia,
+    e.local_padrao, e.data_inicio, e.data_termino, e.horario_inicio, e.horario_termino, e.dias_semana,
+    d.horario,
+    CASE WHEN d.id_evento IS NOT NULL THEN COALESCE((
+        SELECT GROUP_CONCAT(dd.dia ORDER BY FIELD(dd.dia,
+            'Segunda', 'SEG', 'Terça', 'TER', 'Quarta', 'QUA', 'Quinta', 'QUI',
+            'Sexta', 'SEX', 'Sábado', 'SAB', 'Domingo', 'DOM') SEPARATOR ',')
+        FROM disciplina_dias dd WHERE dd.id_disciplina = d.id_evento
+    ), '') END,
+    LEAST(e.data_inicio, COALESCE((SELECT MIN(o.data) FROM ocorrencia_evento o WHERE o.id_evento = e.id), e.data_inicio)),
+    GREATEST(e.data_termino, COALESCE((SELECT MAX(o.data) FROM ocorrencia_evento o WHERE o.id_evento = e.id), e.data_termino))
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('agenda_usuario',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('email_usuario', sa.String(length=255), nullable=False),
+    sa.Column('id_evento', sa.Integer(), nullable=False),
+    sa.Column('is_proprietario', sa.Boolean(), nullable=False),
+    sa.Column('nome', sa.String(length=255), nullable=True),
+    sa.Column('descricao', sa.String(length=500), nullable=True),
+    sa.Column('categoria', sa.String(length=255), nullable=True),
+    sa.Column('recorrencia', sa.String(length=255), nullable=True),
+    sa.Column('local_padrao', sa.String(length=255), nullable=True),
+    sa.Column('data_inicio', sa.DateTime(), nullable=True),
+    sa.Column('data_termino', sa.DateTime(), nullable=True),
+    sa.Column('horario_inicio', sa.Time(), nullable=True),
+    sa.Column('horario_termino', sa.Time(), nullable=True),
+    sa.Column('dias_semana', sa.String(length=7), nullable=True),
+    sa.Column('horario_disciplina', sa.String(length=255), nullable=True),
+    sa.Column('dias', sa.String(length=100), nullable=True),
+    sa.Column('primeira_data', sa.DateTime(), nullable=True),
+    sa.Column('ultima_data', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_evento'], ['evento.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email_usuario', 'id_evento', name='uq_agenda_usuario_email_evento')
+    )
+    op.create_index('ix_agenda_usuario_email_periodo', 'agenda_usuario', ['email_usuario', 'ultima_data', 'primeira_data'], unique=False)
+    op.create_index(op.f('ix_agenda_usuario_id_evento'), 'agenda_usuario', ['id_evento'], unique=False)
+
+    # Backfill: usuários veem os eventos em que são convidados...
+    op.execute(f"""
+        INSERT INTO agenda_usuario ({_COLUNAS})
+        SELECT DISTINCT u.email, {_VALORES.format(email='u.email')}
+        FROM convidado c
+        JOIN usuario u ON u.id = c.id_usuario
+        JOIN evento e ON e.id = c.id_evento
+        LEFT JOIN disciplina d ON d.id_evento = e.id
+    """)
+    # ... e universidades, os eventos de que são proprietárias
+    op.execute(f"""
+        INSERT INTO agenda_usuario ({_COLUNAS})
+        SELECT un.email, {_VALORES.format(email='un.email')}
+        FROM evento e
+        JOIN universidade un ON un.email = e.email_proprietario
+        LEFT JOIN disciplina d ON d.id_evento = e.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_agenda_usuario_id_evento'), table_name='agenda_usuario')
+    op.drop_index('ix_agenda_usuario_email_periodo', table_name='agenda_usuario')
+    op.drop_table('agenda_usuario')
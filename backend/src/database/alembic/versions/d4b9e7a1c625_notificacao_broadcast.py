@@ -0,0 +1,49 @@
+"""notificacao_broadcast e leitura_broadcast
+
+Revision ID: d4b9e7a1c625
+Revises: c2f8a6d4e190
+Create Date: 2026-03-09 09:05:51.642870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4b9e7a1c625'
+down_revision: Union[str, Sequence[str], None] = 'c2f8a6d4e190'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('notificacao_broadcast',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('data', sa.DateTime(), nullable=False),
+    sa.Column('mensagem', sa.String(length=255), nullable=False),
+    sa.Column('evento', sa.String(length=255), nullable=True),
+    sa.Column('alvo_tipo', sa.String(length=20), nullable=False),
+    sa.Column('alvo_id', sa.Integer(), nullable=True),
+    sa.Column('alvo_dominio', sa.String(length=255), nullable=True),
+    sa.Column('email_autor', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notificacao_broadcast_alvo_id', 'notificacao_broadcast', ['alvo_tipo', 'alvo_id'], unique=False)
+    op.create_index('ix_notificacao_broadcast_alvo_dominio', 'notificacao_broadcast', ['alvo_tipo', 'alvo_dominio'], unique=False)
+    op.create_table('leitura_broadcast',
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('ultimo_id_lido', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_usuario')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('leitura_broadcast')
+    op.drop_index('ix_notificacao_broadcast_alvo_dominio', table_name='notificacao_broadcast')
+    op.drop_index('ix_notificacao_broadcast_alvo_id', table_name='notificacao_broadcast')
+    op.drop_table('notificacao_broadcast')
@@ -0,0 +1,44 @@
+"""dominio reverso do email em usuario
+
+Revision ID: d8e4b1a6f392
+Revises: c5a9d2f7e813
+Create Date: 2026-02-02 14:07:19.305527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e4b1a6f392'
+down_revision: Union[str, Sequence[str], None] = 'c5a9d2f7e813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _inverter_dominio(email):
+    # Cópia de models.inverter_dominio (a migração não depende do código da aplicação)
+    if not email or "@" not in email:
+        return None
+    return ".".join(reversed(email.rsplit("@", 1)[1].lower().split(".")))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('usuario', sa.Column('dominio_reverso', sa.String(length=255), nullable=True))
+    op.create_index(op.f('ix_usuario_dominio_reverso'), 'usuario', ['dominio_reverso'], unique=False)
+
+    # Preencher os usuários existentes
+    conn = op.get_bind()
+    usuarios = conn.execute(sa.text("SELECT id, email FROM usuario WHERE email IS NOT NULL")).fetchall()
+    valores = [{"id": id_usuario, "dominio": _inverter_dominio(email)} for id_usuario, email in usuarios]
+    if valores:
+        conn.execute(sa.text("UPDATE usuario SET dominio_reverso = :dominio WHERE id = :id"), valores)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_usuario_dominio_reverso'), table_name='usuario')
+    op.drop_column('usuario', 'dominio_reverso')
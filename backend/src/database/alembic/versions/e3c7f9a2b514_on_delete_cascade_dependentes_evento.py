@@ -0,0 +1,53 @@
+"""on delete cascade nas dependencias de evento
+
+Revision ID: e3c7f9a2b514
+Revises: d8e4b1a6f392
+Create Date: 2026-02-09 11:22:40.918364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3c7f9a2b514'
+down_revision: Union[str, Sequence[str], None] = 'd8e4b1a6f392'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabela, colunas, tabela referenciada, colunas referenciadas)
+# Com CASCADE, um único DELETE FROM evento remove toda a cadeia de dependências.
+_DEPENDENCIAS = [
+    ('ocorrencia_evento', ['id_evento'], 'evento', ['id']),
+    ('presenca', ['id_ocorrencia_evento'], 'ocorrencia_evento', ['id']),
+    ('convidado', ['id_evento'], 'evento', ['id']),
+    ('disciplina', ['id_evento'], 'evento', ['id']),
+    ('disciplina_dias', ['id_disciplina'], 'disciplina', ['id_evento']),
+    ('curso_disciplina', ['id_disciplina'], 'disciplina', ['id_evento']),
+    ('agenda_usuario', ['id_evento'], 'evento', ['id']),
+]
+
+
+def _recriar_fks(ondelete) -> None:
+    # As FKs foram criadas sem nome (o MySQL gera <tabela>_ibfk_N); o nome atual vem do inspector
+    inspector = sa.inspect(op.get_bind())
+    for tabela, colunas, referida, colunas_referidas in _DEPENDENCIAS:
+        nome = next(
+            fk['name'] for fk in inspector.get_foreign_keys(tabela)
+            if fk['constrained_columns'] == colunas and fk['referred_table'] == referida
+        )
+        op.drop_constraint(nome, tabela, type_='foreignkey')
+        op.create_foreign_key(nome, tabela, referida, colunas, colunas_referidas, ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recriar_fks('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recriar_fks(None)
@@ -0,0 +1,35 @@
+"""lida em notificacao e indices da caixa de entrada
+
+Revision ID: e5c1a7b9d302
+Revises: d4b9e7a1c625
+Create Date: 2026-03-16 10:27:14.305918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5c1a7b9d302'
+down_revision: Union[str, Sequence[str], None] = 'd4b9e7a1c625'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notificacao', sa.Column('lida', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.create_index('ix_notificacao_usuario_data_id', 'notificacao', ['id_usuario', 'data', 'id'], unique=False)
+    op.create_index('ix_notificacao_usuario_lida', 'notificacao', ['id_usuario', 'lida'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # O MySQL descartou o índice implícito da FK id_usuario ao criar os compostos; a FK
+    # precisa de um índice, então ele volta antes de os compostos saírem
+    op.create_index('id_usuario', 'notificacao', ['id_usuario'], unique=False)
+    op.drop_index('ix_notificacao_usuario_lida', table_name='notificacao')
+    op.drop_index('ix_notificacao_usuario_data_id', table_name='notificacao')
+    op.drop_column('notificacao', 'lida')
@@ -0,0 +1,28 @@
+"""tombstone excluido_em em evento
+
+Revision ID: f6a2d8c4e907
+Revises: e3c7f9a2b514
+Create Date: 2026-02-16 16:48:03.271590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a2d8c4e907'
+down_revision: Union[str, Sequence[str], None] = 'e3c7f9a2b514'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('evento', sa.Column('excluido_em', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('evento', 'excluido_em')
@@ -0,0 +1,28 @@
+"""indice em notificacao (data) para a retencao
+
+Revision ID: f7d3b2c8e416
+Revises: e5c1a7b9d302
+Create Date: 2026-03-23 14:08:37.562190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7d3b2c8e416'
+down_revision: Union[str, Sequence[str], None] = 'e5c1a7b9d302'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_notificacao_data', 'notificacao', ['data'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notificacao_data', table_name='notificacao')
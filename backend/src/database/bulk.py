@@ -0,0 +1,29 @@
+from typing import Iterable
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from ..core.config import settings
+
+
+def inserir_em_lotes(db: Session, tabela, linhas: Iterable[dict], tamanho_lote: int | None = None) -> int:
+    """Insere linhas com INSERT multi-valores do Core, em lotes de `tamanho_lote`.
+
+    Evita o unit-of-work do ORM (um objeto rastreado por linha): cada lote vira um único
+    `INSERT ... VALUES (...), (...), ...`. Roda dentro da transação da sessão; o commit
+    fica a cargo do chamador. `tabela` pode ser uma Table ou uma classe mapeada.
+    Retorna o total de linhas inseridas.
+    """
+    tabela = getattr(tabela, "__table__", tabela)
+    tamanho_lote = tamanho_lote or settings.BULK_INSERT_CHUNK_SIZE
+
+    total = 0
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho_lote:
+            db.execute(insert(tabela).values(lote))
+            total += len(lote)
+            lote = []
+    if lote:
+        db.execute(insert(tabela).values(lote))
+        total += len(lote)
+    return total
@@ -1,11 +1,14 @@
 import sqlalchemy as db
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 import sys
+import threading
 import os
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..', '..'))
 sys.path.append(project_root)
 from src.models.models import Base
+from src.core.config import settings
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,10 +20,23 @@ port = os.getenv("DATABASE_PORT")
 database = os.getenv("DATABASE_NAME")
 
 connect_string = f"mysql+pymysql://{user}:{senha}@{host}:{port}/{database}"
-# Do not open a DB connection at import time. Create the engine with pool_pre_ping
-# so connections are checked/renewed when used. SessionLocal will create sessions
-# on demand.
-engine = db.create_engine(connect_string, echo=True, pool_pre_ping=True)
+# Do not open a DB connection at import time. Pool, echo and isolation level come
+# from Settings (DB_*); with DB_POOL_PRE_PING connections are checked/renewed when
+# used. SessionLocal will create sessions on demand.
+def _opcoes_engine(pool_size: int, max_overflow: int) -> dict:
+    opcoes = {
+        "echo": settings.DB_ECHO,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if settings.DB_ISOLATION_LEVEL:
+        opcoes["isolation_level"] = settings.DB_ISOLATION_LEVEL
+    return opcoes
+
+engine = db.create_engine(connect_string, **_opcoes_engine(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW))
 Session = sessionmaker(bind=engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 def get_db():
@@ -29,3 +45,51 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Caminho async (aiomysql) para as rotas em /async: mesmo banco,
+# pool próprio (DB_ASYNC_*). O engine só é criado no primeiro uso, para workers que nunca
+# usam o caminho async não manterem um segundo pool.
+# expire_on_commit=False evita recarregar atributos (lazy load não existe em AsyncSession).
+async_connect_string = f"mysql+aiomysql://{user}:{senha}@{host}:{port}/{database}"
+_async_engine = None
+_async_engine_lock = threading.Lock()
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)  # bind em pegar_async_engine
+
+
+def pegar_async_engine(criar: bool = True):
+    """Engine async, criado (e ligado a AsyncSessionLocal) na primeira chamada. Com
+    `criar=False`, retorna None se ainda não existir."""
+    global _async_engine
+    if _async_engine is None and criar:
+        with _async_engine_lock:
+            if _async_engine is None:
+                _async_engine = create_async_engine(
+                    async_connect_string,
+                    **_opcoes_engine(settings.DB_ASYNC_POOL_SIZE, settings.DB_ASYNC_MAX_OVERFLOW)
+                )
+                AsyncSessionLocal.configure(bind=_async_engine)
+    return _async_engine
+
+
+def nova_sessao_async() -> AsyncSession:
+    pegar_async_engine()
+    return AsyncSessionLocal()
+
+
+async def get_async_db():
+    async with nova_sessao_async() as db:
+        yield db
+
+
+def estado_pool(engine) -> dict:
+    """Contadores atuais do pool (QueuePool) de um engine, para GET /health/db."""
+    pool = engine.pool
+    return {
+        "tamanho": pool.size(),
+        "em_uso": pool.checkedout(),
+        "livres": pool.checkedin(),
+        # overflow() é negativo enquanto o pool ainda não abriu todas as DB_POOL_SIZE conexões
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
@@ -1,23 +1,54 @@
 import sys
 import os
-from fastapi import FastAPI
+import threading
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, status
+from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..'))
 sys.path.append(project_root)
 from src.models.models import Base
-from src.database.connection import engine # Se você usa um engine global
+from src.database.connection import engine, pegar_async_engine, estado_pool # Se você usa um engine global
 from src.api import endpoints_auth # Importa o seu router de autenticação
 from src.api import endpoints_events
+from src.api import endpoints_events_async
 from src.api import endpoints_users
 from src.api import endpoints_courses
 from src.api import endpoints_notifications
+from src.services import service_deletion, service_email, service_retention
+from src.core import security
+from src.core.broker import broker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Retoma exclusões de eventos interrompidas por um reinício (sem bloquear a inicialização)
+    threading.Thread(target=service_deletion.retomar_exclusoes_pendentes, daemon=True).start()
+    # Envio dos emails da outbox (boas-vindas, recuperação de senha) em segundo plano
+    remetente = asyncio.create_task(service_email.remetente.executar())
+    # Notificações em tempo real (com BROKER_BACKEND=redis, escuta o canal compartilhado)
+    await broker.iniciar()
+    # Retenção de notificações (idade e limite por usuário) em segundo plano
+    retencao = asyncio.create_task(service_retention.executar_retencao_periodica())
+    yield
+    await broker.encerrar()
+    for tarefa in (remetente, retencao):
+        tarefa.cancel()
+        try:
+            await tarefa
+        except asyncio.CancelledError:
+            pass
+    security.encerrar_pool_hash()
+
 
 # 1. Inicializa a aplicação FastAPI
 app = FastAPI(
     title="Agendai API",
     description="API para gerenciamento de eventos e usuários.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -25,7 +56,8 @@ app.add_middleware(
     allow_origins=["http://localhost:5173"],
     allow_credentials=False,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "Accept", "Origin", "X-Requested-With"]
+    allow_headers=["Authorization", "Content-Type", "Accept", "Origin", "X-Requested-With"],
+    expose_headers=["X-Next-Cursor"]
 )
 # 2. Configuração do Banco de Dados (Opcional, mas útil para o dev)
 # Descomente a linha abaixo se quiser que as tabelas sejam criadas automaticamente
@@ -36,6 +68,7 @@ app.add_middleware(
 # O módulo endpoints_auth deve ser acessível via importação relativa.
 app.include_router(endpoints_auth.router)
 app.include_router(endpoints_events.router)
+app.include_router(endpoints_events_async.router)
 app.include_router(endpoints_users.router)
 app.include_router(endpoints_courses.router)
 app.include_router(endpoints_notifications.router)
@@ -45,5 +78,46 @@ app.include_router(endpoints_notifications.router)
 def read_root():
     return {"message": "API Agendai está rodando com FastAPI!"}
 
+@app.get("/health/db")
+def health_db(response: Response):
+    """
+    Verifica a conexão com o banco (SELECT 1) e expõe os contadores dos pools sync e async
+    (tamanho, em_uso, livres, overflow) para dimensionar DB_POOL_SIZE / DB_MAX_OVERFLOW.
+    """
+    try:
+        with engine.connect() as conexao:
+            conexao.execute(text("SELECT 1"))
+        banco = "ok"
+    except Exception as e:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        banco = f"erro: {str(e)}"
+    async_engine = pegar_async_engine(criar=False)
+    return {
+        "banco": banco,
+        "pool": estado_pool(engine),
+        # None enquanto o caminho async não foi usado neste worker
+        "pool_async": estado_pool(async_engine.sync_engine) if async_engine is not None else None,
+    }
+
+@app.get("/health/hash")
+def health_hash():
+    """Fila e tempos médios do pool de processos do bcrypt (login/cadastro/redefinição de senha)."""
+    return security.estado_pool_hash()
+
+@app.get("/health/tokens")
+def health_tokens():
+    """Tamanho e acertos/falhas do cache de tokens validados (get_current_user)."""
+    return security.estado_cache_tokens()
+
+@app.get("/health/broker")
+def health_broker():
+    """Backend do broker de notificações e conexões em tempo real abertas neste worker."""
+    return broker.estado()
+
+@app.get("/health/retencao")
+def health_retencao():
+    """Horário e totais removidos na última execução da retenção de notificações."""
+    return service_retention.ultima_execucao
+
 # Se o seu Docker está chamando 'src.main:app', este arquivo deve estar em 'src/main.py'.
-# Se o arquivo estiver em 'backend/main.py', verifique se o caminho no docker-compose está correto.
\ No newline at end of file
+# Se o arquivo estiver em 'backend/main.py', verifique se o caminho no docker-compose está correto.
@@ -1,10 +1,18 @@
 from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey
 import sqlalchemy as db
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.orm import relationship, declarative_base, validates
 import sqlalchemy as db 
 
 Base = declarative_base()
 
+
+def inverter_dominio(email: str | None) -> str | None:
+    """Domínio do email com as partes invertidas ("vitor@aluno.uece.br" -> "br.uece.aluno"),
+    para que domínio e subdomínios sejam um prefixo comum no índice."""
+    if not email or "@" not in email:
+        return None
+    return ".".join(reversed(email.rsplit("@", 1)[1].lower().split(".")))
+
 # --- DEFINIÇÃO DAS CLASSES (sem acentos) ---
 
 
@@ -49,6 +57,11 @@ class Usuario(Base):
     email = db.Column(db.String(255), unique=True)
     cpf = db.Column(db.String(11), unique=True)
     senha = db.Column(db.String(255))
+    # Domínio invertido do email (ver inverter_dominio). No banco, triggers de INSERT/UPDATE
+    # (fn_inverter_dominio) preenchem a coluna em todo caminho de escrita; o validador abaixo
+    # só mantém o valor do objeto em memória coerente antes do flush.
+    # Convites "todos@uece.br" viram: dominio_reverso = 'br.uece' OR LIKE 'br.uece.%'
+    dominio_reverso = db.Column(db.String(255), index=True)
 
     # Relationships
     aluno = relationship("Aluno", back_populates="usuario", uselist=False)
@@ -56,6 +69,11 @@ class Usuario(Base):
     notificacao = relationship("Notificacao", back_populates="usuario")
     convidado = relationship("Convidado", back_populates="usuario")
 
+    @validates("email")
+    def _preencher_dominio_reverso(self, key, email):
+        self.dominio_reverso = inverter_dominio(email)
+        return email
+
 
 class Aluno(Base):
     __tablename__ = "aluno"
@@ -91,11 +109,46 @@ class Notificacao(Base):
     data = db.Column(db.DateTime)
     mensagem = db.Column("mensagem", db.String(255))
     evento = db.Column("evento", db.String(255)) # Mudei nome da coluna pra evitar conflito com a tabela Evento, mas mantive string original se preferir
+    lida = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    __table_args__ = (
+        # Caixa de entrada paginada por (data, id) e contagem de não lidas sem ler as notificações
+        db.Index("ix_notificacao_usuario_data_id", "id_usuario", "data", "id"),
+        db.Index("ix_notificacao_usuario_lida", "id_usuario", "lida"),
+        # Retenção por idade em lotes, sem varrer a tabela
+        db.Index("ix_notificacao_data", "data"),
+    )
 
     # Relationships
     usuario = relationship("Usuario", back_populates="notificacao")
 
 
+class NotificacaoBroadcast(Base):
+    __tablename__ = "notificacao_broadcast"
+    # Avisos para um público inteiro gravados uma única vez (fan-out na leitura): convidados de
+    # um evento, alunos de um curso ou usuários de um domínio de email (e subdomínios).
+    __table_args__ = (
+        db.Index("ix_notificacao_broadcast_alvo_id", "alvo_tipo", "alvo_id"),
+        db.Index("ix_notificacao_broadcast_alvo_dominio", "alvo_tipo", "alvo_dominio"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    data = db.Column(db.DateTime, nullable=False)
+    mensagem = db.Column(db.String(255), nullable=False)
+    evento = db.Column(db.String(255))
+    alvo_tipo = db.Column(db.String(20), nullable=False) # evento | curso | dominio
+    alvo_id = db.Column(db.Integer) # id do evento ou do curso
+    alvo_dominio = db.Column(db.String(255)) # domínio invertido (ver inverter_dominio), ex: 'br.uece'
+    email_autor = db.Column(db.String(255))
+
+
+class LeituraBroadcast(Base):
+    __tablename__ = "leitura_broadcast"
+    # Cursor de leitura por usuário: broadcasts com id <= ultimo_id_lido estão lidos
+    id_usuario = db.Column(db.Integer, ForeignKey("usuario.id", ondelete="CASCADE"), primary_key=True)
+    ultimo_id_lido = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
 class Evento(Base):
     __tablename__ = "evento"
     
@@ -111,18 +164,28 @@ class Evento(Base):
     horario_inicio = db.Column(db.Time)
     horario_termino = db.Column(db.Time)
     email_proprietario = db.Column(db.String(255))
+    # Regra de recorrência: dias da semana (0=segunda ... 6=domingo) em que o evento ocorre.
+    # NULL indica evento antigo, com todas as ocorrências gravadas em ocorrencia_evento.
+    dias_semana = db.Column(db.String(7))
+    # Tombstone da exclusão em segundo plano: o evento some das consultas enquanto os
+    # dependentes são removidos em lotes (ver services/service_deletion.py)
+    excluido_em = db.Column(db.DateTime)
+    # Reserva da exclusão em segundo plano: o worker que a processa renova a cada lote, e
+    # outro worker só assume a exclusão depois que a reserva vence (EXCLUSAO_RESERVA)
+    exclusao_reservada_em = db.Column(db.DateTime)
 
     # Relationships
     universidade = relationship("Universidade", back_populates="eventos")
-    ocorrencia_evento = relationship("OcorrenciaEvento", back_populates="evento")
-    disciplina = relationship("Disciplina", back_populates="evento", uselist=False)
-    convidados = relationship("Convidado", back_populates="evento")
+    # Dependentes removidos pelo banco (ON DELETE CASCADE) ao apagar o evento
+    ocorrencia_evento = relationship("OcorrenciaEvento", back_populates="evento", passive_deletes=True)
+    disciplina = relationship("Disciplina", back_populates="evento", uselist=False, passive_deletes=True)
+    convidados = relationship("Convidado", back_populates="evento", passive_deletes=True)
 
 
 class Disciplina(Base):
     __tablename__ = "disciplina"
     
-    id_evento = db.Column(db.Integer, ForeignKey("evento.id"), primary_key=True)
+    id_evento = db.Column(db.Integer, ForeignKey("evento.id", ondelete="CASCADE"), primary_key=True)
     id_professor = db.Column(db.Integer, ForeignKey("professor.id_usuario"))
     horario = db.Column(db.String(255))
     nome = db.Column(db.String(255))
@@ -130,15 +193,15 @@ class Disciplina(Base):
     # Relationships
     evento = relationship("Evento", back_populates="disciplina")
     professor = relationship("Professor", back_populates="disciplinas")
-    disciplina_dias = relationship("DisciplinaDias", back_populates="disciplina")
-    curso_disciplina = relationship("CursoDisciplina", back_populates="disciplina")
+    disciplina_dias = relationship("DisciplinaDias", back_populates="disciplina", passive_deletes=True)
+    curso_disciplina = relationship("CursoDisciplina", back_populates="disciplina", passive_deletes=True)
 
 
 class DisciplinaDias(Base):
     __tablename__ = "disciplina_dias"
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    id_disciplina = db.Column(db.Integer, ForeignKey("disciplina.id_evento"), nullable=False)
+    id_disciplina = db.Column(db.Integer, ForeignKey("disciplina.id_evento", ondelete="CASCADE"), nullable=False)
     dia = db.Column(db.String(10), nullable=False)
 
     # Relationships
@@ -150,7 +213,7 @@ class CursoDisciplina(Base):
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     id_curso = db.Column(db.Integer, ForeignKey("curso.id"))
-    id_disciplina = db.Column(db.Integer, ForeignKey("disciplina.id_evento"))
+    id_disciplina = db.Column(db.Integer, ForeignKey("disciplina.id_evento", ondelete="CASCADE"))
     creditos = db.Column(db.Integer)
 
     # Relationships
@@ -160,24 +223,31 @@ class CursoDisciplina(Base):
 
 class OcorrenciaEvento(Base):
     __tablename__ = "ocorrencia_evento" # OcorrênciaEvento -> ocorrencia_evento
+    __table_args__ = (
+        # Consultas por evento + intervalo de datas (data >= inicio AND data < fim)
+        db.Index("ix_ocorrencia_evento_id_evento_data", "id_evento", "data"),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    id_evento = db.Column(db.Integer, ForeignKey("evento.id"))
+    id_evento = db.Column(db.Integer, ForeignKey("evento.id", ondelete="CASCADE"))
     local = db.Column(db.String(255))
     data = db.Column(db.DateTime)
     horario_inicio = db.Column(db.Time)
     horario_termino = db.Column(db.Time)
+    # Exceções da regra de recorrência: data da regra substituída e se ela foi cancelada
+    data_original = db.Column(db.DateTime)
+    cancelada = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     # Relationships
     evento = relationship("Evento", back_populates="ocorrencia_evento")
-    presenca = relationship("Presenca", back_populates="ocorrencia_evento")
+    presenca = relationship("Presenca", back_populates="ocorrencia_evento", passive_deletes=True)
 
 
 class Convidado(Base):
     __tablename__ = "convidado"
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    id_evento = db.Column(db.Integer, ForeignKey("evento.id"))
+    id_evento = db.Column(db.Integer, ForeignKey("evento.id", ondelete="CASCADE"))
     id_usuario = db.Column(db.Integer, ForeignKey("usuario.id"))
 
     # Relationships
@@ -185,14 +255,81 @@ class Convidado(Base):
     usuario = relationship("Usuario", back_populates="convidado")
 
 
+class AgendaUsuario(Base):
+    __tablename__ = "agenda_usuario"
+    # Read model da agenda (GET /events/): uma linha por (usuário, evento) com os campos planos
+    # exibidos em cada ocorrência e a regra de recorrência, mantida pelos serviços de eventos
+    # e convidados. As ocorrências continuam sendo expandidas sob demanda a partir da regra.
+    __table_args__ = (
+        db.UniqueConstraint("email_usuario", "id_evento", name="uq_agenda_usuario_email_evento"),
+        # email = ? AND ultima_data >= inicio AND primeira_data < fim
+        db.Index("ix_agenda_usuario_email_periodo", "email_usuario", "ultima_data", "primeira_data"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Email de Usuario (convidado) ou de Universidade (proprietária)
+    email_usuario = db.Column(db.String(255), nullable=False)
+    id_evento = db.Column(db.Integer, ForeignKey("evento.id", ondelete="CASCADE"), nullable=False, index=True)
+    is_proprietario = db.Column(db.Boolean, nullable=False, default=False)
+    nome = db.Column(db.String(255))
+    descricao = db.Column(db.String(500))
+    categoria = db.Column(db.String(255))
+    recorrencia = db.Column(db.String(255))
+    local_padrao = db.Column(db.String(255))
+    data_inicio = db.Column(db.DateTime)
+    data_termino = db.Column(db.DateTime)
+    horario_inicio = db.Column(db.Time)
+    horario_termino = db.Column(db.Time)
+    dias_semana = db.Column(db.String(7))
+    horario_disciplina = db.Column(db.String(255))
+    # Dias da disciplina já ordenados ("SEG,QUA,SEX"); NULL se o evento não for Disciplina
+    dias = db.Column(db.String(100))
+    # Período coberto pelas ocorrências (inclui exceções movidas para fora de data_inicio/data_termino)
+    primeira_data = db.Column(db.DateTime)
+    ultima_data = db.Column(db.DateTime)
+
+
 class Presenca(Base):
     __tablename__ = "presenca" # Presença -> presenca
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    id_ocorrencia_evento = db.Column(db.Integer, ForeignKey("ocorrencia_evento.id"))
+    id_ocorrencia_evento = db.Column(db.Integer, ForeignKey("ocorrencia_evento.id", ondelete="CASCADE"))
     id_aluno = db.Column(db.Integer, ForeignKey("aluno.id_usuario"))
     presente = db.Column(db.Boolean)
 
     # Relationships
     ocorrencia_evento = relationship("OcorrenciaEvento", back_populates="presenca")
     aluno = relationship("Aluno", back_populates="presencas")
+
+
+class ArmazenamentoTTL(Base):
+    __tablename__ = "armazenamento_ttl"
+    # Backend compartilhado de core/ttl_store.py (códigos de recuperação de senha, tokens de
+    # recuperação, progresso de importações...): visível a todos os workers, com expiração por `expira_em`.
+
+    chave = db.Column(db.String(255), primary_key=True)
+    # JSON; TEXT(16777215) vira MEDIUMTEXT no MySQL (o progresso de importações com muitos
+    # erros por linha passa dos 64 KB do TEXT)
+    valor = db.Column(db.Text(length=16_777_215), nullable=False)
+    expira_em = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class EmailPendente(Base):
+    __tablename__ = "email_pendente"
+    # Outbox de emails (services/service_email.py): gravado na transação de quem envia e
+    # entregue em segundo plano, com novas tentativas até EMAIL_MAX_TENTATIVAS.
+    __table_args__ = (
+        # status IN ('pendente', 'enviando') AND proxima_tentativa <= agora
+        db.Index("ix_email_pendente_status_proxima", "status", "proxima_tentativa"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    destinatario = db.Column(db.String(255), nullable=False)
+    assunto = db.Column(db.String(255), nullable=False)
+    corpo = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="pendente", server_default="pendente") # pendente | enviando | enviado | falhou
+    tentativas = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    proxima_tentativa = db.Column(db.DateTime, nullable=False)
+    ultimo_erro = db.Column(db.String(500))
+    criado_em = db.Column(db.DateTime, nullable=False)
+    enviado_em = db.Column(db.DateTime)
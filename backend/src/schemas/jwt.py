@@ -11,6 +11,8 @@ class TokenPayload(BaseModel):
     exp: Optional[int] = None
     type: Optional[str] = None
     tag: Optional[str] = None
+    uid: Optional[int] = None # id da Universidade ou do Usuario (conforme `role`)
+    role: Optional[str] = None # "universidade" ou "usuario"; tokens antigos não têm uid/role
     
 class TokenData(BaseModel):
     email: str | None = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Literal
 from datetime import date, datetime, time
 
 # ==========================================
@@ -152,6 +152,59 @@ class EventoComplexoCreate(BaseModel):
     evento: EventoCreate
     disciplina: Optional[DisciplinaCreate] = None
 
+class EventosDeleteLote(BaseModel):
+    """Ids dos eventos a remover de uma vez (ex: limpeza de fim de semestre)."""
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class EventosDeleteLoteResponse(BaseModel):
+    mensagem: str
+    total_removidos: int
+    removidos: List[int]
+    nao_removidos: List[int]
+
+class ExclusaoEventoResponse(BaseModel):
+    """Progresso da exclusão de um evento em segundo plano (linhas removidas por tabela)."""
+    id_evento: int
+    status: str
+    removidos: Dict[str, int] = {}
+    erro: Optional[str] = None
+
+
+# ==========================================
+# IMPORTAÇÃO EM LOTE DE DISCIPLINAS
+# ==========================================
+class DisciplinaImportItem(BaseModel):
+    """Uma linha da importação em lote (JSON ou CSV com as mesmas colunas).
+
+    - `horario` segue o formato "<dias>-<blocos>-<turno>", ex: "24-AB-manha".
+    - `id_universidade` é opcional quando quem importa é a própria universidade.
+    - `id_curso`/`creditos` criam o vínculo em curso_disciplina quando informados.
+    """
+    nome: str = Field(..., min_length=1, max_length=255)
+    horario: str = Field(..., max_length=255)
+    data_inicio: datetime
+    data_termino: datetime
+    descricao: Optional[str] = Field(None, max_length=500)
+    local_padrao: Optional[str] = Field(None, max_length=255)
+    id_universidade: Optional[int] = None
+    email_professor: Optional[EmailStr] = None
+    id_curso: Optional[int] = None
+    creditos: Optional[int] = None
+
+class ErroImportacao(BaseModel):
+    linha: int
+    erro: str
+
+class ImportacaoResponse(BaseModel):
+    """Estado de uma importação em lote (retornado na criação e na consulta de progresso)."""
+    id_importacao: str
+    status: str
+    total: int
+    validas: int
+    processadas: int = 0
+    importadas: int = 0
+    erros: List[ErroImportacao] = []
+
 
 # ==========================================
 # CURSO DISCIPLINA (Associação)
@@ -242,6 +295,34 @@ class NotificacaoCreate(NotificacaoBase):
 
 class NotificacaoResponse(NotificacaoBase):
     id: int
+    evento: Optional[str] = None
+    # Broadcasts (notificacao_broadcast) vêm misturados às notificações pessoais; `id` é o do broadcast
+    broadcast: bool = False
+    lida: bool = False
+    model_config = ConfigDict(from_attributes=True)
+
+class NotificacoesNaoLidasResponse(BaseModel):
+    id_usuario: int
+    nao_lidas: int
+
+class NotificacaoBroadcastCreate(BaseModel):
+    """Aviso gravado uma vez para um público: convidados de um evento (alvo_id = id_evento),
+    alunos de um curso (alvo_id = id_curso) ou usuários de um domínio (dominio, ex: "uece.br",
+    inclui subdomínios como "aluno.uece.br")."""
+    mensagem: str = Field(..., max_length=255)
+    alvo_tipo: Literal["evento", "curso", "dominio"]
+    alvo_id: Optional[int] = None
+    dominio: Optional[str] = None
+    evento: Optional[str] = None
+
+class NotificacaoBroadcastResponse(BaseModel):
+    id: int
+    data: datetime
+    mensagem: str
+    evento: Optional[str] = None
+    alvo_tipo: str
+    alvo_id: Optional[int] = None
+    alvo_dominio: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -0,0 +1,188 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, exists, literal, func, or_
+from types import SimpleNamespace
+from datetime import datetime, date, time, timedelta
+from ..models import models
+from ..core.constants import ORDEM_DIAS
+from ..database.bulk import inserir_em_lotes
+
+# Read model da agenda (tabela agenda_usuario): uma linha por (usuário, evento).
+# Usuários veem os eventos em que são convidados e universidades os eventos que criaram.
+# As funções de manutenção não fazem commit: rodam na transação da operação que as chama.
+
+
+def ordenar_dias(dias) -> list[str]:
+    """Dias da semana ordenados por ORDEM_DIAS; dias desconhecidos ficam no início."""
+    return sorted(dias, key=lambda dia: ORDEM_DIAS.get(dia, -1))
+
+
+def linha_agenda(evento: models.Evento, email_usuario: str, horario_disciplina: str | None = None,
+                 dias: list[str] | None = None, periodo: tuple | None = None) -> dict:
+    """Valores da linha de agenda_usuario do evento para um usuário (formato de `inserir_em_lotes`).
+    `periodo` = (primeira_data, ultima_data); sem ele, o período do próprio evento."""
+    primeira_data, ultima_data = periodo if periodo is not None else (evento.data_inicio, evento.data_termino)
+    return {
+        "email_usuario": email_usuario,
+        "id_evento": evento.id,
+        "is_proprietario": evento.email_proprietario == email_usuario,
+        "nome": evento.nome,
+        "descricao": evento.descricao,
+        "categoria": evento.categoria,
+        "recorrencia": evento.recorrencia,
+        "local_padrao": evento.local_padrao,
+        "data_inicio": evento.data_inicio,
+        "data_termino": evento.data_termino,
+        "horario_inicio": evento.horario_inicio,
+        "horario_termino": evento.horario_termino,
+        "dias_semana": evento.dias_semana,
+        "horario_disciplina": horario_disciplina,
+        "dias": ",".join(ordenar_dias(dias)) if dias is not None else None,
+        "primeira_data": primeira_data,
+        "ultima_data": ultima_data,
+    }
+
+
+def periodo_evento(db: Session, evento: models.Evento) -> tuple:
+    """
+    (primeira_data, ultima_data) das linhas de agenda do evento: o período do evento ampliado
+    pelas ocorrências gravadas fora dele (exceções movidas de dia), como no backfill da migração
+    c5a9d2f7e813. Uma consulta pelo índice (id_evento, data).
+    """
+    minima, maxima = db.execute(
+        select(func.min(models.OcorrenciaEvento.data), func.max(models.OcorrenciaEvento.data))
+        .where(models.OcorrenciaEvento.id_evento == evento.id)
+    ).one()
+    primeira_data, ultima_data = evento.data_inicio, evento.data_termino
+    if minima is not None and (primeira_data is None or minima < primeira_data):
+        primeira_data = minima
+    if maxima is not None and (ultima_data is None or maxima > ultima_data):
+        ultima_data = maxima
+    return primeira_data, ultima_data
+
+
+def _dados_disciplina(evento: models.Evento) -> tuple[str | None, list[str] | None]:
+    if evento.categoria and evento.categoria.lower() == "disciplina" and evento.disciplina:
+        return evento.disciplina.horario, [d.dia for d in (evento.disciplina.disciplina_dias or [])]
+    return None, None
+
+
+def adicionar_evento_agenda(db: Session, evento: models.Evento, emails) -> int:
+    """Inclui o evento na agenda de cada email (convidados ou universidade proprietária)."""
+    horario_disciplina, dias = _dados_disciplina(evento)
+    periodo = periodo_evento(db, evento)
+    return inserir_em_lotes(db, models.AgendaUsuario, (
+        linha_agenda(evento, email, horario_disciplina, dias, periodo) for email in emails
+    ))
+
+
+def adicionar_evento_agenda_por_consulta(db: Session, evento: models.Evento, emails) -> int:
+    """
+    Inclui o evento na agenda dos emails retornados pela consulta `emails` (select de uma
+    coluna) com um único INSERT ... SELECT, ignorando quem já tem o evento na agenda.
+    """
+    tabela = models.AgendaUsuario.__table__
+    origem = emails.subquery()
+    email = list(origem.c)[0]
+
+    valores = linha_agenda(evento, None, *_dados_disciplina(evento), periodo_evento(db, evento))
+    colunas = [coluna for coluna in valores if coluna not in ("email_usuario", "is_proprietario")]
+    consulta = select(
+        email,
+        email == evento.email_proprietario,
+        *(literal(valores[coluna], type_=tabela.c[coluna].type) for coluna in colunas)
+    ).where(~exists().where(
+        tabela.c.id_evento == evento.id,
+        tabela.c.email_usuario == email
+    ))
+    resultado = db.execute(
+        insert(tabela).from_select(["email_usuario", "is_proprietario", *colunas], consulta)
+    )
+    return resultado.rowcount
+
+
+def remover_evento_agenda(db: Session, id_evento: int, emails=None) -> int:
+    """Remove o evento da agenda dos emails informados (None = de todas as agendas)."""
+    consulta = db.query(models.AgendaUsuario).filter(models.AgendaUsuario.id_evento == id_evento)
+    if emails is not None:
+        consulta = consulta.filter(models.AgendaUsuario.email_usuario.in_(emails))
+    return consulta.delete(synchronize_session=False)
+
+
+def estender_periodo_agenda(db: Session, id_evento: int, data: datetime):
+    """Amplia o período das linhas do evento para incluir `data` (ocorrência movida de dia)."""
+    db.query(models.AgendaUsuario).filter(
+        models.AgendaUsuario.id_evento == id_evento,
+        models.AgendaUsuario.primeira_data > data
+    ).update({models.AgendaUsuario.primeira_data: data}, synchronize_session=False)
+    db.query(models.AgendaUsuario).filter(
+        models.AgendaUsuario.id_evento == id_evento,
+        models.AgendaUsuario.ultima_data < data
+    ).update({models.AgendaUsuario.ultima_data: data}, synchronize_session=False)
+
+
+def _evento_da_agenda(linha: models.AgendaUsuario) -> SimpleNamespace:
+    # Mesmos atributos de Evento usados por gerar_ocorrencias_evento e montar_informacoes_ocorrencia
+    disciplina = SimpleNamespace(horario=linha.horario_disciplina) if linha.horario_disciplina is not None else None
+    return SimpleNamespace(
+        id=linha.id_evento,
+        nome=linha.nome,
+        descricao=linha.descricao,
+        categoria=linha.categoria,
+        recorrencia=linha.recorrencia,
+        local_padrao=linha.local_padrao,
+        data_inicio=linha.data_inicio,
+        data_termino=linha.data_termino,
+        horario_inicio=linha.horario_inicio,
+        horario_termino=linha.horario_termino,
+        dias_semana=linha.dias_semana,
+        disciplina=disciplina,
+        is_proprietario=linha.is_proprietario,
+        dias=[dia for dia in linha.dias.split(",") if dia] if linha.dias is not None else None,
+    )
+
+
+def consulta_principal_existe(email: str):
+    """Select (booleano) que indica se o email é de um usuário ou de uma universidade."""
+    return select(or_(
+        exists().where(models.Usuario.email == email),
+        exists().where(models.Universidade.email == email)
+    ))
+
+
+def _consulta_agenda(email_usuario: str, categoria: str | None, inicio: date | None, fim: date | None):
+    filtros = [
+        models.AgendaUsuario.email_usuario == email_usuario,
+        # Eventos em exclusão (tombstone) já não aparecem, mesmo antes de as linhas serem removidas
+        models.Evento.excluido_em.is_(None)
+    ]
+    if categoria is not None:
+        filtros.append(models.AgendaUsuario.categoria == categoria)
+    if inicio is not None:
+        filtros.append(models.AgendaUsuario.ultima_data >= datetime.combine(inicio, time()))
+    if fim is not None:
+        filtros.append(models.AgendaUsuario.primeira_data < datetime.combine(fim + timedelta(days=1), time()))
+
+    return select(models.AgendaUsuario).join(
+        models.Evento, models.Evento.id == models.AgendaUsuario.id_evento
+    ).where(*filtros).order_by(models.AgendaUsuario.id_evento)
+
+
+def buscar_agenda(db: Session, email_usuario: str, categoria: str | None = None,
+                  inicio: date | None = None, fim: date | None = None) -> list[SimpleNamespace]:
+    """
+    Eventos da agenda do usuário com ocorrências na janela [inicio, fim] (datas inclusivas),
+    em uma única consulta pelo índice (email_usuario, ultima_data, primeira_data).
+
+    Retorna objetos com os atributos de Evento usados na expansão das ocorrências, mais
+    `is_proprietario` e `dias` (dias da disciplina já ordenados ou None).
+    """
+    linhas = db.scalars(_consulta_agenda(email_usuario, categoria, inicio, fim))
+    return [_evento_da_agenda(linha) for linha in linhas]
+
+
+async def buscar_agenda_async(db: AsyncSession, email_usuario: str, categoria: str | None = None,
+                              inicio: date | None = None, fim: date | None = None) -> list[SimpleNamespace]:
+    """Versão async (AsyncSession) de `buscar_agenda`."""
+    linhas = await db.scalars(_consulta_agenda(email_usuario, categoria, inicio, fim))
+    return [_evento_da_agenda(linha) for linha in linhas]
@@ -1,15 +1,16 @@
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status, Depends
+from sqlalchemy import select, literal, union_all
+from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 from ..core.config import settings
+from ..database.connection import get_db
 # Ajuste os imports abaixo conforme a estrutura das suas pastas
 from ..schemas import schema
 from ..models import models
 from ..core import security # Importa seu arquivo com passlib
+from ..core.ttl_store import criar_armazenamento
+from . import service_email
 from ..schemas.jwt import Token, TokenPayload
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import random
 import string
 from datetime import datetime, timedelta
@@ -18,25 +19,20 @@ import uuid
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-# Store reset codes by code -> { email, expires_at, attempts }
-reset_codes = {}
-# Temporary recovery tokens by token -> { email, expires_at }
-recovery_tokens = {}
+# Reset codes by code -> { email, attempts } and temporary recovery tokens by token -> { email },
+# both expiring after 15 minutes (backend in TTL_STORE_BACKEND; "sql" is shared by all workers)
+RESET_TTL_SEGUNDOS = 15 * 60
+reset_codes = criar_armazenamento("reset_code")
+recovery_tokens = criar_armazenamento("recovery_token")
 
 # ----------------------------------------------------------------------
 # ENVIAR EMAIL DE BOAS-VINDAS (PORTUGUÊS)
 # ----------------------------------------------------------------------
-def send_welcome_email(email: str, name: str, role: str):
-    """Envia um email de boas-vindas simples."""
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = settings.SMTP_USER
-        msg['To'] = email
-        msg['Subject'] = "Bem-vindo ao Agendai "
+def send_welcome_email(db: Session, email: str, name: str, role: str):
+    """Coloca um email de boas-vindas simples na outbox (enviado em segundo plano após o commit)."""
+    role_pt = "professor" if role == "professor" else "aluno"
 
-        role_pt = "professor" if role == "professor" else "aluno"
-        
-        body = f"""Olá {name},
+    body = f"""Olá {name},
 
 Bem-vindo ao Agendai APS! Sua conta de {role_pt} foi criada com sucesso.
 
@@ -44,17 +40,8 @@ Você já pode fazer login no sistema.
 
 Atenciosamente,
 Equipe Agendai """
-        
-        msg.attach(MIMEText(body, 'plain'))
 
-        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
-        server.starttls()
-        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-    except Exception as e:
-        # Log e continua; não interrompe a criação do usuário
-        print(f"Erro ao enviar email de boas-vindas: {e}")
+    service_email.enfileirar_email(db, email, "Bem-vindo ao Agendai ", body)
 
 # ----------------------------------------------------------------------
 # RECUPERAÇÃO DE SENHA (PORTUGUÊS)
@@ -66,18 +53,11 @@ def request_password_reset(db: Session, email: str):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Email não cadastrado.")
 
     code = ''.join(random.choices(string.digits, k=6))
-    expires = datetime.utcnow() + timedelta(minutes=15)
 
     # Salva pelo código para que o cliente envie apenas o código no passo 2
-    reset_codes[code] = {"email": email, "expires_at": expires, "attempts": 0}
+    reset_codes.definir(code, {"email": email, "attempts": 0}, RESET_TTL_SEGUNDOS)
 
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = settings.SMTP_USER
-        msg['To'] = email
-        msg['Subject'] = "Código de Recuperação de Senha - Agendai "
-
-        body = f"""Olá {user.nome},
+    body = f"""Olá {user.nome},
 
 Você solicitou a recuperação de senha para o Agendai APS.
 
@@ -89,19 +69,18 @@ Se você não solicitou esta recuperação, por favor ignore este email.
 
 Atenciosamente,
 Equipe Agendai """
-        
-        msg.attach(MIMEText(body, 'plain'))
 
-        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
-        server.starttls()
-        server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-
-        return {"message": "Código de recuperação enviado para seu email."}
+    # O envio acontece em segundo plano (outbox), sem esperar o SMTP
+    try:
+        service_email.enfileirar_email(db, email, "Código de Recuperação de Senha - Agendai ", body)
+        db.commit()
     except Exception as e:
-        print(f"Erro ao enviar email de recuperação: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falha ao enviar email.")
+        db.rollback()
+        reset_codes.remover(code)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Falha ao registrar email de recuperação: {str(e)}")
+    service_email.acordar_remetente()
+
+    return {"message": "Código de recuperação enviado para seu email."}
 
 def validate_reset_code(code: str):
     """
@@ -109,25 +88,17 @@ def validate_reset_code(code: str):
     Entrada: apenas `code` (sem email).
     Em caso de sucesso retorna um token de recuperação temporário (use-o para definir a nova senha).
     """
-    if code not in reset_codes:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Não há solicitação de recuperação ativa para este código.")
-
-    record = reset_codes[code]
-
-    if datetime.utcnow() > record["expires_at"]:
-        del reset_codes[code]
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Código expirado.")
+    # Lê e remove o código (uso único, mesmo com vários workers)
+    record = reset_codes.consumir(code)
+    if record is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Não há solicitação de recuperação ativa para este código (ou ele expirou).")
 
     if record["attempts"] >= 3:
-        del reset_codes[code]
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Muitas tentativas. Solicite um novo código.")
 
-    # Código válido: emite um token de recuperação único e remove/reseta o código
+    # Código válido: emite um token de recuperação único
     token = str(uuid.uuid4())
-    recovery_tokens[token] = {"email": record["email"], "expires_at": datetime.utcnow() + timedelta(minutes=15)}
-
-    # Remove o código usado para evitar reutilização
-    del reset_codes[code]
+    recovery_tokens.definir(token, {"email": record["email"]}, RESET_TTL_SEGUNDOS)
 
     return {"recovery_token": token, "message": "Código validado. Use o token de recuperação para redefinir sua senha."}
 
@@ -144,26 +115,26 @@ def reset_password_with_token(db: Session, recovery_token: str, new_password: st
     if len(new_password) < 6:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A senha deve ter no mínimo 6 caracteres.")
     
-    if recovery_token not in recovery_tokens:
+    rec = recovery_tokens.pegar(recovery_token)
+    if rec is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token de recuperação inválido ou expirado.")
 
-    rec = recovery_tokens[recovery_token]
-    if datetime.utcnow() > rec["expires_at"]:
-        del recovery_tokens[recovery_token]
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token de recuperação expirado.")
-
     email = rec["email"]
     user = db.query(models.Usuario).filter(models.Usuario.email == email).first()
     if not user:
-        del recovery_tokens[recovery_token]
+        recovery_tokens.remover(recovery_token)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado.")
 
+    hashed = security.pegar_senha_hash(new_password)
     try:
-        hashed = security.pegar_senha_hash(new_password)
+        # Uso único: se outro worker já consumiu o token, não altera a senha
+        if recovery_tokens.consumir(recovery_token) is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Token de recuperação inválido ou expirado.")
         user.senha = hashed
         db.commit()
-        del recovery_tokens[recovery_token]
         return {"message": "Senha atualizada com sucesso."}
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Falha ao redefinir senha: {str(e)}")
@@ -171,6 +142,48 @@ def reset_password_with_token(db: Session, recovery_token: str, new_password: st
 # ----------------------------------------------------------------------
 # FUNÇÕES AUXILIARES DE BUSCA
 # ----------------------------------------------------------------------
+class Identidade:
+    """Quem é o dono de um email: uma Universidade ou um Usuario (com o id e o hash da senha)."""
+
+    __slots__ = ("tipo", "id", "email", "senha")
+
+    def __init__(self, tipo: str, id: int, email: str, senha: str | None):
+        self.tipo = tipo  # "universidade" ou "usuario"
+        self.id = id
+        self.email = email
+        self.senha = senha
+
+    @property
+    def is_universidade(self) -> bool:
+        return self.tipo == "universidade"
+
+    @property
+    def tag(self) -> str:
+        # Tag do token para o frontend: universidade, ou aluno/professor pelo email
+        if self.is_universidade:
+            return "universidade"
+        return "aluno" if "@aluno." in self.email else "professor"
+
+
+def resolver_identidade(db: Session, email: str) -> Identidade | None:
+    """
+    Resolve o email para Universidade ou Usuario em uma única consulta (UNION ALL sobre os
+    índices únicos de email das duas tabelas). Se o email existir nas duas, vale a universidade,
+    como no login.
+    """
+    consulta = union_all(
+        select(literal("universidade").label("tipo"), models.Universidade.id, models.Universidade.senha)
+        .where(models.Universidade.email == email),
+        select(literal("usuario").label("tipo"), models.Usuario.id, models.Usuario.senha)
+        .where(models.Usuario.email == email),
+    )
+    linhas = db.execute(consulta).all()
+    if not linhas:
+        return None
+    tipo, id_principal, senha = min(linhas, key=lambda linha: linha.tipo != "universidade")
+    return Identidade(tipo, id_principal, email, senha)
+
+
 def buscar_usuario_por_email_ou_cpf(db: Session, email: str, cpf: str):
     return db.query(models.Usuario).filter(
         (models.Usuario.email == email) | (models.Usuario.cpf == cpf)
@@ -184,55 +197,61 @@ def autenticar_usuario(db: Session, email: str, senha: str):
     user = db.query(models.Usuario).filter(models.Usuario.email == email).first()
     if not user:
         return None
-    if not security.verificar_senha(senha, user.senha):
+    valida, novo_hash = security.verificar_e_atualizar_senha(senha, user.senha)
+    if not valida:
         return None
+    if novo_hash:
+        # Hash com custo antigo (BCRYPT_ROUNDS mudou): regrava com o custo atual
+        user.senha = novo_hash
+        db.commit()
     return user 
 
 
-def login_user(db: Session, email: str, password: str) -> Token:
-    """Autentica um usuário e retorna um Token Pydantic (access + refresh).
+def login_identidade(db: Session | None, identidade: Identidade, password: str) -> Token:
+    """Verifica a senha da identidade já resolvida e emite access + refresh tokens (`sub` = email).
 
-    Usa `autenticar_usuario` para validar credenciais e, em caso de sucesso,
-    gera tokens onde `sub` é o email do usuário (por decisão do time).
+    Com `db`, hashes desatualizados (custo/esquema) são regravados com as configurações atuais.
+    Retorna None se a senha não confere.
     """
-    user = autenticar_usuario(db=db, email=email, senha=password)
-    if not user:
+    valida, novo_hash = security.verificar_e_atualizar_senha(password, identidade.senha)
+    if not valida:
         return None
+    if novo_hash and db is not None:
+        modelo = models.Universidade if identidade.is_universidade else models.Usuario
+        db.query(modelo).filter(modelo.id == identidade.id).update({modelo.senha: novo_hash}, synchronize_session=False)
+        db.commit()
 
-    # Determina a tag para o frontend com base no e-mail:
-    # - se o email contiver a substring "@aluno." => tag 'aluno'
-    # - caso contrário => tag 'professor'
-    # (pedido: não usar relações do ORM aqui, usar apenas o email)
-    if "@aluno." in user.email:
-        tag = 'aluno'
-    else:
-        tag = 'professor'
-
-    access_token = security.create_access_token(subject=str(user.email), tag=tag)
-    refresh_token = security.create_refresh_token(subject=str(user.email), tag=tag)
+    claims = {"tag": identidade.tag, "uid": identidade.id, "role": identidade.tipo}
+    access_token = security.create_access_token(subject=str(identidade.email), **claims)
+    refresh_token = security.create_refresh_token(subject=str(identidade.email), **claims)
     return Token(access_token=access_token, refresh_token=refresh_token)
 
 
-def login_university(university: models.Universidade, password: str | None = None) -> Token:
+def login_user(db: Session, email: str, password: str) -> Token:
+    """Autentica um usuário e retorna um Token Pydantic (access + refresh).
+
+    A tag do token vem do email (ver `Identidade.tag`):
+    - se o email contiver a substring "@aluno." => tag 'aluno'
+    - caso contrário => tag 'professor'
+    """
+    identidade = resolver_identidade(db, email)
+    if not identidade or identidade.is_universidade:
+        return None
+    return login_identidade(db, identidade, password)
+
+
+def login_university(university: models.Universidade, password: str | None = None, db: Session | None = None) -> Token:
     """Autentica (ou emite token) para uma Universidade.
 
     O model `Universidade` possui campo `senha` armazenado como hash; por isso
-    esta função requer a senha em texto plano para verificação via
-    `security.verificar_senha` e, em caso de sucesso, emite tokens com
-    `sub` = university.email.
+    esta função requer a senha em texto plano para verificação e, em caso de
+    sucesso, emite tokens com `sub` = university.email e tag 'universidade'.
     """
     # Requeremos password em texto plano para verificação.
     if password is None:
         return None
-
-    # Verifica a senha (sempre como hash armazenado no banco).
-    if not security.verificar_senha(password, university.senha):
-        return None
-
-    # Marca token com tag 'universidade' para o frontend
-    access_token = security.create_access_token(subject=str(university.email), tag='universidade')
-    refresh_token = security.create_refresh_token(subject=str(university.email), tag='universidade')
-    return Token(access_token=access_token, refresh_token=refresh_token)
+    identidade = Identidade("universidade", university.id, university.email, university.senha)
+    return login_identidade(db, identidade, password)
 
 def criar_usuario_base(db: Session, dados):
     """
@@ -277,9 +296,11 @@ def registrar_professor(db: Session, dados: schema.RegistroProfessor):
             id_universidade=dados.id_universidade,
         )
         db.add(novo_professor)
+        send_welcome_email(db, novo_usuario.email, novo_usuario.nome, "professor")
         
-        # 3. Efetiva a transação
+        # 3. Efetiva a transação (o email de boas-vindas sai junto, pela outbox)
         db.commit()
+        service_email.acordar_remetente()
         db.refresh(novo_usuario)
         return novo_usuario
         
@@ -312,9 +333,11 @@ def registrar_aluno(db: Session, dados: schema.RegistroAluno):
             matricula=dados.matricula
         )
         db.add(novo_aluno)
+        send_welcome_email(db, novo_usuario.email, novo_usuario.nome, "aluno")
 
-        # 4. Efetiva a transação
+        # 4. Efetiva a transação (o email de boas-vindas sai junto, pela outbox)
         db.commit()
+        service_email.acordar_remetente()
         db.refresh(novo_usuario)
         return novo_usuario
         
@@ -406,8 +429,9 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenPayload:
     """Valida o token de acesso e retorna o TokenPayload completo.
 
     Para endpoints que só precisam do email, use o wrapper `get_current_user_email`.
+    Tokens já validados vêm do cache (`security.decode_token_cache`).
     """
-    payload = security.decode_token(token)
+    payload = security.decode_token_cache(token)
 
     if not payload or not payload.sub:
         raise HTTPException(
@@ -429,3 +453,30 @@ def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenPayload:
 # Compatibilidade: wrapper que retorna apenas o email (sub) para callers antigos.
 def get_current_user_email(payload: TokenPayload = Depends(get_current_user)) -> str:
     return payload.sub
+
+
+def identidade_do_token(payload: TokenPayload) -> Identidade | None:
+    """Identidade a partir das claims `uid`/`role` do token (None para tokens antigos, sem elas)."""
+    if payload.uid is None or payload.role not in ("universidade", "usuario"):
+        return None
+    return Identidade(payload.role, payload.uid, payload.sub, None)
+
+
+def get_identidade_atual(
+    request: Request,
+    db: Session = Depends(get_db),
+    payload: TokenPayload = Depends(get_current_user)
+) -> Identidade:
+    """Principal (Universidade ou Usuario) do usuário autenticado, resolvido uma vez por requisição.
+
+    Vem direto das claims `uid`/`role` do token, sem consulta; apenas tokens emitidos antes
+    dessas claims são resolvidos pelo email (`resolver_identidade`). O resultado fica em
+    `request.state.identidade` para ser reaproveitado por outras dependências/rotas.
+    """
+    identidade = getattr(request.state, "identidade", None)
+    if identidade is None:
+        identidade = identidade_do_token(payload) or resolver_identidade(db, payload.sub)
+        if identidade is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Proprietário não encontrado.")
+        request.state.identidade = identidade
+    return identidade
@@ -0,0 +1,188 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, or_
+from fastapi import HTTPException, status
+from datetime import datetime, timedelta
+from ..models import models
+from ..core.config import settings
+from ..core.ttl_store import ArmazenamentoMemoria
+from ..database.connection import SessionLocal
+import threading
+
+# Exclusões em andamento neste worker por id_evento -> estado (campos de
+# schema.ExclusaoEventoResponse e o email do proprietário). Ao terminar, o estado passa para `exclusoes_concluidas`
+# e expira após PROGRESSO_RETENCAO_SEGUNDOS.
+exclusoes = {}
+_exclusoes_lock = threading.Lock()
+exclusoes_concluidas = ArmazenamentoMemoria("exclusao", settings.TTL_STORE_MAX_ITENS)
+
+
+def _dependentes(id_evento: int) -> list[tuple]:
+    """Tabelas volumosas removidas em lotes, dos filhos para os pais: (nome, modelo, condição).
+    O restante (disciplina, disciplina_dias, curso_disciplina) sai com o evento por ON DELETE CASCADE."""
+    ocorrencias = select(models.OcorrenciaEvento.id).where(models.OcorrenciaEvento.id_evento == id_evento)
+    return [
+        ("presenca", models.Presenca, models.Presenca.id_ocorrencia_evento.in_(ocorrencias)),
+        ("ocorrencia_evento", models.OcorrenciaEvento, models.OcorrenciaEvento.id_evento == id_evento),
+        ("convidado", models.Convidado, models.Convidado.id_evento == id_evento),
+        ("agenda_usuario", models.AgendaUsuario, models.AgendaUsuario.id_evento == id_evento),
+    ]
+
+
+def _registrar_exclusao(id_evento: int, email_proprietario: str) -> tuple[dict, bool]:
+    """Registra o estado da exclusão. Retorna (estado, True se um novo processamento deve começar).
+    O proprietário fica no estado para a consulta de progresso depois que o evento some do banco."""
+    with _exclusoes_lock:
+        estado = exclusoes.get(id_evento)
+        if estado is not None:
+            return estado, False
+        estado = {
+            "id_evento": id_evento,
+            "status": "processando",
+            "removidos": {nome: 0 for nome, _, _ in _dependentes(id_evento)},
+            "erro": None,
+            "email_proprietario": email_proprietario,
+        }
+        exclusoes[id_evento] = estado
+        return estado, True
+
+
+def _encerrar_exclusao(estado: dict):
+    # Primeiro no armazenamento com TTL, depois fora do dict: a consulta sempre encontra o estado
+    if estado["status"] != "pendente":
+        exclusoes_concluidas.definir(str(estado["id_evento"]), estado, settings.PROGRESSO_RETENCAO_SEGUNDOS)
+    with _exclusoes_lock:
+        exclusoes.pop(estado["id_evento"], None)
+
+
+def _reservar_exclusao(db: Session, id_evento: int) -> bool:
+    """
+    Reserva (ou renova) no banco o processamento da exclusão para este worker. Só um worker
+    consegue a reserva: os demais veem `exclusao_reservada_em` recente e desistem.
+    """
+    agora = datetime.now()
+    vencida = agora - timedelta(seconds=settings.EXCLUSAO_RESERVA)
+    reservadas = db.query(models.Evento).filter(
+        models.Evento.id == id_evento,
+        models.Evento.excluido_em.isnot(None),
+        or_(models.Evento.exclusao_reservada_em.is_(None), models.Evento.exclusao_reservada_em < vencida)
+    ).update({models.Evento.exclusao_reservada_em: agora}, synchronize_session=False)
+    db.commit()
+    return reservadas == 1
+
+
+def marcar_exclusao_evento(db: Session, id_evento: int, current_email: str) -> tuple[dict, bool]:
+    """
+    Marca o evento como excluído (tombstone em `excluido_em`), o que o retira imediatamente
+    da agenda e das consultas de eventos, e registra a exclusão para `executar_exclusao_evento`.
+    Apenas o proprietário do evento pode excluí-lo.
+
+    Returns:
+        (estado da exclusão, True se o processamento em segundo plano deve ser iniciado)
+    """
+    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
+    if not evento:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento não encontrado.")
+    if evento.email_proprietario != current_email:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas o proprietário do evento pode excluí-lo."
+        )
+
+    if evento.excluido_em is None:
+        evento.excluido_em = datetime.now()
+        db.commit()
+    return _registrar_exclusao(id_evento, evento.email_proprietario)
+
+
+def executar_exclusao_evento(id_evento: int):
+    """
+    Remove os dependentes do evento em lotes de BULK_DELETE_CHUNK_SIZE linhas, cada lote em
+    sua própria transação (sem uma transação gigante segurando locks e undo log), e por fim
+    o evento. Executado em segundo plano, com sessão própria.
+
+    A exclusão é reservada no banco antes de começar e a reserva é renovada a cada lote; se
+    outro worker já a está processando, este desiste (a consulta mostra "pendente").
+    """
+    estado = exclusoes[id_evento]
+    tamanho_lote = settings.BULK_DELETE_CHUNK_SIZE
+    db = SessionLocal()
+    try:
+        if not _reservar_exclusao(db, id_evento):
+            estado["status"] = "pendente"
+            return
+
+        for nome, modelo, condicao in _dependentes(id_evento):
+            while True:
+                ids = [id_linha for (id_linha,) in db.query(modelo.id).filter(condicao).limit(tamanho_lote)]
+                if not ids:
+                    break
+                db.query(modelo).filter(modelo.id.in_(ids)).delete(synchronize_session=False)
+                db.query(models.Evento).filter(models.Evento.id == id_evento).update(
+                    {models.Evento.exclusao_reservada_em: datetime.now()}, synchronize_session=False
+                )
+                db.commit()
+                estado["removidos"][nome] += len(ids)
+
+        db.query(models.Evento).filter(models.Evento.id == id_evento).delete(synchronize_session=False)
+        db.commit()
+        estado["status"] = "concluida"
+    except Exception as e:
+        db.rollback()
+        estado["status"] = "falhou"
+        estado["erro"] = f"Falha na exclusão: {str(e)}"
+        # Libera a reserva para que uma nova tentativa possa começar logo
+        try:
+            db.query(models.Evento).filter(models.Evento.id == id_evento).update(
+                {models.Evento.exclusao_reservada_em: None}, synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+    finally:
+        db.close()
+        _encerrar_exclusao(estado)
+
+
+def _verificar_proprietario(email_proprietario: str, current_email: str):
+    if email_proprietario != current_email:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas o proprietário do evento pode consultar a exclusão."
+        )
+
+
+def pegar_exclusao(db: Session, id_evento: int, current_email: str) -> dict:
+    """Progresso da exclusão do evento; apenas o proprietário do evento pode consultá-lo."""
+    estado = exclusoes.get(id_evento) or exclusoes_concluidas.pegar(str(id_evento))
+    if estado:
+        _verificar_proprietario(estado["email_proprietario"], current_email)
+        return estado
+
+    # Sem estado neste worker (ex: processada por outro worker ou servidor reiniciado):
+    # o tombstone indica exclusão pendente
+    evento = db.query(models.Evento.excluido_em, models.Evento.email_proprietario).filter(
+        models.Evento.id == id_evento
+    ).first()
+    if not evento or evento.excluido_em is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exclusão não encontrada.")
+    _verificar_proprietario(evento.email_proprietario, current_email)
+    return {"id_evento": id_evento, "status": "pendente", "removidos": {}, "erro": None}
+
+
+def retomar_exclusoes_pendentes():
+    """Retoma as exclusões interrompidas (eventos com tombstone que ainda existem). Cada
+    uma é reservada no banco, então só um worker processa cada exclusão."""
+    db = SessionLocal()
+    try:
+        vencida = datetime.now() - timedelta(seconds=settings.EXCLUSAO_RESERVA)
+        eventos = db.query(models.Evento.id, models.Evento.email_proprietario).filter(
+            models.Evento.excluido_em.isnot(None),
+            or_(models.Evento.exclusao_reservada_em.is_(None), models.Evento.exclusao_reservada_em < vencida)
+        ).all()
+    finally:
+        db.close()
+
+    for id_evento, email_proprietario in eventos:
+        _, iniciar = _registrar_exclusao(id_evento, email_proprietario)
+        if iniciar:
+            executar_exclusao_evento(id_evento)
@@ -0,0 +1,212 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from email.message import EmailMessage
+from datetime import datetime, timedelta
+import asyncio
+import time
+import aiosmtplib
+from ..models import models
+from ..core.config import settings
+from ..database.connection import SessionLocal
+
+# Outbox de emails: os serviços gravam a mensagem em email_pendente (na mesma transação da
+# operação) e retornam sem esperar o SMTP. O RemetenteEmail, uma task asyncio iniciada no
+# lifespan da aplicação, envia os pendentes em lotes por uma conexão autenticada reaproveitada
+# e reagenda as falhas com backoff exponencial. Pendentes sobrevivem a reinícios.
+#
+# Cada lote é reservado numa transação curta (status "enviando" e proxima_tentativa = fim da
+# reserva) e só então enviado, sem locks abertos durante o SMTP. O banco é acessado pela
+# sessão sync (SessionLocal) em asyncio.to_thread: o remetente roda em todo worker e não deve
+# obrigar cada um a abrir o pool async. Se o worker cair no meio do
+# envio, a reserva vence após EMAIL_RESERVA segundos e o lote volta a ser elegível.
+#
+# Para testar localmente sem enviar emails de verdade, aponte SMTP_HOST/SMTP_PORT para um
+# servidor SMTP de depuração (ex: `python -m aiosmtpd -n -l localhost:1025`) com
+# SMTP_STARTTLS=false e SMTP_USER vazio.
+
+
+def enfileirar_email(db: Session, destinatario: str, assunto: str, corpo: str) -> models.EmailPendente:
+    """Grava o email na outbox. Não faz commit: sai junto com a transação do chamador.
+    Depois do commit, chame `acordar_remetente()` para o envio não esperar o próximo ciclo."""
+    agora = datetime.utcnow()
+    email = models.EmailPendente(
+        destinatario=destinatario,
+        assunto=assunto,
+        corpo=corpo,
+        status="pendente",
+        tentativas=0,
+        proxima_tentativa=agora,
+        criado_em=agora
+    )
+    db.add(email)
+    return email
+
+
+def _montar_mensagem(email: models.EmailPendente) -> EmailMessage:
+    mensagem = EmailMessage()
+    mensagem["From"] = settings.EMAIL_REMETENTE or settings.SMTP_USER or "nao-responda@agendai.local"
+    mensagem["To"] = email.destinatario
+    mensagem["Subject"] = email.assunto
+    mensagem.set_content(email.corpo)
+    return mensagem
+
+
+def _registrar_falha(email: models.EmailPendente, erro: Exception, agora: datetime):
+    email.status = "pendente"
+    email.tentativas += 1
+    email.ultimo_erro = str(erro)[:500]
+    if email.tentativas >= settings.EMAIL_MAX_TENTATIVAS:
+        email.status = "falhou"
+    else:
+        # Backoff exponencial: base, 2x base, 4x base...
+        email.proxima_tentativa = agora + timedelta(seconds=settings.EMAIL_BACKOFF_BASE * 2 ** (email.tentativas - 1))
+
+
+def _devolver(email: models.EmailPendente, erro: Exception, agora: datetime):
+    # Email que nem chegou a ser tentado (servidor indisponível): volta para a fila sem contar
+    # tentativa nem backoff, para uma queda do SMTP não esgotar EMAIL_MAX_TENTATIVAS do lote
+    email.status = "pendente"
+    email.proxima_tentativa = agora
+    email.ultimo_erro = str(erro)[:500]
+
+
+class RemetenteEmail:
+    """Envia os emails pendentes em segundo plano reaproveitando uma conexão SMTP."""
+
+    def __init__(self, sessao=SessionLocal):
+        self._sessao = sessao
+        self._smtp = None
+        self._ultimo_uso = 0.0
+        self._acordar = None
+        self._loop = None
+
+    async def _conectar(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None:
+            try:
+                # A conexão pode ter sido derrubada pelo servidor enquanto estava ociosa
+                await self._smtp.noop()
+                return self._smtp
+            except (aiosmtplib.SMTPException, OSError):
+                await self._fechar()
+
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            start_tls=settings.SMTP_STARTTLS,
+            timeout=settings.SMTP_TIMEOUT
+        )
+        await smtp.connect()
+        if settings.SMTP_USER:
+            await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        self._smtp = smtp
+        return smtp
+
+    async def _fechar(self):
+        if self._smtp is None:
+            return
+        try:
+            await self._smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def _reservar_lote(self, db: Session) -> list[models.EmailPendente]:
+        """Reserva até EMAIL_LOTE emails vencidos (pendentes ou com reserva expirada) e faz commit,
+        liberando os locks antes do envio. Com vários workers, cada um reserva um lote diferente."""
+        agora = datetime.utcnow()
+        emails = db.scalars(
+            select(models.EmailPendente).where(
+                models.EmailPendente.status.in_(("pendente", "enviando")),
+                models.EmailPendente.proxima_tentativa <= agora
+            ).order_by(models.EmailPendente.id).limit(settings.EMAIL_LOTE)
+            .with_for_update(skip_locked=True)
+        ).all()
+        for email in emails:
+            email.status = "enviando"
+            email.proxima_tentativa = agora + timedelta(seconds=settings.EMAIL_RESERVA)
+        db.commit()
+        return emails
+
+    async def processar_lote(self) -> int:
+        """Envia até EMAIL_LOTE emails vencidos. Retorna quantos foram tentados (enviados ou com
+        falha); os que não chegaram a ser tentados por queda do SMTP voltam para a fila."""
+        # expire_on_commit=False: os emails reservados continuam carregados após o commit, sem
+        # recarregar atributos (I/O) no loop de eventos
+        db = self._sessao(expire_on_commit=False)
+        try:
+            emails = await asyncio.to_thread(self._reservar_lote, db)
+            if not emails:
+                return 0
+
+            agora = datetime.utcnow()
+            erro_conexao = None
+            try:
+                smtp = await self._conectar()
+            except Exception as e:
+                smtp, erro_conexao = None, e
+
+            tentados = 0
+            for email in emails:
+                if smtp is None:
+                    _devolver(email, erro_conexao, agora)
+                    continue
+                tentados += 1
+                try:
+                    await smtp.send_message(_montar_mensagem(email))
+                    email.status = "enviado"
+                    email.enviado_em = datetime.utcnow()
+                except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError) as e:
+                    # Conexão perdida: só este email conta como falha; o restante do lote
+                    # volta para a fila sem tentativa
+                    await self._fechar()
+                    smtp, erro_conexao = None, e
+                    _registrar_falha(email, e, agora)
+                except Exception as e:
+                    # Erro só deste email (ex: destinatário recusado)
+                    _registrar_falha(email, e, agora)
+
+            self._ultimo_uso = time.monotonic()
+            # Resultado do lote em uma segunda transação curta
+            await asyncio.to_thread(db.commit)
+            return tentados
+        finally:
+            await asyncio.to_thread(db.close)
+
+    async def executar(self):
+        """Laço do remetente: processa lotes e dorme até EMAIL_INTERVALO ou até ser acordado."""
+        self._loop = asyncio.get_running_loop()
+        self._acordar = asyncio.Event()
+        try:
+            while True:
+                self._acordar.clear()
+                try:
+                    processados = await self.processar_lote()
+                except Exception as e:
+                    print(f"Erro no envio de emails pendentes: {e}")
+                    processados = 0
+                if processados >= settings.EMAIL_LOTE:
+                    continue  # ainda pode haver pendentes vencidos; com o SMTP fora, espera o intervalo
+
+                if self._smtp is not None and time.monotonic() - self._ultimo_uso > settings.SMTP_CONEXAO_OCIOSA:
+                    await self._fechar()
+                try:
+                    await asyncio.wait_for(self._acordar.wait(), timeout=settings.EMAIL_INTERVALO)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._fechar()
+
+    def acordar(self):
+        """Pede um ciclo de envio imediato (pode ser chamado de qualquer thread)."""
+        if self._loop is not None and self._acordar is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._acordar.set)
+            except RuntimeError:
+                pass  # loop já encerrado; os pendentes saem no próximo início
+
+
+remetente = RemetenteEmail()
+
+
+def acordar_remetente():
+    remetente.acordar()
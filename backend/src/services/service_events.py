@@ -1,14 +1,22 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import text, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, func, and_, or_, select, insert, exists, literal
 from fastapi import HTTPException, status
 from ..models import models # Onde está sua classe Evento
 from sqlalchemy import delete
-from datetime import datetime, timedelta, date
-from ..core.constants import HORARIOS, DIAS_MAP, NUM_PARA_DIA
+import base64
+import binascii
+import heapq
+import numpy as np
+from datetime import datetime, timedelta, date, time
+from ..core.constants import HORARIOS, DIAS_MAP, NUM_PARA_DIA, DIAS_RECORRENCIA
 from ..schemas.jwt import TokenPayload
+from ..database.bulk import inserir_em_lotes
+from ..core.config import settings
+from ..services import service_agenda, service_auth
 from ..services.service_notifications import notificar_usuarios_em_massa,criar_notificacao
 
-def criar_evento_logica(db: Session, dados, disciplina=None, current_email: str = None):
+def criar_evento_logica(db: Session, dados, disciplina=None, current_email: str = None, identidade=None):
 
     # 1. Validar datas
     if dados.data_termino < dados.data_inicio:
@@ -30,21 +38,16 @@ def criar_evento_logica(db: Session, dados, disciplina=None, current_email: str
             detail="Usuários alunos não podem criar eventos do tipo Disciplina."
         )
 
-    # 2. Validar proprietário (pode ser Usuario ou Universidade)
-    usuario = None
+    # 2. Validar proprietário (pode ser Usuario ou Universidade) - uma consulta, ou nenhuma se a
+    # identidade já foi resolvida na requisição (service_auth.get_identidade_atual)
+    id_usuario = None
     if current_email is not None:
-        # Tentar buscar em Usuario primeiro
-        usuario = db.query(models.Usuario).filter(
-            models.Usuario.email == current_email
-        ).first()
-        
-        # Se não encontrou em Usuario, tentar em Universidade
-        if not usuario:
-            universidade = db.query(models.Universidade).filter(
-                models.Universidade.email == current_email
-            ).first()
-            if not universidade:
-                raise HTTPException(status_code=404, detail="Proprietário não encontrado.")
+        if identidade is None:
+            identidade = service_auth.resolver_identidade(db, current_email)
+        if not identidade:
+            raise HTTPException(status_code=404, detail="Proprietário não encontrado.")
+        if not identidade.is_universidade:
+            id_usuario = identidade.id
 
     try:
         # 3. Criar evento
@@ -72,25 +75,25 @@ def criar_evento_logica(db: Session, dados, disciplina=None, current_email: str
                 db=db,
                 id_evento=novo_evento.id,
                 disciplina=disciplina,
-                id_professor=usuario.id if usuario else None
+                id_professor=id_usuario
             )
 
             novo_evento.disciplina = nova_disciplina
 
-        if novo_evento.categoria.lower() != "disciplina":
-            # Gerar ocorrências para eventos que não são disciplinas
-            gerar_ocorrencias_evento(db, novo_evento)
-        else:
-            gerar_ocorrencias_disciplina(db, novo_evento, novo_evento.disciplina)
+        # Guardar a regra de recorrência; as ocorrências são expandidas sob demanda
+        definir_regra_recorrencia(db, novo_evento, novo_evento.disciplina)
 
         # 5. Adicionar o proprietário como convidado automaticamente (se for usuário)
-        if usuario:  # Se o proprietário for um usuário (não universidade)
+        if id_usuario:  # Se o proprietário for um usuário (não universidade)
             convidado_proprietario = models.Convidado(
                 id_evento=novo_evento.id,
-                id_usuario=usuario.id
+                id_usuario=id_usuario
             )
             db.add(convidado_proprietario)
 
+        # 6. Incluir o evento na agenda do criador (convidado, se usuário; proprietária, se universidade)
+        service_agenda.adicionar_evento_agenda(db, novo_evento, [current_email])
+
         db.commit()
         db.refresh(novo_evento)  
         # Notificar o proprietário do evento (se houver usuário identificado)
@@ -126,19 +129,25 @@ def mandar_noticacao_proprietario_evento(db: Session, novo_evento:models.Evento,
                 pass    
 
 
-def mandar_notificacao_evento_usuario_atual(db: Session, novo_evento:models.Evento, current_email: str, mensagem: str = None):
+def mandar_notificacao_evento_usuario_atual(db: Session, novo_evento:models.Evento, current_email: str, mensagem: str = None,
+                                            identidade=None):
 # --- NOTIFICAR O USUÁRIO ATUAL (a partir do TokenPayload) ---
     try:
             if current_email:
-                usuario_token = db.query(models.Usuario).filter(models.Usuario.email == current_email).first()
-                if usuario_token:
+                # Com a identidade do token (uid/role) não é preciso buscar o usuário pelo email
+                if identidade is not None:
+                    id_usuario_token = None if identidade.is_universidade else identidade.id
+                else:
+                    usuario_token = db.query(models.Usuario.id).filter(models.Usuario.email == current_email).first()
+                    id_usuario_token = usuario_token.id if usuario_token else None
+                if id_usuario_token:
                     #mensagem_token = f"Seu evento '{novo_evento.nome}' foi criado para {novo_evento.data_inicio.strftime('%d/%m/%Y às %H:%M')}"
                     # não deixar falha na notificação interromper a criação do evento
                     '''
                     try:
                         notificar_usuarios_em_massa(
                             db=db,
-                            ids_usuarios=[usuario_token.id],
+                            ids_usuarios=[id_usuario_token],
                             mensagem=mensagem,
                             id_evento=novo_evento.id
                         )
@@ -170,158 +179,291 @@ def parse_horario(horario: str):
         "turno": turno
     }
 
-def gerar_ocorrencias_disciplina(db: Session, evento: models.Evento, disciplina: models.Disciplina):
+def definir_regra_recorrencia(db: Session, evento: models.Evento, disciplina: models.Disciplina = None):
     """
-    Gera ocorrências semanais dentro do intervalo do EVENTO (não do semestre).
+    Grava em `evento.dias_semana` os dias da semana da regra de recorrência.
+    Nenhuma ocorrência é persistida aqui: elas são expandidas sob demanda e apenas
+    as exceções (edições e cancelamentos) viram linhas em ocorrencia_evento.
     """
+    if evento.categoria.lower() == "disciplina":
+        info = parse_horario(disciplina.horario)
+        dias_semana = info["dias_semana"]
+        inserir_em_lotes(db, models.DisciplinaDias, (
+            {"id_disciplina": evento.id, "dia": NUM_PARA_DIA[dia_str]} for dia_str in dias_semana
+        ))
+        evento.dias_semana = "".join(sorted({str(DIAS_MAP[dia_str]) for dia_str in dias_semana}))
+        return evento.dias_semana
+
+    recorrencia = (evento.recorrencia or "").lower()
+    if recorrencia in ("unico", "semanal"):
+        evento.dias_semana = str(evento.data_inicio.weekday())
+    elif recorrencia in DIAS_RECORRENCIA:
+        evento.dias_semana = DIAS_RECORRENCIA[recorrencia]
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo de recorrência desconhecido: {evento.recorrencia}"
+        )
+    return evento.dias_semana
 
-    info = parse_horario(disciplina.horario)
 
-    dias_semana = info["dias_semana"]
-    blocos = info["blocos"]
-    turno = info["turno"]
+class OcorrenciaExpandida:
+    """Ocorrência calculada a partir da regra do evento (não persistida no banco)."""
 
-    data_inicio = evento.data_inicio
-    data_fim = evento.data_termino
+    __slots__ = ("id", "id_evento", "evento", "local", "data", "horario_inicio",
+                 "horario_termino", "data_original", "cancelada")
 
-    ocorrencias = []
+    def __init__(self, evento: models.Evento, data: datetime, horario_inicio, horario_termino):
+        self.id = None
+        self.id_evento = evento.id
+        self.evento = evento
+        self.local = evento.local_padrao
+        self.data = data
+        self.horario_inicio = horario_inicio
+        self.horario_termino = horario_termino
+        self.data_original = data
+        self.cancelada = False
 
-    for dia_str in dias_semana:
-        weekday = DIAS_MAP[dia_str]   # agora funciona
-        dia_nome = NUM_PARA_DIA[dia_str]
-        criar_dias_disciplina(db, evento.id, dia_nome)
 
-        # encontrar a primeira data válida
-        dt = data_inicio
-        while dt.weekday() != weekday:
-            dt += timedelta(days=1)
+def gerar_datas_recorrencia(primeiro_dia: date, ultimo_dia: date, dias_semana: str) -> np.ndarray:
+    """
+    Calcula diretamente (sem percorrer dia a dia) as datas em [primeiro_dia, ultimo_dia]
+    cujo dia da semana está em `dias_semana` (0=segunda ... 6=domingo).
 
-        # gerar todas as ocorrências semanais
-        while dt <= data_fim:
+    Para cada dia da semana, a primeira data válida é obtida em forma fechada
+    ((dia - primeiro_dia.weekday()) % 7) e as demais com numpy.arange de passo 7.
+    Retorna um array datetime64[D] ordenado.
+    """
+    inicio = np.datetime64(primeiro_dia, "D")
+    fim = np.datetime64(ultimo_dia, "D") + 1
+    if fim <= inicio or not dias_semana:
+        return np.array([], dtype="datetime64[D]")
 
-            horario_inicio = HORARIOS[turno][blocos[0]][0]
-            horario_termino = HORARIOS[turno][blocos[-1]][1]
+    primeiro_weekday = primeiro_dia.weekday()
+    partes = [
+        np.arange(inicio + (int(dia) - primeiro_weekday) % 7, fim, 7, dtype="datetime64[D]")
+        for dia in set(dias_semana)
+    ]
+    return np.sort(np.concatenate(partes))
 
-            dt_inicio = dt.date()
 
-            ocorrencia = models.OcorrenciaEvento(
-                id_evento=evento.id,
-                data=dt_inicio,
-                local = evento.local_padrao,
-                horario_inicio = horario_inicio,
-                horario_termino = horario_termino
-            )
+def gerar_ocorrencias_evento(evento: models.Evento, inicio: date | None = None, fim: date | None = None):
+    """
+    Gera as ocorrências da regra do evento (`dias_semana`) dentro do intervalo
+    [data_inicio, data_termino], limitadas opcionalmente à janela [inicio, fim].
 
-            db.add(ocorrencia)
-            ocorrencias.append(ocorrencia)
+    Atende todos os tipos de recorrência ("unico", "diario", "diario_uteis", "semanal")
+    e disciplinas, que diferem apenas nos dias da semana e na origem do horário:
+        - Disciplina: horário vem dos blocos de `disciplina.horario` e a data é só o dia
+        - Demais: horário do evento e a data mantém a hora de data_inicio
+    """
+    is_disciplina = bool(evento.categoria) and evento.categoria.lower() == "disciplina"
+    if is_disciplina:
+        info = parse_horario(evento.disciplina.horario)
+        blocos = info["blocos"]
+        turno = info["turno"]
+        horario_inicio = HORARIOS[turno][blocos[0]][0]
+        horario_termino = HORARIOS[turno][blocos[-1]][1]
+        hora = time()
+    else:
+        horario_inicio = evento.horario_inicio
+        horario_termino = evento.horario_termino
+        hora = evento.data_inicio.time()
+
+    if not is_disciplina and (evento.recorrencia or "").lower() == "unico":
+        # Evento único ocorre apenas em data_inicio
+        ultimo_dia = evento.data_inicio.date()
+    elif evento.data_termino.time() >= evento.data_inicio.time():
+        ultimo_dia = evento.data_termino.date()
+    else:
+        # A última ocorrência respeita o horário de data_termino (datetime <= data_termino)
+        ultimo_dia = evento.data_termino.date() - timedelta(days=1)
 
-            dt += timedelta(days=7)
+    primeiro_dia = evento.data_inicio.date()
+    if inicio is not None:
+        primeiro_dia = max(primeiro_dia, inicio)
+    if fim is not None:
+        ultimo_dia = min(ultimo_dia, fim)
 
-    return ocorrencias
+    datas = gerar_datas_recorrencia(primeiro_dia, ultimo_dia, evento.dias_semana)
+    return [
+        OcorrenciaExpandida(evento, datetime.combine(dia, hora), horario_inicio, horario_termino)
+        for dia in datas.astype(object)
+    ]
 
-def criar_dias_disciplina(db, id_disciplina: int, dia: str):
-            dia_disciplina = models.DisciplinaDias(
-                id_disciplina=id_disciplina,
-                dia=dia
-            )
-            db.add(dia_disciplina)
-            return dia_disciplina
 
+def _filtro_intervalo(coluna, inicio: date | None, fim: date | None):
+    """Predicado half-open (coluna >= inicio AND coluna < fim + 1 dia) que aproveita índices."""
+    condicoes = []
+    if inicio is not None:
+        condicoes.append(coluna >= datetime.combine(inicio, time()))
+    if fim is not None:
+        condicoes.append(coluna < datetime.combine(fim + timedelta(days=1), time()))
+    return and_(*condicoes)
 
 
+def chave_ocorrencia(ocorrencia) -> tuple:
+    """Chave de ordenação e de paginação: (data, id_evento, id da linha; 0 para ocorrências da regra)."""
+    return (ocorrencia.data, ocorrencia.id_evento, ocorrencia.id or 0)
 
 
-def gerar_ocorrencias_evento(db: Session, evento: models.Evento):
-    """
-    Gera ocorrências para o evento dentro do intervalo [data_inicio, data_termino].
-    Tipos de recorrência:
-        - "diario": todos os dias
-        - "diario_uteis": apenas dias úteis (segunda a sexta)
-        - "semanal": mesma data do dia da semana do início
-    """
+def codificar_cursor(chave: tuple) -> str:
+    data, id_evento, id_ocorrencia = chave
+    return base64.urlsafe_b64encode(f"{data.isoformat()}|{id_evento}|{id_ocorrencia}".encode()).decode()
+
 
-    if evento.data_inicio > evento.data_termino and evento.recorrencia != "unico":
+def decodificar_cursor(cursor: str) -> tuple:
+    try:
+        data, id_evento, id_ocorrencia = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(data), int(id_evento), int(id_ocorrencia))
+    except (ValueError, binascii.Error, UnicodeDecodeError):
         raise HTTPException(
-            status_code=500,
-            detail="Inconsistência detectada: data_inicio > data_termino."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido."
         )
 
-    ocorrencias = []
 
-    # Evento único
-    if evento.recorrencia.lower() == "unico":
-        ocorrencia = models.OcorrenciaEvento(
-            id_evento=evento.id,
-            data=evento.data_inicio,
-            horario_inicio=evento.horario_inicio,
-            horario_termino=evento.horario_termino,
-            local=evento.local_padrao
-        )
-        db.add(ocorrencia)
-        ocorrencias.append(ocorrencia)
-        return ocorrencias
-
-    # Evento recorrente
-    data_atual = evento.data_inicio
-
-    if evento.recorrencia.lower() == "diario":
-        delta = timedelta(days=1)
-        while data_atual <= evento.data_termino:
-            ocorrencia = models.OcorrenciaEvento(
-                id_evento=evento.id,
-                data=data_atual,
-                horario_inicio=evento.horario_inicio,
-                horario_termino=evento.horario_termino,
-
-                local=evento.local_padrao
-            )
-            db.add(ocorrencia)
-            ocorrencias.append(ocorrencia)
-            data_atual += delta
-
-    elif evento.recorrencia.lower() == "diario_uteis":
-        while data_atual <= evento.data_termino:
-            if data_atual.weekday() < 5:  # 0=segunda, 4=sexta
-                ocorrencia = models.OcorrenciaEvento(
-                    id_evento=evento.id,
-                    data=data_atual,
-                    horario_inicio=evento.horario_inicio,
-                    horario_termino=evento.horario_termino,
-                    local=evento.local_padrao
-                )
-                db.add(ocorrencia)
-                ocorrencias.append(ocorrencia)
-            data_atual += timedelta(days=1)
-
-    elif evento.recorrencia.lower() == "semanal":
-        weekday_inicial = data_atual.weekday()
-        while data_atual <= evento.data_termino:
-            if data_atual.weekday() == weekday_inicial:
-                ocorrencia = models.OcorrenciaEvento(
-                    id_evento=evento.id,
-                    data=data_atual,
-                    horario_inicio=evento.horario_inicio,
-                    horario_termino=evento.horario_termino,
-                    local=evento.local_padrao
-                )
-                db.add(ocorrencia)
-                ocorrencias.append(ocorrencia)
-            data_atual += timedelta(days=1)
+def _consultas_ocorrencias(ids_eventos: list[int], inicio: date | None, fim: date | None):
+    """
+    Consultas (sync e async) das linhas gravadas dos eventos na janela [inicio, fim]:
+    (datas da regra substituídas por exceções, linhas não canceladas na ordem da chave).
+    """
+    substituidas = select(models.OcorrenciaEvento.id_evento, models.OcorrenciaEvento.data_original).where(
+        models.OcorrenciaEvento.id_evento.in_(ids_eventos),
+        models.OcorrenciaEvento.data_original.isnot(None)
+    )
+    linhas = select(models.OcorrenciaEvento).where(
+        models.OcorrenciaEvento.id_evento.in_(ids_eventos),
+        models.OcorrenciaEvento.cancelada.is_(False)
+    )
+    if inicio is not None or fim is not None:
+        substituidas = substituidas.where(_filtro_intervalo(models.OcorrenciaEvento.data_original, inicio, fim))
+        linhas = linhas.where(_filtro_intervalo(models.OcorrenciaEvento.data, inicio, fim))
+    linhas = linhas.order_by(
+        models.OcorrenciaEvento.data, models.OcorrenciaEvento.id_evento, models.OcorrenciaEvento.id
+    )
+    return substituidas, linhas
 
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Tipo de recorrência desconhecido: {evento.recorrencia}"
-        )
 
-    return ocorrencias
+def _intercalar_ocorrencias(eventos, substituidas, linhas, inicio: date | None, fim: date | None,
+                            apos: tuple | None):
+    """Intercala as linhas gravadas (já ordenadas) com as datas geradas pelas regras dos eventos."""
+    substituidas = {(id_evento, data_original.date()) for id_evento, data_original in substituidas}
+
+    # Ocorrências da regra de cada evento (já em ordem de data), sem as datas substituídas
+    geradas = [
+        (oc for oc in gerar_ocorrencias_evento(evento, inicio, fim)
+         if (oc.id_evento, oc.data.date()) not in substituidas)
+        for evento in eventos if evento.dias_semana is not None
+    ]
+
+    # Intercalar as fontes ordenadas e pular o que já foi entregue antes do cursor
+    for ocorrencia in heapq.merge(linhas, *geradas, key=chave_ocorrencia):
+        if apos is not None and chave_ocorrencia(ocorrencia) <= apos:
+            continue
+        yield ocorrencia
+
+
+def _inicio_apos_cursor(inicio: date | None, apos: tuple | None) -> date | None:
+    if apos is None:
+        return inicio
+    return apos[0].date() if inicio is None else max(inicio, apos[0].date())
+
+
+def iterar_ocorrencias_eventos(db: Session, eventos: list[models.Evento],
+                               inicio: date | None = None, fim: date | None = None,
+                               apos: tuple | None = None, tamanho_lote: int = 500):
+    """
+    Expande as ocorrências dos eventos na janela [inicio, fim] (datas inclusivas; None = sem limite),
+    sob demanda e em ordem de `chave_ocorrencia`.
+
+    Eventos com regra (`dias_semana` preenchido) têm as datas calculadas a partir da regra e
+    combinadas com as exceções gravadas em ocorrencia_evento: linhas com `data_original`
+    substituem a data da regra e linhas com `cancelada` a removem. Eventos antigos
+    (`dias_semana` NULL) continuam usando apenas as linhas gravadas.
+
+    As linhas gravadas são lidas em blocos (`yield_per`) já ordenadas pelo banco e intercaladas
+    com as datas geradas, sem montar a lista completa. Com `apos` (chave de um cursor), apenas
+    as ocorrências posteriores a ela são produzidas.
+    """
+    if not eventos:
+        return
+
+    inicio = _inicio_apos_cursor(inicio, apos)
+    substituidas, linhas = _consultas_ocorrencias([evento.id for evento in eventos], inicio, fim)
+
+    # 1. Datas da regra substituídas por exceções (poucas linhas, carregadas antes de percorrer)
+    substituidas = db.execute(substituidas).all()
+
+    # 2. Linhas gravadas (exceções e ocorrências de eventos antigos) na ordem da chave, em blocos
+    linhas = db.scalars(linhas.execution_options(yield_per=tamanho_lote))
+
+    # 3. Intercalar com as ocorrências geradas pelas regras
+    yield from _intercalar_ocorrencias(eventos, substituidas, linhas, inicio, fim, apos)
+
+
+async def listar_ocorrencias_eventos_async(db: AsyncSession, eventos: list, inicio: date | None = None,
+                                           fim: date | None = None, apos: tuple | None = None) -> list:
+    """
+    Versão async de `iterar_ocorrencias_eventos`. As linhas gravadas da janela são lidas de uma
+    vez (sem `yield_per`) e intercaladas em memória com as datas geradas.
+    """
+    if not eventos:
+        return []
+
+    inicio = _inicio_apos_cursor(inicio, apos)
+    substituidas, linhas = _consultas_ocorrencias([evento.id for evento in eventos], inicio, fim)
+    substituidas = (await db.execute(substituidas)).all()
+    linhas = (await db.scalars(linhas)).all()
+    return list(_intercalar_ocorrencias(eventos, substituidas, linhas, inicio, fim, apos))
+
+
+def listar_ocorrencias_eventos(db: Session, eventos: list[models.Evento],
+                               inicio: date | None = None, fim: date | None = None) -> list:
+    """Versão em lista de `iterar_ocorrencias_eventos` (ocorrências ORM ou OcorrenciaExpandida)."""
+    return list(iterar_ocorrencias_eventos(db, eventos, inicio, fim))
+
+
+def buscar_ocorrencia_por_data(db: Session, evento: models.Evento, dia: date):
+    """Retorna a ocorrência (persistida ou expandida da regra) do evento no dia informado, ou None."""
+    if isinstance(dia, datetime):
+        dia = dia.date()
+    ocorrencias = listar_ocorrencias_eventos(db, [evento], dia, dia)
+    return ocorrencias[0] if ocorrencias else None
+
+
+def materializar_excecao(db: Session, ocorrencia) -> models.OcorrenciaEvento:
+    """
+    Garante que a ocorrência exista como linha em ocorrencia_evento.
+    Ocorrências expandidas da regra viram exceções apontando para a data original.
+    """
+    if isinstance(ocorrencia, models.OcorrenciaEvento):
+        return ocorrencia
+
+    excecao = models.OcorrenciaEvento(
+        id_evento=ocorrencia.id_evento,
+        local=ocorrencia.local,
+        data=ocorrencia.data,
+        horario_inicio=ocorrencia.horario_inicio,
+        horario_termino=ocorrencia.horario_termino,
+        data_original=ocorrencia.data_original,
+        cancelada=False
+    )
+    db.add(excecao)
+    return excecao
 
 
     
+def _buscar_eventos_com_disciplina(db: Session, *filtros):
+    return db.query(models.Evento).options(
+        joinedload(models.Evento.disciplina)
+        .joinedload(models.Disciplina.disciplina_dias)
+    ).filter(models.Evento.excluido_em.is_(None), *filtros).all()
+
 def listar_ocorrencias_por_evento(db, id_evento):
     try:
-        ocorrencias = db.query(models.OcorrenciaEvento).filter(models.OcorrenciaEvento.id_evento == id_evento).all()
-        return ocorrencias
+        eventos = _buscar_eventos_com_disciplina(db, models.Evento.id == id_evento)
+        return listar_ocorrencias_eventos(db, eventos)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -330,265 +472,279 @@ def listar_ocorrencias_por_evento(db, id_evento):
     
 def listar_ocorrencias_por_evento_usuario(db, id_evento, email_user):
     try:
-        ocorrencias = db.query(models.OcorrenciaEvento).join(models.Evento).filter(
-            models.Evento.id == id_evento
-        ).all()
-        return ocorrencias
+        eventos = _buscar_eventos_com_disciplina(db, models.Evento.id == id_evento)
+        return listar_ocorrencias_eventos(db, eventos)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao listar ocorrências do evento para o usuário: {str(e)}"
         )
     
-def listar_ocorrencias_de_evento_usuario(db, user_email, data, categoria):
+def iterar_ocorrencias_de_evento_usuario(db, user_email, data, categoria, inicio: date | None = None,
+                                         fim: date | None = None, cursor: str | None = None):
     """
-    Lista todas as ocorrências de eventos associados ao usuário autenticado,
-    com filtros opcionais por data e categoria.
-    
+    Ocorrências de eventos associados ao usuário autenticado, com filtros opcionais por data,
+    intervalo e categoria, produzidas sob demanda na ordem (data, id_evento, id).
+
+    Os eventos vêm da agenda do usuário (agenda_usuario). Os filtros e o cursor são validados
+    imediatamente (HTTPException antes de qualquer linha); as ocorrências só são lidas
+    conforme o iterador é consumido.
+
     Args:
         db: Sessão do banco de dados
         user_email: Email do usuário autenticado (pode ser Usuario ou Universidade)
         data: Data específica para filtrar ocorrências (opcional)
         categoria: Categoria de evento para filtrar (opcional)
-    
+        inicio: Início do intervalo, inclusivo (opcional)
+        fim: Fim do intervalo, exclusivo (opcional) - ex: semana = [segunda, segunda seguinte)
+        cursor: Cursor devolvido pela página anterior (opcional)
+
     Returns:
-        Lista de dicts formatados usando montar_informacoes_ocorrencia
+        Iterador de tuplas (chave, dict formatado por montar_informacoes_ocorrencia)
     """
-    # 1. Buscar usuário ou universidade pelo email
-    user = db.query(models.Usuario).filter(models.Usuario.email == user_email).first()
-    
-    # Se não encontrou em Usuario, tentar em Universidade
-    if not user:
-        universidade = db.query(models.Universidade).filter(models.Universidade.email == user_email).first()
-        if not universidade:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Usuário ou universidade não encontrado."
-            )
-        # Usar universidade como "user" para continuar o fluxo
-        # Neste caso, vamos buscar eventos onde a universidade é proprietária
-        user_id = None  # Universidade não tem id_usuario
-        is_universidade = True
-    else:
-        user_id = user.id
-        is_universidade = False
-    
-    # 2. Buscar IDs dos eventos baseado no tipo de usuário
-    if is_universidade:
-        # Para universidade: buscar eventos onde ela é proprietária
-        ids_eventos_usuario = db.query(models.Evento.id).filter(
-            models.Evento.email_proprietario == user_email
-        ).distinct().subquery()
-    else:
-        # Para usuário comum: buscar eventos onde está convidado
-        ids_eventos_usuario = db.query(models.Convidado.id_evento).filter(
-            models.Convidado.id_usuario == user_id
-        ).distinct().subquery()
-    
-    # 3. Montar query de ocorrências fazendo join com Evento
-    # O join é necessário para acessar dados do evento e aplicar filtros
-    query_ocorrencias = db.query(models.OcorrenciaEvento).join(
-        models.Evento,
-        models.OcorrenciaEvento.id_evento == models.Evento.id
-    ).filter(
-        models.OcorrenciaEvento.id_evento.in_(ids_eventos_usuario)
-    )
-    
-    # 4. Aplicar filtro de data (se fornecido)
-    if data is not None:
-        query_ocorrencias = query_ocorrencias.filter(
-            func.date(models.OcorrenciaEvento.data) == data
+    # 0. Normalizar o filtro de datas para a janela [inicio, ultimo_dia] (datas inclusivas)
+    inicio, ultimo_dia = _normalizar_janela(data, inicio, fim)
+    apos = decodificar_cursor(cursor) if cursor else None
+
+    # 1. Buscar os eventos da agenda do usuário (read model agenda_usuario) com ocorrências na janela
+    # Uma única consulta pelo índice (email_usuario, ultima_data, primeira_data), já com os campos
+    # exibidos, a regra de recorrência e os dias ordenados da disciplina
+    eventos = service_agenda.buscar_agenda(db, user_email, categoria, inicio, ultimo_dia)
+    # Agenda vazia: só confirma que o usuário existe (mantém o 404 para emails desconhecidos)
+    if not eventos and not db.scalar(service_agenda.consulta_principal_existe(user_email)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuário ou universidade não encontrado."
         )
-    
-    # 5. Aplicar filtro de categoria (se fornecido)
-    if categoria is not None:
-        query_ocorrencias = query_ocorrencias.filter(
-            models.Evento.categoria == categoria
+
+    # 2. Expandir as ocorrências na janela pedida e aplicar exceções
+    # (as linhas gravadas são filtradas com data >= inicio AND data < fim, usando o índice (id_evento, data))
+    ocorrencias = iterar_ocorrencias_eventos(db, eventos, inicio=inicio, fim=ultimo_dia, apos=apos)
+
+    return _montar_ocorrencias_usuario(eventos, ocorrencias)
+
+
+def _normalizar_janela(data: date | None, inicio: date | None, fim: date | None):
+    """Converte `data` ou o intervalo [inicio, fim) na janela [inicio, ultimo_dia] (datas inclusivas)."""
+    if data is not None and (inicio is not None or fim is not None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use 'data' ou o intervalo 'start'/'end', não ambos."
         )
-    
-    # 6. Executar query com eager loading para evitar N+1 ao acessar relacionamentos
-    # Após aplicar todos os filtros, carregamos os relacionamentos necessários
-    query_ocorrencias = query_ocorrencias.options(
-        joinedload(models.OcorrenciaEvento.evento)
-        .joinedload(models.Evento.disciplina)
-        .joinedload(models.Disciplina.disciplina_dias)
-    )
-    
-    ocorrencias = query_ocorrencias.all()
-    
-    # 7. Processar cada ocorrência para montar resposta formatada
-    resultado = []
+    if data is not None:
+        return data, data
+    if inicio is not None and fim is not None and fim <= inicio:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O fim do intervalo ('end') deve ser posterior ao início ('start')."
+        )
+    return inicio, fim - timedelta(days=1) if fim is not None else None
+
+
+def _montar_ocorrencias_usuario(eventos, ocorrencias):
+    # 3. Montar a resposta com os dados da agenda (sem carregar Evento/Disciplina por ocorrência)
+    agenda_por_evento = {evento.id: evento for evento in eventos}
     for ocorrencia in ocorrencias:
-        # Verificar se o usuário é proprietário do evento
-        # ocorrencia.evento funciona porque temos o relationship definido no model
-        is_proprietario = ocorrencia.evento.email_proprietario == user_email
-        
-        # Buscar dias da disciplina se for evento do tipo disciplina
-        dias_list = None
-        if (ocorrencia.evento.categoria and 
-            ocorrencia.evento.categoria.lower() == 'disciplina'):
-            # disciplina funciona porque Evento tem relationship("Disciplina")
-            disciplina = getattr(ocorrencia.evento, 'disciplina', None)
-            if disciplina:
-                try:
-                    # Buscar dias diretamente do banco para garantir todos os registros
-                    result = db.execute(text(
-                        "SELECT dia FROM disciplina_dias WHERE id_disciplina = :id "
-                        "ORDER BY FIELD(dia, 'Segunda','Terça','Quarta','Quinta','Sexta','Sábado','Domingo')"
-                    ), {"id": disciplina.id_evento})
-                    dias_list = [row[0] for row in result.fetchall()]
-                except Exception:
-                    # Fallback: usar relationship ORM se houver erro na query SQL
-                    dias_list = [d.dia for d in (disciplina.disciplina_dias or [])]
-        
-        # Montar informações da ocorrência usando a função auxiliar
+        evento = agenda_por_evento[ocorrencia.id_evento]
         info = montar_informacoes_ocorrencia(
-            ocorrencia, 
-            dias_list=dias_list, 
-            is_proprietario=is_proprietario
+            ocorrencia,
+            dias_list=evento.dias,
+            is_proprietario=evento.is_proprietario,
+            evento=evento
         )
         # Adicionar id_evento ao dict de resposta (necessário para o frontend)
         info["id_evento"] = ocorrencia.id_evento
+        yield chave_ocorrencia(ocorrencia), info
+
+
+def listar_ocorrencias_de_evento_usuario(db, user_email, data, categoria, inicio: date | None = None,
+                                         fim: date | None = None, limite: int | None = None,
+                                         cursor: str | None = None):
+    """
+    Lista as ocorrências de eventos associados ao usuário autenticado (ver
+    `iterar_ocorrencias_de_evento_usuario`), paginadas por cursor quando `limite` é informado.
+
+    Returns:
+        (lista de dicts, cursor da próxima página ou None se não houver mais ocorrências)
+    """
+    ocorrencias = iterar_ocorrencias_de_evento_usuario(db, user_email, data, categoria, inicio, fim, cursor)
+    try:
+        return _paginar(ocorrencias, limite)
+    finally:
+        ocorrencias.close()
+
+
+async def listar_ocorrencias_de_evento_usuario_async(db: AsyncSession, user_email, data, categoria,
+                                                     inicio: date | None = None, fim: date | None = None,
+                                                     limite: int | None = None, cursor: str | None = None):
+    """
+    Versão async (AsyncSession) de `listar_ocorrencias_de_evento_usuario`, com os mesmos filtros,
+    ordem, paginação e formato de resposta.
+    """
+    inicio, ultimo_dia = _normalizar_janela(data, inicio, fim)
+    apos = decodificar_cursor(cursor) if cursor else None
+
+    eventos = await service_agenda.buscar_agenda_async(db, user_email, categoria, inicio, ultimo_dia)
+    if not eventos and not await db.scalar(service_agenda.consulta_principal_existe(user_email)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuário ou universidade não encontrado."
+        )
+    ocorrencias = await listar_ocorrencias_eventos_async(db, eventos, inicio=inicio, fim=ultimo_dia, apos=apos)
+    return _paginar(_montar_ocorrencias_usuario(eventos, ocorrencias), limite)
+
+
+def _paginar(ocorrencias, limite: int | None):
+    """Consome (chave, info) até `limite` itens. Retorna (lista de infos, cursor da próxima página ou None)."""
+    resultado = []
+    ultima_chave = None
+    for chave, info in ocorrencias:
+        if limite is not None and len(resultado) == limite:
+            # Existe pelo menos mais uma ocorrência: a próxima página começa após a última entregue
+            return resultado, codificar_cursor(ultima_chave)
         resultado.append(info)
-    
-    return resultado 
+        ultima_chave = chave
+    return resultado, None
     
     
 
 def deletar_evento(db: Session, id_evento: int, current_email:str = None):
-
-    # 1. Buscar o evento
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
+    """
+    Deleta o evento com um único DELETE: ocorrências, presenças, convidados, disciplina
+    (dias e cursos) e linhas de agenda são removidos pelo banco (ON DELETE CASCADE).
+    Apenas o proprietário do evento pode excluí-lo; eventos já em exclusão em segundo plano
+    (tombstone) retornam 409 e seguem com o processamento em lotes.
+    """
+    evento = db.query(models.Evento.email_proprietario, models.Evento.excluido_em).filter(
+        models.Evento.id == id_evento
+    ).first()
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evento não encontrado."
         )
-    '''
-    mandar_noticacao_proprietario_evento(db=db, novo_evento=evento, usuario=evento, 
-    mensagem=f"O evento '{evento.nome}' foi cancelado!")   
-    mandar_notificacao_evento_usuario_atual(db=db, novo_evento=evento, current_email=current_email,
-    mensagem=f"O evento '{evento.nome}' foi cancelado!")
-    '''
-
-    # 2. Remover PRESENÇAS das ocorrências desse evento
-    db.query(models.Presenca).filter(
-        models.Presenca.id_ocorrencia_evento.in_(
-            db.query(models.OcorrenciaEvento.id).filter(models.OcorrenciaEvento.id_evento == id_evento)
+    if evento.email_proprietario != current_email:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas o proprietário do evento pode excluí-lo."
+        )
+    if evento.excluido_em is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="O evento já está sendo excluído em segundo plano."
         )
-    ).delete(synchronize_session=False)
-
-    # 3. Remover OCORRÊNCIAS do evento
-    db.query(models.OcorrenciaEvento).filter(
-        models.OcorrenciaEvento.id_evento == id_evento
-    ).delete(synchronize_session=False)
 
-    # 4. Remover CONVIDADOS do evento
-    db.query(models.Convidado).filter(
-        models.Convidado.id_evento == id_evento
+    db.query(models.Evento).filter(
+        models.Evento.id == id_evento
     ).delete(synchronize_session=False)
+    db.commit()
 
-    # 5. Remover disciplina associada (caso exista)
-    disciplina = db.query(models.Disciplina).filter(
-        models.Disciplina.id_evento == id_evento
-    ).first()
-
-    if disciplina:
-        # 5.1 Remover dias da disciplina
-        db.query(models.DisciplinaDias).filter(
-            models.DisciplinaDias.id_disciplina == disciplina.id_evento
-        ).delete(synchronize_session=False)
-
-        # 5.2 Remover curso_disciplina
-        db.query(models.CursoDisciplina).filter(
-            models.CursoDisciplina.id_disciplina == disciplina.id_evento
-        ).delete(synchronize_session=False)
-
-        # 5.3 Remover a disciplina em si
-        db.query(models.Disciplina).filter(
-            models.Disciplina.id_evento == id_evento
-        ).delete(synchronize_session=False)
-
-    # 6. Finalmente, remover o EVENTO
-    db.query(models.Evento).filter(models.Evento.id == id_evento).delete(synchronize_session=False)
+    return {"mensagem": "Evento e suas dependências deletados com sucesso!"}
 
-    db.commit()
 
+def deletar_eventos_em_lote(db: Session, ids_eventos: list[int], current_email: str) -> dict:
+    """
+    Deleta vários eventos em uma única transação (ex: limpeza de fim de semestre).
+    Apenas eventos dos quais o usuário é proprietário são removidos; os demais ids
+    (inexistentes, de outro proprietário ou já em exclusão em segundo plano) voltam em `nao_removidos`.
+    """
+    ids_pedidos = set(ids_eventos)
+
+    # 1. Filtrar os eventos do usuário entre os ids pedidos
+    ids_removidos = {
+        id_evento for (id_evento,) in db.query(models.Evento.id).filter(
+            models.Evento.id.in_(ids_pedidos),
+            models.Evento.email_proprietario == current_email,
+            models.Evento.excluido_em.is_(None)
+        )
+    }
 
+    # 2. Um único DELETE; as dependências saem por ON DELETE CASCADE
+    try:
+        if ids_removidos:
+            db.query(models.Evento).filter(
+                models.Evento.id.in_(ids_removidos)
+            ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao deletar eventos: {str(e)}"
+        )
 
-    return {"mensagem": "Evento e suas dependências deletados com sucesso!"}
+    return {
+        "mensagem": f"{len(ids_removidos)} evento(s) deletado(s) com sucesso.",
+        "total_removidos": len(ids_removidos),
+        "removidos": sorted(ids_removidos),
+        "nao_removidos": sorted(ids_pedidos - ids_removidos),
+    }
 
 
 def pegar_evento_por_id(db: Session, id_evento: int):
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
+    evento = db.query(models.Evento).filter(
+        models.Evento.id == id_evento,
+        models.Evento.excluido_em.is_(None)
+    ).first()
     return evento
 
 
 def pegar_ocorrencias_evento(db: Session, id_evento: int):
-    ocorrencias = db.query(models.OcorrenciaEvento).filter(models.OcorrenciaEvento.id_evento == id_evento).all()
-    return ocorrencias
+    eventos = _buscar_eventos_com_disciplina(db, models.Evento.id == id_evento)
+    return listar_ocorrencias_eventos(db, eventos)
 
 def pegar_ocorrencia_evento_por_data(db: Session, id_evento: int, date: date, current_user_email: str) -> dict | None: 
     
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
-    if not evento:
+    # Eager-load disciplina + disciplina_dias para evitar N+1
+    eventos = _buscar_eventos_com_disciplina(db, models.Evento.id == id_evento)
+    if not eventos:
         return None
+    evento = eventos[0]
         
     is_proprietario = evento.email_proprietario == current_user_email 
     
-    start = datetime(date.year, date.month, date.day) 
-    end = start + timedelta(days=1)  
-    
-    ocorrencia = db.query(models.OcorrenciaEvento).options(
-        # Eager-load evento + disciplina + disciplina_dias para evitar N+1
-        joinedload(models.OcorrenciaEvento.evento)
-        .joinedload(models.Evento.disciplina)
-        .joinedload(models.Disciplina.disciplina_dias)
-    ).filter(
-        models.OcorrenciaEvento.id_evento == id_evento,
-        models.OcorrenciaEvento.data >= start,
-        models.OcorrenciaEvento.data < end
-    ).first()
+    ocorrencia = buscar_ocorrencia_por_data(db, evento, date)
     
     if not ocorrencia:
         return None
 
-    # Se for disciplina, buscar os dias diretamente via SQL para evitar limitações
-    # do mapeamento ORM (onde a PK atual de DisciplinaDias pode colidir e sobrescrever
-    # múltiplas linhas com o mesmo id_disciplina). Isso garante que retornemos todos
-    # os dias armazenados no banco.
-    dias_list = None
-    try:
-        # Verificar se a categoria do evento é "Disciplina" antes de buscar os dias
-        if ocorrencia.evento.categoria and ocorrencia.evento.categoria.lower() == 'disciplina':
-            disciplina = getattr(ocorrencia.evento, 'disciplina', None)
-            if disciplina:
-                # Ordena os dias na ordem da semana usando FIELD para garantir ordem previsível
-                result = db.execute(text(
-                    "SELECT dia FROM disciplina_dias WHERE id_disciplina = :id "
-                    "ORDER BY FIELD(dia, 'Segunda','Terça','Quarta','Quinta','Sexta','Sábado','Domingo')"
-                ), {"id": disciplina.id_evento})
-                dias_list = [row[0] for row in result.fetchall()]
-    except Exception:
-        dias_list = None
+    # Se for disciplina, ordenar os dias (já carregados via joinedload) na ordem da semana
+    dias_list = listar_dias_disciplina(ocorrencia.evento)
 
     return montar_informacoes_ocorrencia(ocorrencia, dias_list=dias_list, is_proprietario=is_proprietario)
 
 
-def montar_informacoes_ocorrencia(ocorrencia: models.OcorrenciaEvento, dias_list: list[str] | None = None, is_proprietario: bool = False) -> dict:
+def listar_dias_disciplina(evento: models.Evento) -> list[str] | None:
+    """
+    Dias da disciplina do evento ordenados pela semana (ORDEM_DIAS), ou None se o evento
+    não for do tipo Disciplina. Usa o relacionamento disciplina_dias (carregado via joinedload
+    nas consultas de ocorrências), sem consulta extra por ocorrência.
+    Dias desconhecidos ficam no início, como fazia o ORDER BY FIELD(...) do MySQL.
+    """
+    if not (evento.categoria and evento.categoria.lower() == 'disciplina'):
+        return None
+    disciplina = getattr(evento, 'disciplina', None)
+    if not disciplina:
+        return None
+    return service_agenda.ordenar_dias(d.dia for d in (disciplina.disciplina_dias or []))
+
+
+def montar_informacoes_ocorrencia(ocorrencia: models.OcorrenciaEvento, dias_list: list[str] | None = None, is_proprietario: bool = False, evento=None) -> dict:
     """
     Função responsável por selecionar e formatar os dados da ocorrência e do evento relacionado.
     Você pode customizar aqui quais campos quer retornar.
+    `evento` substitui ocorrencia.evento (ex: linha da agenda, evitando carregar o Evento).
     """
+    evento = evento if evento is not None else ocorrencia.evento
     # data: apenas data (sem horário)
     data_only = ocorrencia.data.date() if isinstance(ocorrencia.data, datetime) else ocorrencia.data
 
     # coletar recorrência do evento
-    recorrencia_val = ocorrencia.evento.recorrencia if hasattr(ocorrencia.evento, 'recorrencia') else None
+    recorrencia_val = evento.recorrencia if hasattr(evento, 'recorrencia') else None
 
     # se for Disciplina, pegar horario da disciplina (string como 'AB'/'CD') e os dias
-    if getattr(ocorrencia.evento, 'categoria', None) and ocorrencia.evento.categoria.lower() == 'disciplina':
-        disciplina = getattr(ocorrencia.evento, 'disciplina', None)
+    if getattr(evento, 'categoria', None) and evento.categoria.lower() == 'disciplina':
+        disciplina = getattr(evento, 'disciplina', None)
         if disciplina:
             # sobrescreve hora com o valor textual da disciplina
             hora_val = disciplina.horario
@@ -602,9 +758,9 @@ def montar_informacoes_ocorrencia(ocorrencia: models.OcorrenciaEvento, dias_list
         "data": data_only,
         "horario_inicio": ocorrencia.horario_inicio,
         "horario_termino": ocorrencia.horario_termino,
-        "nome": ocorrencia.evento.nome,
-        "categoria": ocorrencia.evento.categoria,
-        "descricao": ocorrencia.evento.descricao,
+        "nome": evento.nome,
+        "categoria": evento.categoria,
+        "descricao": evento.descricao,
         "recorrencia": recorrencia_val,
         "is_proprietario": is_proprietario
     }
@@ -639,12 +795,13 @@ def atualizar_ocorrencia_evento_por_data(
                        ocorrência não existir, ou nenhum campo for fornecido
     """
     # 1. Verificar se o evento existe
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
-    if not evento:
+    eventos = _buscar_eventos_com_disciplina(db, models.Evento.id == id_evento)
+    if not eventos:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evento não encontrado."
         )
+    evento = eventos[0]
     
     # 2. Verificar se o usuário atual é o proprietário do evento
     if evento.email_proprietario != current_user_email:
@@ -653,19 +810,8 @@ def atualizar_ocorrencia_evento_por_data(
             detail="Você não tem permissão para atualizar este evento."
         )
     
-    # 3. Buscar a ocorrência específica pela data
-    start = datetime(date.year, date.month, date.day)
-    end = start + timedelta(days=1)
-    
-    ocorrencia = db.query(models.OcorrenciaEvento).options(
-        joinedload(models.OcorrenciaEvento.evento)
-        .joinedload(models.Evento.disciplina)
-        .joinedload(models.Disciplina.disciplina_dias)
-    ).filter(
-        models.OcorrenciaEvento.id_evento == id_evento,
-        models.OcorrenciaEvento.data >= start,
-        models.OcorrenciaEvento.data < end
-    ).first()
+    # 3. Buscar a ocorrência específica pela data (gravada ou expandida da regra)
+    ocorrencia = buscar_ocorrencia_por_data(db, evento, date)
     
     if not ocorrencia:
         raise HTTPException(
@@ -681,6 +827,8 @@ def atualizar_ocorrencia_evento_por_data(
         )
     
     # 5. Atualizar os campos fornecidos
+    # Ocorrências da regra passam a existir como exceção gravada em ocorrencia_evento
+    ocorrencia = materializar_excecao(db, ocorrencia)
     campos_atualizados = []
     
     if payload.local is not None:
@@ -696,6 +844,8 @@ def atualizar_ocorrencia_evento_por_data(
             )
         ocorrencia.data = payload.data
         campos_atualizados.append("data")
+        # A agenda precisa cobrir a nova data (eventos únicos podem ir para fora do intervalo)
+        service_agenda.estender_periodo_agenda(db, id_evento, payload.data)
 
     horario_inicio = ocorrencia.horario_inicio
     horario_termino = ocorrencia.horario_termino
@@ -734,19 +884,7 @@ def atualizar_ocorrencia_evento_por_data(
         )
     
     # 7. Buscar dias da disciplina (se aplicável) para retornar na resposta
-    dias_list = None
-    try:
-        # Verificar se a categoria do evento é "Disciplina" antes de buscar os dias
-        if ocorrencia.evento.categoria and ocorrencia.evento.categoria.lower() == 'disciplina':
-            disciplina = getattr(ocorrencia.evento, 'disciplina', None)
-            if disciplina:
-                result = db.execute(text(
-                    "SELECT dia FROM disciplina_dias WHERE id_disciplina = :id "
-                    "ORDER BY FIELD(dia, 'Segunda','Terça','Quarta','Quinta','Sexta','Sábado','Domingo')"
-                ), {"id": disciplina.id_evento})
-                dias_list = [row[0] for row in result.fetchall()]
-    except Exception:
-        dias_list = None
+    dias_list = listar_dias_disciplina(ocorrencia.evento)
     
     # 8. Verificar se o usuário atual é o proprietário
     is_proprietario = evento.email_proprietario == current_user_email
@@ -767,8 +905,11 @@ def cancelar_ocorrencia_evento_por_data(
     Cancela (deleta) uma ocorrência específica de um evento.
     Apenas o proprietário do evento pode cancelar suas ocorrências.
     """
-    # 1. Buscar o evento
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
+    # 1. Buscar o evento (eventos em exclusão em segundo plano não podem mais ser alterados)
+    evento = db.query(models.Evento).filter(
+        models.Evento.id == id_evento,
+        models.Evento.excluido_em.is_(None)
+    ).first()
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -782,11 +923,8 @@ def cancelar_ocorrencia_evento_por_data(
             detail="Você não tem permissão para cancelar ocorrências deste evento."
         )
     
-    # 3. Buscar a ocorrência específica (comparando apenas a parte DATE do datetime)
-    ocorrencia = db.query(models.OcorrenciaEvento).filter(
-        models.OcorrenciaEvento.id_evento == id_evento,
-        func.date(models.OcorrenciaEvento.data) == date
-    ).first()
+    # 3. Buscar a ocorrência específica (gravada ou expandida da regra)
+    ocorrencia = buscar_ocorrencia_por_data(db, evento, date)
     
     if not ocorrencia:
         raise HTTPException(
@@ -794,9 +932,14 @@ def cancelar_ocorrencia_evento_por_data(
             detail=f"Ocorrência não encontrada para a data {date}."
         )
     
-    # 4. Deletar a ocorrência
+    # 4. Cancelar a ocorrência
+    # Eventos com regra guardam o cancelamento como exceção (senão a data voltaria na expansão);
+    # eventos antigos, com ocorrências gravadas, apenas removem a linha
     try:
-        db.delete(ocorrencia)
+        if evento.dias_semana is None:
+            db.delete(ocorrencia)
+        else:
+            materializar_excecao(db, ocorrencia).cancelada = True
         db.commit()
     except Exception as e:
         db.rollback()
@@ -818,7 +961,8 @@ def adicionar_participante_evento(
     db: Session, 
     id_evento: int, 
     email_usuario: str, 
-    current_user: TokenPayload
+    current_user: TokenPayload,
+    detalhar: bool = False
 ):
     """
     Adiciona um ou múltiplos usuários como convidados de um evento.
@@ -833,15 +977,21 @@ def adicionar_participante_evento(
         id_evento: ID do evento
         email_usuario: Email ou padrão de email para convite
         current_user: Token payload do usuário autenticado
+        detalhar: Incluir sempre as listas de adicionados e já existentes
     
     Returns:
-        Dict com estatísticas: total adicionado, já existentes, e lista de adicionados
+        Dict com estatísticas: total adicionado, já existentes, e lista de adicionados.
+        Sem `detalhar`, convites todos@<dominio> e convites com mais de
+        CONVITE_LIMITE_DETALHES usuários trazem só os totais e "resumo": True.
     
     Raises:
         HTTPException: Se o evento não existir, usuário não for proprietário, etc.
     """
-    # 1. Verificar se o evento existe
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
+    # 1. Verificar se o evento existe (eventos em exclusão em segundo plano não podem mais ser alterados)
+    evento = db.query(models.Evento).filter(
+        models.Evento.id == id_evento,
+        models.Evento.excluido_em.is_(None)
+    ).first()
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -859,6 +1009,18 @@ def adicionar_participante_evento(
             detail="Apenas o proprietário do evento pode adicionar participantes."
         )
     
+    # CASO 1: todos@<dominio> - convida todos com esse domínio no email (APENAS UNIVERSIDADE)
+    if email_usuario.lower().startswith("todos@"):
+        # Verificar se o usuário atual é uma universidade
+        if current_user_tag != 'universidade':
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Apenas universidades podem usar o convite em massa 'todos@dominio'."
+            )
+        
+        dominio_parte = email_usuario.split("@", 1)[1]  # ex: "uece.br"
+        return convidar_todos_do_dominio(db, evento, dominio_parte, detalhar)
+
     # 4. Buscar convidados já existentes para evitar duplicatas
     convidados_existentes = db.query(models.Convidado.id_usuario).filter(
         models.Convidado.id_evento == id_evento
@@ -868,71 +1030,46 @@ def adicionar_participante_evento(
     # 5. Determinar tipo de convite e buscar usuários
     usuarios_para_convidar = []
     
-    # CASO 1: todos@<dominio> - convida todos com esse domínio no email (APENAS UNIVERSIDADE)
-    if email_usuario.lower().startswith("todos@"):
+    # CASO 2: email de curso - convida todos alunos do curso (APENAS UNIVERSIDADE)
+    curso = db.query(models.Curso).filter(models.Curso.email == email_usuario).first()
+    
+    if curso:
         # Verificar se o usuário atual é uma universidade
         if current_user_tag != 'universidade':
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="Apenas universidades podem usar o convite em massa 'todos@dominio'."
+                detail="Apenas universidades podem convidar curso completo."
             )
-        
-        dominio_parte = email_usuario.split("@", 1)[1]  # ex: "uece.br"
-        
-        # Buscar todos emails que contenham o domínio completo (incluindo subdomínios)
-        # Exemplos: @uece.br, @aluno.uece.br, @prof.uece.br
-        usuarios_para_convidar = db.query(models.Usuario).filter(
-            models.Usuario.email.like(f'%@%.{dominio_parte}') | 
-            models.Usuario.email.like(f'%@{dominio_parte}')
+        # Buscar todos os alunos do curso e seus usuários
+        alunos = db.query(models.Aluno).filter(
+            models.Aluno.id_curso == curso.id
         ).all()
         
-        if not usuarios_para_convidar:
+        if not alunos:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Nenhum usuário encontrado com domínio '{dominio_parte}' no email."
+                detail=f"Curso '{curso.nome}' encontrado mas não possui alunos cadastrados."
             )
+        
+        # Buscar os usuários dos alunos
+        ids_usuarios_alunos = [aluno.id_usuario for aluno in alunos]
+        usuarios_para_convidar = db.query(models.Usuario).filter(
+            models.Usuario.id.in_(ids_usuarios_alunos)
+        ).all()
     
-    # CASO 2: email de curso - convida todos alunos do curso (APENAS UNIVERSIDADE)
+    # CASO 3: email individual
     else:
-        curso = db.query(models.Curso).filter(models.Curso.email == email_usuario).first()
+        usuario_individual = db.query(models.Usuario).filter(
+            models.Usuario.email == email_usuario
+        ).first()
         
-        if curso:
-            # Verificar se o usuário atual é uma universidade
-            if current_user_tag != 'universidade':
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Apenas universidades podem convidar curso completo."
-                )
-            # Buscar todos os alunos do curso e seus usuários
-            alunos = db.query(models.Aluno).filter(
-                models.Aluno.id_curso == curso.id
-            ).all()
-            
-            if not alunos:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"Curso '{curso.nome}' encontrado mas não possui alunos cadastrados."
-                )
-            
-            # Buscar os usuários dos alunos
-            ids_usuarios_alunos = [aluno.id_usuario for aluno in alunos]
-            usuarios_para_convidar = db.query(models.Usuario).filter(
-                models.Usuario.id.in_(ids_usuarios_alunos)
-            ).all()
+        if not usuario_individual:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Usuário não encontrado."
+            )
         
-        # CASO 3: email individual
-        else:
-            usuario_individual = db.query(models.Usuario).filter(
-                models.Usuario.email == email_usuario
-            ).first()
-            
-            if not usuario_individual:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Usuário não encontrado."
-                )
-            
-            usuarios_para_convidar = [usuario_individual]
+        usuarios_para_convidar = [usuario_individual]
     
     # 6. Filtrar usuários que já são convidados e preparar bulk insert
     novos_convidados = []
@@ -954,21 +1091,24 @@ def adicionar_participante_evento(
             )
     
     # 7. Inserir novos convidados em batch
+    usuarios_por_id = {usuario.id: usuario for usuario in usuarios_para_convidar}
     try:
         if novos_convidados:
             db.bulk_save_objects(novos_convidados)
+            service_agenda.adicionar_evento_agenda(
+                db, evento, [usuarios_por_id[convidado.id_usuario].email for convidado in novos_convidados]
+            )
             db.commit()
         
-        # Montar resposta
+        # Montar resposta (busca do usuário pelo id em O(1) por convidado)
         adicionados = []
         for convidado in novos_convidados:
-            usuario = next((u for u in usuarios_para_convidar if u.id == convidado.id_usuario), None)
-            if usuario:
-                adicionados.append({
-                    "id_usuario": usuario.id,
-                    "nome": usuario.nome,
-                    "email": usuario.email
-                })
+            usuario = usuarios_por_id[convidado.id_usuario]
+            adicionados.append({
+                "id_usuario": usuario.id,
+                "nome": usuario.nome,
+                "email": usuario.email
+            })
 
                 
         '''
@@ -978,13 +1118,18 @@ def adicionar_participante_evento(
         mandar_notificacao_evento_usuario_atual(db=db, novo_evento=evento, current_email=current_user_email,
                                     mensagem=f"{len(adicionados)} participante(s) adicionado(s) com sucesso.\ntotal adicionados: {len(adicionados)},\ntotal já existentes: {len(ja_convidados)}.")
         '''
-        return {
+        resposta = {
             "message": f"{len(adicionados)} participante(s) adicionado(s) com sucesso.",
             "total_adicionados": len(adicionados),
             "total_ja_existentes": len(ja_convidados),
-            "adicionados": adicionados,
-            "ja_existentes": ja_convidados
         }
+        # Convites grandes retornam só o resumo; a lista fica em GET /{id_evento}/participants (paginado)
+        if detalhar or len(usuarios_para_convidar) <= settings.CONVITE_LIMITE_DETALHES:
+            resposta["adicionados"] = adicionados
+            resposta["ja_existentes"] = ja_convidados
+        else:
+            resposta["resumo"] = True
+        return resposta
     
     except Exception as e:
         db.rollback()
@@ -995,6 +1140,77 @@ def adicionar_participante_evento(
 
 
 
+def _filtro_dominio(dominio: str):
+    """Usuários do domínio e de seus subdomínios (uece.br -> @uece.br, @aluno.uece.br, ...),
+    como prefixo em usuario.dominio_reverso (usa o índice, sem LIKE com curinga no início)."""
+    dominio_reverso = models.inverter_dominio(f"@{dominio}")
+    return or_(
+        models.Usuario.dominio_reverso == dominio_reverso,
+        models.Usuario.dominio_reverso.startswith(f"{dominio_reverso}.", autoescape=True)
+    )
+
+
+def convidar_todos_do_dominio(db: Session, evento: models.Evento, dominio: str, detalhar: bool = False) -> dict:
+    """
+    Convite em massa todos@<dominio>: um INSERT ... SELECT em convidado com os usuários do
+    domínio que ainda não são convidados (e outro na agenda), sem carregar usuários em Python.
+
+    Returns:
+        Totais de adicionados e já existentes; com `detalhar`, também as listas (id, nome, email).
+    """
+    filtro = _filtro_dominio(dominio)
+    ja_convidado = exists().where(
+        models.Convidado.id_evento == evento.id,
+        models.Convidado.id_usuario == models.Usuario.id
+    )
+
+    # 1. Contar os usuários do domínio (e, se pedido, listar quem já é convidado antes de inserir)
+    total = db.query(func.count(models.Usuario.id)).filter(filtro).scalar()
+    if not total:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Nenhum usuário encontrado com domínio '{dominio}' no email."
+        )
+    usuarios = None
+    if detalhar:
+        usuarios = db.query(
+            models.Usuario.id, models.Usuario.nome, models.Usuario.email, ja_convidado
+        ).filter(filtro).all()
+
+    # 2. Inserir os convidados que faltam e incluir o evento na agenda deles
+    try:
+        novos = select(literal(evento.id), models.Usuario.id).where(filtro, ~ja_convidado)
+        total_adicionados = db.execute(
+            insert(models.Convidado).from_select(["id_evento", "id_usuario"], novos)
+        ).rowcount
+        service_agenda.adicionar_evento_agenda_por_consulta(db, evento, select(models.Usuario.email).where(filtro))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao adicionar participantes: {str(e)}"
+        )
+
+    resposta = {
+        "message": f"{total_adicionados} participante(s) adicionado(s) com sucesso.",
+        "total_adicionados": total_adicionados,
+        "total_ja_existentes": total - total_adicionados,
+    }
+    if not detalhar:
+        resposta["resumo"] = True
+    else:
+        resposta["adicionados"] = [
+            {"id_usuario": id_usuario, "nome": nome, "email": email}
+            for id_usuario, nome, email, existente in usuarios if not existente
+        ]
+        resposta["ja_existentes"] = [
+            {"id_usuario": id_usuario, "nome": nome, "email": email}
+            for id_usuario, nome, email, existente in usuarios if existente
+        ]
+    return resposta
+
+
 def remover_participante_evento(
     db: Session,
     id_evento: int,
@@ -1017,8 +1233,11 @@ def remover_participante_evento(
         HTTPException: Se o evento não existir, se o usuário não for o proprietário,
                       ou se o convidado não estiver na lista
     """
-    # 1. Verificar se o evento existe
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
+    # 1. Verificar se o evento existe (eventos em exclusão em segundo plano não podem mais ser alterados)
+    evento = db.query(models.Evento).filter(
+        models.Evento.id == id_evento,
+        models.Evento.excluido_em.is_(None)
+    ).first()
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1065,6 +1284,7 @@ def remover_participante_evento(
     # 5. Remover o convidado
     try:
         db.delete(convidado)
+        service_agenda.remover_evento_agenda(db, id_evento, [usuario_convidado.email])
         db.commit()
         '''
         criar_notificacao(db=db,dados= models.Notificacao(
@@ -1087,13 +1307,15 @@ def remover_participante_evento(
         )
 
 
-def listar_participantes_evento(db: Session, id_evento: int):
+def listar_participantes_evento(db: Session, id_evento: int, limite: int | None = None, apos: int | None = None):
     """
-    Lista todos os participantes (convidados) de um evento.
+    Lista os participantes (convidados) de um evento, ordenados por id_convidado.
     
     Args:
         db: Sessão do banco de dados
         id_evento: ID do evento
+        limite: Tamanho da página (opcional; sem limite retorna todos)
+        apos: id_convidado do último item da página anterior (paginação por chave)
     
     Returns:
         Lista de convidados com informações do usuário
@@ -1102,28 +1324,62 @@ def listar_participantes_evento(db: Session, id_evento: int):
         HTTPException: Se o evento não existir
     """
     # 1. Verificar se o evento existe
-    evento = db.query(models.Evento).filter(models.Evento.id == id_evento).first()
+    evento = db.execute(select(models.Evento.id).where(
+        models.Evento.id == id_evento,
+        models.Evento.excluido_em.is_(None)
+    )).first()
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evento não encontrado."
         )
     
-    # 2. Buscar todos os convidados do evento com eager loading do usuário
-    convidados = db.query(models.Convidado).options(
-        joinedload(models.Convidado.usuario)
-    ).filter(
-        models.Convidado.id_evento == id_evento
-    ).all()
+    # 2. Buscar a página de convidados junto com os dados do usuário (apenas as colunas usadas)
+    consulta = db.execute(_consulta_participantes(id_evento, limite, apos))
     
     # 3. Formatar resposta com informações dos usuários
-    participantes = []
-    for convidado in convidados:
-        participantes.append({
-            "id_convidado": convidado.id,
-            "id_usuario": convidado.usuario.id,
-            "nome": convidado.usuario.nome,
-            "email": convidado.usuario.email
-        })
-    
-    return participantes
+    return _formatar_participantes(consulta)
+
+
+async def listar_participantes_evento_async(db: AsyncSession, id_evento: int, limite: int | None = None,
+                                            apos: int | None = None):
+    """Versão async (AsyncSession) de `listar_participantes_evento`."""
+    evento = (await db.execute(select(models.Evento.id).where(
+        models.Evento.id == id_evento,
+        models.Evento.excluido_em.is_(None)
+    ))).first()
+    if not evento:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evento não encontrado."
+        )
+    consulta = await db.execute(_consulta_participantes(id_evento, limite, apos))
+    return _formatar_participantes(consulta)
+
+
+def _consulta_participantes(id_evento: int, limite: int | None, apos: int | None):
+    consulta = select(
+        models.Convidado.id, models.Usuario.id, models.Usuario.nome, models.Usuario.email
+    ).join(
+        models.Usuario, models.Usuario.id == models.Convidado.id_usuario
+    ).where(
+        models.Convidado.id_evento == id_evento
+    )
+    if apos is not None:
+        consulta = consulta.where(models.Convidado.id > apos)
+    consulta = consulta.order_by(models.Convidado.id)
+    if limite is not None:
+        consulta = consulta.limit(limite)
+    return consulta
+
+
+def _formatar_participantes(linhas) -> list[dict]:
+    return [
+        {
+            "id_convidado": id_convidado,
+            "id_usuario": id_usuario,
+            "nome": nome,
+            "email": email
+        }
+        for id_convidado, id_usuario, nome, email in linhas
+    ]
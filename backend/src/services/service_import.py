@@ -0,0 +1,313 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from ..models import models
+from ..schemas import schema
+from ..schemas.jwt import TokenPayload
+from ..core.config import settings
+from ..core.constants import HORARIOS, DIAS_MAP, NUM_PARA_DIA
+from ..core.ttl_store import criar_armazenamento
+from ..database.connection import SessionLocal
+from ..database.bulk import inserir_em_lotes
+from .service_agenda import linha_agenda
+from .service_events import parse_horario
+import csv
+import io
+import threading
+import uuid
+
+# Importações em andamento neste worker por id -> estado (mesmo formato de
+# schema.ImportacaoResponse). O estado é publicado em `progresso_importacoes` ao iniciar, a
+# cada lote e ao terminar, e expira após PROGRESSO_RETENCAO_SEGUNDOS; com TTL_STORE_BACKEND
+# "sql", a consulta de progresso funciona em qualquer worker, não só no que executa a importação.
+importacoes = {}
+_importacoes_lock = threading.Lock()
+progresso_importacoes = criar_armazenamento("importacao")
+
+
+def _publicar_importacao(estado: dict):
+    progresso_importacoes.definir(estado["id_importacao"], estado, settings.PROGRESSO_RETENCAO_SEGUNDOS)
+
+
+def _concluir_importacao(estado: dict):
+    # Primeiro no armazenamento compartilhado, depois fora do dict: a consulta sempre encontra o estado
+    _publicar_importacao(estado)
+    with _importacoes_lock:
+        importacoes.pop(estado["id_importacao"], None)
+
+
+def ler_csv_disciplinas(conteudo: bytes) -> list[dict]:
+    """Converte o CSV enviado (cabeçalho com os campos de DisciplinaImportItem) em lista de dicts.
+    Células vazias viram None para que os campos opcionais sejam aceitos."""
+    try:
+        texto = conteudo.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O CSV deve estar em UTF-8.")
+
+    leitor = csv.DictReader(io.StringIO(texto))
+    return [
+        {chave.strip(): (valor.strip() or None) if isinstance(valor, str) else valor
+         for chave, valor in linha.items() if chave}
+        for linha in leitor
+    ]
+
+
+def _validar_horario(horario: str) -> dict:
+    """Valida e interpreta o horário da disciplina ("24-AB-manha"). Lança ValueError se inválido."""
+    try:
+        info = parse_horario(horario)
+    except ValueError:
+        raise ValueError(f"Horário '{horario}' fora do formato <dias>-<blocos>-<turno> (ex: 24-AB-manha).")
+
+    turno = info["turno"]
+    if turno not in HORARIOS:
+        raise ValueError(f"Turno inválido em '{horario}': use {', '.join(HORARIOS)}.")
+    if not info["dias_semana"] or any(dia not in DIAS_MAP for dia in info["dias_semana"]):
+        raise ValueError(f"Dias inválidos em '{horario}': use dígitos de 2 (segunda) a 7 (sábado).")
+    if len(set(info["dias_semana"])) != len(info["dias_semana"]):
+        raise ValueError(f"Dias repetidos em '{horario}'.")
+    if not info["blocos"] or any(bloco not in HORARIOS[turno] for bloco in info["blocos"]):
+        raise ValueError(f"Blocos inválidos em '{horario}' para o turno {turno}.")
+
+    info["dias_semana_regra"] = "".join(sorted(str(DIAS_MAP[dia]) for dia in info["dias_semana"]))
+    info["dias_nomes"] = [NUM_PARA_DIA[dia] for dia in info["dias_semana"]]
+    return info
+
+
+def iniciar_importacao_disciplinas(db: Session, linhas: list[dict], current_user: TokenPayload) -> tuple[dict, list[dict]]:
+    """
+    Valida todas as linhas de uma vez e registra a importação.
+
+    As referências (universidades, professores e cursos) são resolvidas com uma consulta
+    IN cada, e cada horário distinto é interpretado uma única vez.
+
+    Returns:
+        (estado da importação, linhas válidas prontas para `executar_importacao_disciplinas`)
+    """
+    email_proprietario = current_user.sub
+    if current_user.tag == "aluno":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuários alunos não podem criar eventos do tipo Disciplina."
+        )
+    if not linhas:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhuma disciplina para importar.")
+
+    # 1. Identificar a universidade/professor de quem está importando
+    proprietario_universidade = current_user.tag == "universidade"
+    id_universidade_padrao = None
+    id_professor_padrao = None
+    # (com as claims uid/role do token, pela chave primária, sem passar pelo email)
+    if proprietario_universidade:
+        if current_user.uid is not None and current_user.role == "universidade":
+            id_universidade_padrao = current_user.uid
+        else:
+            universidade = db.query(models.Universidade).filter(models.Universidade.email == email_proprietario).first()
+            id_universidade_padrao = universidade.id if universidade else None
+    else:
+        if current_user.uid is not None and current_user.role == "usuario":
+            professor = db.get(models.Professor, current_user.uid)
+        else:
+            professor = db.query(models.Professor).join(models.Usuario).filter(
+                models.Usuario.email == email_proprietario
+            ).first()
+        if professor:
+            id_professor_padrao = professor.id_usuario
+            id_universidade_padrao = professor.id_universidade
+
+    # 2. Validar formato de cada linha
+    erros = []
+    itens = []
+    for numero, linha in enumerate(linhas, start=1):
+        try:
+            itens.append((numero, schema.DisciplinaImportItem.model_validate(linha)))
+        except ValidationError as e:
+            mensagens = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+            erros.append({"linha": numero, "erro": mensagens})
+
+    # 3. Resolver referências em lote
+    emails_professores = {item.email_professor for _, item in itens if item.email_professor}
+    professores = {}
+    if emails_professores:
+        professores = dict(db.query(models.Usuario.email, models.Professor.id_usuario).join(
+            models.Professor, models.Professor.id_usuario == models.Usuario.id
+        ).filter(models.Usuario.email.in_(emails_professores)).all())
+
+    ids_universidades = {item.id_universidade for _, item in itens if item.id_universidade is not None}
+    if id_universidade_padrao is not None:
+        ids_universidades.add(id_universidade_padrao)
+    universidades_existentes = set()
+    if ids_universidades:
+        universidades_existentes = set(db.scalars(
+            select(models.Universidade.id).where(models.Universidade.id.in_(ids_universidades))
+        ))
+
+    ids_cursos = {item.id_curso for _, item in itens if item.id_curso is not None}
+    cursos_existentes = set()
+    if ids_cursos:
+        cursos_existentes = {id_curso for (id_curso,) in db.query(models.Curso.id).filter(models.Curso.id.in_(ids_cursos)).all()}
+
+    # 4. Validar regras de negócio, interpretando cada horário distinto uma única vez
+    horarios = {}
+    validas = []
+    for numero, item in itens:
+        try:
+            if item.data_termino < item.data_inicio:
+                raise ValueError("A data de término deve ser posterior ou igual à data de início.")
+            if item.horario not in horarios:
+                try:
+                    horarios[item.horario] = _validar_horario(item.horario)
+                except ValueError as e:
+                    horarios[item.horario] = e
+            info = horarios[item.horario]
+            if isinstance(info, ValueError):
+                raise info
+
+            id_universidade = item.id_universidade or id_universidade_padrao
+            if id_universidade is None:
+                raise ValueError("id_universidade não informado.")
+            if id_universidade not in universidades_existentes:
+                raise ValueError(f"Universidade {id_universidade} não encontrada.")
+            # Universidades e professores só importam para a própria universidade
+            if id_universidade != id_universidade_padrao:
+                raise ValueError(f"Sem permissão para importar disciplinas na universidade {id_universidade}.")
+
+            id_professor = id_professor_padrao
+            email_professor = email_proprietario if id_professor_padrao is not None else None
+            if item.email_professor:
+                if item.email_professor not in professores:
+                    raise ValueError(f"Professor '{item.email_professor}' não encontrado.")
+                id_professor = professores[item.email_professor]
+                email_professor = item.email_professor
+
+            if item.id_curso is not None and item.id_curso not in cursos_existentes:
+                raise ValueError(f"Curso {item.id_curso} não encontrado.")
+        except ValueError as e:
+            erros.append({"linha": numero, "erro": str(e)})
+            continue
+
+        validas.append({
+            "linha": numero,
+            "item": item,
+            "horario": info,
+            "id_universidade": id_universidade,
+            "id_professor": id_professor,
+            "email_professor": email_professor,
+        })
+
+    erros.sort(key=lambda erro: erro["linha"])
+    estado = {
+        "id_importacao": str(uuid.uuid4()),
+        "status": "processando" if validas else "concluida",
+        "total": len(linhas),
+        "validas": len(validas),
+        "processadas": 0,
+        "importadas": 0,
+        "erros": erros,
+        "email_proprietario": email_proprietario,
+        "proprietario_universidade": proprietario_universidade,
+    }
+    if validas:
+        with _importacoes_lock:
+            importacoes[estado["id_importacao"]] = estado
+        _publicar_importacao(estado)
+    else:
+        _concluir_importacao(estado)
+    return estado, validas
+
+
+def executar_importacao_disciplinas(id_importacao: str, validas: list[dict]):
+    """
+    Persiste as linhas válidas em lotes (executado em segundo plano, com sessão própria).
+
+    Cada lote grava os eventos pelo ORM (os ids gerados são necessários como chave da
+    disciplina) e disciplina, disciplina_dias, curso_disciplina, convidado e agenda_usuario
+    com INSERTs multi-valores. Cada lote é uma transação: se falhar, apenas suas linhas viram erro.
+    """
+    estado = importacoes[id_importacao]
+    email_proprietario = estado["email_proprietario"]
+    tamanho_lote = settings.BULK_INSERT_CHUNK_SIZE
+    db = SessionLocal()
+    try:
+        for inicio in range(0, len(validas), tamanho_lote):
+            lote = validas[inicio:inicio + tamanho_lote]
+            try:
+                eventos = [
+                    models.Evento(
+                        id_universidade=linha["id_universidade"],
+                        nome=linha["item"].nome,
+                        descricao=linha["item"].descricao,
+                        data_inicio=linha["item"].data_inicio,
+                        data_termino=linha["item"].data_termino,
+                        recorrencia="semanal",
+                        local_padrao=linha["item"].local_padrao,
+                        categoria="Disciplina",
+                        email_proprietario=email_proprietario,
+                        dias_semana=linha["horario"]["dias_semana_regra"],
+                    )
+                    for linha in lote
+                ]
+                db.add_all(eventos)
+                db.flush()
+
+                inserir_em_lotes(db, models.Disciplina, (
+                    {"id_evento": evento.id, "id_professor": linha["id_professor"],
+                     "horario": linha["item"].horario, "nome": linha["item"].nome}
+                    for evento, linha in zip(eventos, lote)
+                ))
+                inserir_em_lotes(db, models.DisciplinaDias, (
+                    {"id_disciplina": evento.id, "dia": dia}
+                    for evento, linha in zip(eventos, lote)
+                    for dia in linha["horario"]["dias_nomes"]
+                ))
+                inserir_em_lotes(db, models.CursoDisciplina, (
+                    {"id_curso": linha["item"].id_curso, "id_disciplina": evento.id, "creditos": linha["item"].creditos}
+                    for evento, linha in zip(eventos, lote)
+                    if linha["item"].id_curso is not None
+                ))
+                # O professor responsável passa a ver a disciplina na agenda
+                inserir_em_lotes(db, models.Convidado, (
+                    {"id_evento": evento.id, "id_usuario": linha["id_professor"]}
+                    for evento, linha in zip(eventos, lote)
+                    if linha["id_professor"] is not None
+                ))
+                # Agenda: professor convidado e, se for o caso, a universidade proprietária
+                inserir_em_lotes(db, models.AgendaUsuario, (
+                    linha_agenda(evento, email, linha["item"].horario, linha["horario"]["dias_nomes"])
+                    for evento, linha in zip(eventos, lote)
+                    for email in _emails_agenda(linha, estado)
+                ))
+                db.commit()
+                estado["importadas"] += len(lote)
+            except Exception as e:
+                db.rollback()
+                estado["erros"].extend(
+                    {"linha": linha["linha"], "erro": f"Erro ao persistir disciplina: {str(e)}"} for linha in lote
+                )
+            estado["processadas"] += len(lote)
+            db.expunge_all()
+            _publicar_importacao(estado)
+        estado["status"] = "concluida"
+    except Exception as e:
+        estado["status"] = "falhou"
+        estado["erros"].append({"linha": 0, "erro": f"Falha na importação: {str(e)}"})
+    finally:
+        db.close()
+        _concluir_importacao(estado)
+
+
+def _emails_agenda(linha: dict, estado: dict) -> list[str]:
+    emails = []
+    if linha["id_professor"] is not None:
+        emails.append(linha["email_professor"])
+    if estado["proprietario_universidade"]:
+        emails.append(estado["email_proprietario"])
+    return emails
+
+
+def pegar_importacao(id_importacao: str, current_user: TokenPayload) -> dict:
+    estado = importacoes.get(id_importacao) or progresso_importacoes.pegar(id_importacao)
+    if not estado or estado["email_proprietario"] != current_user.sub:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Importação não encontrada.")
+    return estado
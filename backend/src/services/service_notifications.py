@@ -1,9 +1,27 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, and_, or_, func
 from fastapi import HTTPException, status
 from ..models import models
 from ..schemas import schema
+from ..core.config import settings
+from ..database.bulk import inserir_em_lotes
+from ..core.broker import broker
+from ..schemas.jwt import TokenPayload
+from types import SimpleNamespace
 from typing import List
 from datetime import datetime
+import heapq
+import base64
+import binascii
+
+
+def _publicar(ids_usuarios, dados: dict):
+    """Envia a notificação às conexões em tempo real. Chamado depois do commit; uma falha no
+    broker não desfaz a notificação já gravada (o cliente a vê na próxima listagem)."""
+    try:
+        broker.publicar(ids_usuarios, {"tipo": "notificacao", "dados": dados})
+    except Exception as e:
+        print(f"Falha ao publicar notificação em tempo real: {e}")
 
 
 def criar_notificacao(db: Session, dados: schema.NotificacaoCreate):
@@ -23,6 +41,7 @@ def criar_notificacao(db: Session, dados: schema.NotificacaoCreate):
         db.add(nova)
         db.commit()
         db.refresh(nova)
+        _publicar([nova.id_usuario], schema.NotificacaoResponse.model_validate(nova).model_dump(mode="json"))
         return nova
 
     except HTTPException:
@@ -36,9 +55,101 @@ def criar_notificacao(db: Session, dados: schema.NotificacaoCreate):
         )
 
 
-def listar_notificacoes_por_usuario(db: Session, id_usuario: int) -> List[models.Notificacao]:
+# Ordem da caixa de entrada (decrescente) e chave do cursor: (data, origem, id). Notificações
+# pessoais e broadcasts têm ids independentes; `origem` desempata as duas fontes na mesma data.
+_ORIGEM_BROADCAST, _ORIGEM_PESSOAL = 0, 1
+
+
+def codificar_cursor_notificacao(chave: tuple) -> str:
+    data, origem, id_item = chave
+    return base64.urlsafe_b64encode(f"{data.isoformat()}|{origem}|{id_item}".encode()).decode()
+
+
+def decodificar_cursor_notificacao(cursor: str) -> tuple:
     try:
-        return db.query(models.Notificacao).filter(models.Notificacao.id_usuario == id_usuario).all()
+        data, origem, id_item = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(data), int(origem), int(id_item))
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido.")
+
+
+def _apos_cursor(modelo, origem: int, apos: tuple):
+    """Condição keyset: linhas de `modelo` (fonte `origem`) que vêm depois de `apos` na ordem decrescente."""
+    data, origem_cursor, id_cursor = apos
+    if origem < origem_cursor:
+        return modelo.data <= data
+    if origem > origem_cursor:
+        return modelo.data < data
+    return or_(modelo.data < data, and_(modelo.data == data, modelo.id < id_cursor))
+
+
+def _leitura_usuario(db: Session, id_usuario: int):
+    """Domínio e cursor de leitura de broadcasts do usuário em uma consulta (None se não existir)."""
+    return db.execute(
+        select(models.Usuario.dominio_reverso, models.LeituraBroadcast.ultimo_id_lido)
+        .outerjoin(models.LeituraBroadcast, models.LeituraBroadcast.id_usuario == models.Usuario.id)
+        .where(models.Usuario.id == id_usuario)
+    ).first()
+
+
+def listar_notificacoes_por_usuario(db: Session, id_usuario: int, limite: int | None = None,
+                                    cursor: str | None = None) -> tuple[list, str | None]:
+    """
+    Notificações pessoais do usuário junto com os broadcasts que o atingem (evento em que é
+    convidado, seu curso ou seu domínio de email), da mais recente para a mais antiga.
+
+    Paginação keyset por (data, id): cada fonte é lida já ordenada a partir do cursor pelo
+    índice (id_usuario, data, id), com no máximo `limite` + 1 linhas, e as duas são
+    intercaladas. Broadcasts trazem `broadcast=True` e `lida` conforme o cursor de leitura.
+
+    Returns:
+        (notificações da página, cursor da próxima página ou None se não houver mais)
+    """
+    apos = decodificar_cursor_notificacao(cursor) if cursor else None
+    try:
+        notificacao = models.Notificacao
+        pessoais = select(notificacao).where(notificacao.id_usuario == id_usuario)
+        if apos is not None:
+            pessoais = pessoais.where(_apos_cursor(notificacao, _ORIGEM_PESSOAL, apos))
+        pessoais = pessoais.order_by(notificacao.data.desc(), notificacao.id.desc())
+        if limite is not None:
+            pessoais = pessoais.limit(limite + 1)
+        fontes = [(
+            ((item.data, _ORIGEM_PESSOAL, item.id), item) for item in db.scalars(pessoais)
+        )]
+
+        usuario = _leitura_usuario(db, id_usuario)
+        if usuario is not None:
+            ultimo_id_lido = usuario.ultimo_id_lido or 0
+            broadcast = models.NotificacaoBroadcast
+            broadcasts = select(broadcast).where(_filtro_broadcasts_usuario(id_usuario, usuario.dominio_reverso))
+            if apos is not None:
+                broadcasts = broadcasts.where(_apos_cursor(broadcast, _ORIGEM_BROADCAST, apos))
+            broadcasts = broadcasts.order_by(broadcast.data.desc(), broadcast.id.desc())
+            if limite is not None:
+                broadcasts = broadcasts.limit(limite + 1)
+            fontes.append((
+                (item.data, _ORIGEM_BROADCAST, item.id),
+                SimpleNamespace(
+                    id=item.id,
+                    id_usuario=id_usuario,
+                    data=item.data,
+                    evento=item.evento,
+                    mensagem=item.mensagem,
+                    broadcast=True,
+                    lida=item.id <= ultimo_id_lido
+                )
+            ) for item in db.scalars(broadcasts))
+
+        resultado = []
+        ultima_chave = None
+        for chave, item in heapq.merge(*fontes, key=lambda par: par[0], reverse=True):
+            if limite is not None and len(resultado) == limite:
+                # Existe pelo menos mais uma notificação: a próxima página começa após a última entregue
+                return resultado, codificar_cursor_notificacao(ultima_chave)
+            resultado.append(item)
+            ultima_chave = chave
+        return resultado, None
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -46,19 +157,224 @@ def listar_notificacoes_por_usuario(db: Session, id_usuario: int) -> List[models
         )
 
 
-def deletar_notificacao(db: Session, id_notificacao: int):
+def contar_nao_lidas(db: Session, id_usuario: int) -> dict:
+    """
+    Total de notificações não lidas do usuário (pessoais com lida = false e broadcasts acima do
+    cursor de leitura), só com COUNTs pelos índices, sem carregar a caixa de entrada.
+    """
+    usuario = _leitura_usuario(db, id_usuario)
+    if usuario is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado.")
     try:
-        notif = db.query(models.Notificacao).filter(models.Notificacao.id == id_notificacao).first()
-        if not notif:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notificação não encontrada.")
+        pessoais = db.scalar(
+            select(func.count()).select_from(models.Notificacao).where(
+                models.Notificacao.id_usuario == id_usuario,
+                models.Notificacao.lida.is_(False)
+            )
+        )
+        broadcasts = db.scalar(
+            select(func.count()).select_from(models.NotificacaoBroadcast).where(
+                _filtro_broadcasts_usuario(id_usuario, usuario.dominio_reverso),
+                models.NotificacaoBroadcast.id > (usuario.ultimo_id_lido or 0)
+            )
+        )
+        return {"id_usuario": id_usuario, "nao_lidas": pessoais + broadcasts}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Falha ao contar notificações não lidas: {str(e)}",
+        )
 
-        db.delete(notif)
+
+def _prefixos_dominio(dominio_reverso: str | None) -> list[str]:
+    # 'br.uece.aluno' -> ['br', 'br.uece', 'br.uece.aluno']: broadcasts para o domínio e seus pais
+    if not dominio_reverso:
+        return []
+    partes = dominio_reverso.split(".")
+    return [".".join(partes[:i]) for i in range(1, len(partes) + 1)]
+
+
+def _filtro_broadcasts_usuario(id_usuario: int, dominio_reverso: str | None):
+    """Broadcasts que atingem o usuário; cada ramo usa um dos índices (alvo_tipo, ...)."""
+    broadcast = models.NotificacaoBroadcast
+    condicoes = [
+        and_(broadcast.alvo_tipo == "evento", broadcast.alvo_id.in_(
+            select(models.Convidado.id_evento).where(models.Convidado.id_usuario == id_usuario)
+        )),
+        and_(broadcast.alvo_tipo == "curso", broadcast.alvo_id.in_(
+            select(models.Aluno.id_curso).where(models.Aluno.id_usuario == id_usuario)
+        )),
+    ]
+    prefixos = _prefixos_dominio(dominio_reverso)
+    if prefixos:
+        condicoes.append(and_(broadcast.alvo_tipo == "dominio", broadcast.alvo_dominio.in_(prefixos)))
+    return or_(*condicoes)
+
+
+def criar_broadcast(db: Session, dados: schema.NotificacaoBroadcastCreate, current_user: TokenPayload) -> models.NotificacaoBroadcast:
+    """
+    Grava um aviso uma única vez para todo o público (evento, curso ou domínio).
+
+    Mesmas regras dos convites em massa: avisos a um evento só pelo proprietário do evento;
+    a um curso ou a um domínio (e seus subdomínios) só pela universidade dona do curso/domínio.
+    """
+    if current_user.tag == "aluno":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Alunos não podem enviar avisos em massa.")
+    if dados.alvo_tipo in ("curso", "dominio") and current_user.tag != "universidade":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Apenas universidades podem enviar avisos a um curso ou domínio."
+        )
+
+    alvo_dominio = None
+    if dados.alvo_tipo == "dominio":
+        dominio = (dados.dominio or "").strip().lstrip("@").removeprefix("todos@")
+        alvo_dominio = models.inverter_dominio(f"@{dominio}") if dominio else None
+        if not alvo_dominio:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe o domínio (ex: 'uece.br').")
+        # O domínio do aviso deve ser o da universidade ou um subdomínio dele
+        dominio_universidade = models.inverter_dominio(current_user.sub)
+        if not dominio_universidade or not (
+            alvo_dominio == dominio_universidade or alvo_dominio.startswith(f"{dominio_universidade}.")
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Universidades só podem enviar avisos ao próprio domínio."
+            )
+    else:
+        if dados.alvo_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe alvo_id (id do evento ou do curso).")
+        if dados.alvo_tipo == "evento":
+            dono = db.execute(
+                select(models.Evento.email_proprietario).where(
+                    models.Evento.id == dados.alvo_id,
+                    models.Evento.excluido_em.is_(None)
+                )
+            ).first()
+            negado = "Apenas o proprietário do evento pode enviar avisos aos convidados."
+        else:
+            dono = db.execute(
+                select(models.Universidade.email)
+                .select_from(models.Curso)
+                .outerjoin(models.Universidade, models.Universidade.id == models.Curso.id_universidade)
+                .where(models.Curso.id == dados.alvo_id)
+            ).first()
+            negado = "Apenas a universidade do curso pode enviar avisos aos seus alunos."
+        if dono is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{dados.alvo_tipo.capitalize()} não encontrado.")
+        if dono[0] != current_user.sub:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=negado)
+
+    try:
+        novo = models.NotificacaoBroadcast(
+            data=datetime.now(),
+            mensagem=dados.mensagem,
+            evento=dados.evento if dados.evento is not None else (
+                str(dados.alvo_id) if dados.alvo_tipo == "evento" else None
+            ),
+            alvo_tipo=dados.alvo_tipo,
+            alvo_id=dados.alvo_id if dados.alvo_tipo != "dominio" else None,
+            alvo_dominio=alvo_dominio,
+            email_autor=current_user.sub
+        )
+        db.add(novo)
         db.commit()
-        return {"detail": "Notificação removida."}
+        db.refresh(novo)
+        return novo
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Falha ao criar aviso: {str(e)}",
+        )
 
+
+def _avancar_cursor_leitura(db: Session, id_usuario: int, ate_id: int) -> int:
+    """Move o cursor de leitura de broadcasts para `ate_id` (nunca para trás). Não faz commit.
+    Retorna o valor do cursor."""
+    atualizadas = db.query(models.LeituraBroadcast).filter(
+        models.LeituraBroadcast.id_usuario == id_usuario,
+        models.LeituraBroadcast.ultimo_id_lido < ate_id
+    ).update({models.LeituraBroadcast.ultimo_id_lido: ate_id}, synchronize_session=False)
+    if not atualizadas and db.get(models.LeituraBroadcast, id_usuario) is None:
+        if db.scalar(select(models.Usuario.id).where(models.Usuario.id == id_usuario)) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado.")
+        db.add(models.LeituraBroadcast(id_usuario=id_usuario, ultimo_id_lido=ate_id))
+        db.flush()
+    return db.scalar(
+        select(models.LeituraBroadcast.ultimo_id_lido).where(models.LeituraBroadcast.id_usuario == id_usuario)
+    )
+
+
+def marcar_broadcasts_lidos(db: Session, id_usuario: int, ate_id: int) -> dict:
+    """Avança o cursor de leitura do usuário: broadcasts com id <= ate_id passam a lidos."""
+    try:
+        ultimo_id_lido = _avancar_cursor_leitura(db, id_usuario, ate_id)
+        db.commit()
+        return {"id_usuario": id_usuario, "ultimo_id_lido": ultimo_id_lido}
     except HTTPException:
         db.rollback()
         raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Falha ao marcar avisos como lidos: {str(e)}",
+        )
+
+
+def pegar_notificacao(db: Session, id_notificacao: int) -> models.Notificacao:
+    notif = db.query(models.Notificacao).filter(models.Notificacao.id == id_notificacao).first()
+    if not notif:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notificação não encontrada.")
+    return notif
+
+
+def marcar_notificacao_lida(db: Session, notif: models.Notificacao):
+    """Marca como lida uma notificação pessoal (o dono já foi verificado pelo endpoint)."""
+    try:
+        notif.lida = True
+        db.commit()
+        db.refresh(notif)
+        return notif
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Falha ao marcar notificação como lida: {str(e)}",
+        )
+
+
+def marcar_todas_lidas(db: Session, id_usuario: int) -> dict:
+    """Marca como lidas todas as notificações pessoais do usuário e todos os broadcasts existentes."""
+    try:
+        ultimo_broadcast = db.scalar(select(func.max(models.NotificacaoBroadcast.id))) or 0
+        _avancar_cursor_leitura(db, id_usuario, ultimo_broadcast)
+        marcadas = db.query(models.Notificacao).filter(
+            models.Notificacao.id_usuario == id_usuario,
+            models.Notificacao.lida.is_(False)
+        ).update({models.Notificacao.lida: True}, synchronize_session=False)
+        db.commit()
+        return {"detail": f"{marcadas} notificações marcadas como lidas."}
+    except HTTPException:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Falha ao marcar notificações como lidas: {str(e)}",
+        )
+
+
+def deletar_notificacao(db: Session, notif: models.Notificacao):
+    """Remove uma notificação pessoal (o dono já foi verificado pelo endpoint)."""
+    try:
+        db.delete(notif)
+        db.commit()
+        return {"detail": "Notificação removida."}
+
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -67,24 +383,55 @@ def deletar_notificacao(db: Session, id_notificacao: int):
         )
 
 
+def limpar_notificacoes_usuario(db: Session, id_usuario: int, apenas_lidas: bool = False) -> dict:
+    """Remove todas as notificações pessoais do usuário (ou só as lidas) com um único DELETE.
+    Broadcasts são compartilhados e não são removidos; marque-os como lidos."""
+    try:
+        condicoes = [models.Notificacao.id_usuario == id_usuario]
+        if apenas_lidas:
+            condicoes.append(models.Notificacao.lida.is_(True))
+        removidas = db.execute(delete(models.Notificacao).where(*condicoes)).rowcount
+        db.commit()
+        return {"detail": f"{removidas} notificações removidas."}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Falha ao limpar notificações: {str(e)}",
+        )
+
+
+def _linhas_notificacao(ids_usuarios, mensagem: str, id_evento: int, data: datetime):
+    for id_usuario in ids_usuarios:
+        yield {"id_usuario": id_usuario, "data": data, "mensagem": mensagem, "evento": str(id_evento)}
+
+
 def notificar_usuarios_em_massa(db: Session, ids_usuarios: List[int], mensagem: str, id_evento: int):
-    """Cria notificações para múltiplos usuários."""
+    """Cria notificações para múltiplos usuários.
+
+    Os ids são validados com uma consulta IN por lote (ids inexistentes são ignorados) e as
+    notificações gravadas com INSERT multi-valores em lotes (`inserir_em_lotes`), sem um
+    SELECT e um objeto ORM por usuário.
+    """
     try:
-        for id_usuario in ids_usuarios:
-            usuario = db.query(models.Usuario).filter(models.Usuario.id == id_usuario).first()
-            if usuario:
-                nova_notif = models.Notificacao(
-                    id_usuario=id_usuario,
-                    data=datetime.now(),
-                    mensagem=mensagem,
-                    evento=str(id_evento)
-                )
-                db.add(nova_notif)
+        ids_pedidos = list(dict.fromkeys(ids_usuarios))
+        tamanho_lote = settings.BULK_INSERT_CHUNK_SIZE
+        existentes = []
+        for inicio in range(0, len(ids_pedidos), tamanho_lote):
+            lote = ids_pedidos[inicio:inicio + tamanho_lote]
+            existentes.extend(db.scalars(select(models.Usuario.id).where(models.Usuario.id.in_(lote))))
+
+        data = datetime.now()
+        total = inserir_em_lotes(db, models.Notificacao, _linhas_notificacao(existentes, mensagem, id_evento, data))
         db.commit()
-        return {"detail": f"Notificações enviadas para {len(ids_usuarios)} usuários."}
+        # Uma única mensagem para todos os destinatários (sem o id de cada linha inserida)
+        _publicar(existentes, {"data": data.isoformat(), "mensagem": mensagem, "evento": str(id_evento),
+                               "broadcast": False, "lida": False})
+        return {"detail": f"Notificações enviadas para {total} usuários."}
     except Exception as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Falha ao enviar notificações em massa: {str(e)}",
         )
+
@@ -0,0 +1,91 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, func, and_, or_
+from datetime import datetime, timedelta
+import asyncio
+from ..models import models
+from ..core.config import settings
+from ..database.connection import SessionLocal
+
+# Retenção de notificações: job periódico (iniciado no lifespan) que remove as notificações
+# pessoais mais antigas que NOTIFICACOES_RETENCAO_DIAS, as que passam das
+# NOTIFICACOES_MAX_POR_USUARIO mais recentes de cada usuário e os broadcasts vencidos.
+# Tudo em lotes de BULK_DELETE_CHUNK_SIZE linhas, um commit por lote, como a exclusão de eventos.
+
+# Resultado da última execução (GET /health/retencao)
+ultima_execucao = {}
+
+
+def _remover_em_lotes(db: Session, modelo, condicao) -> int:
+    tamanho_lote = settings.BULK_DELETE_CHUNK_SIZE
+    total = 0
+    while True:
+        ids = list(db.scalars(select(modelo.id).where(condicao).limit(tamanho_lote)))
+        if not ids:
+            break
+        db.execute(delete(modelo).where(modelo.id.in_(ids)))
+        db.commit()
+        total += len(ids)
+        if len(ids) < tamanho_lote:
+            break
+    return total
+
+
+def _remover_excedentes_usuario(db: Session, id_usuario: int, maximo: int) -> int:
+    """Mantém só as `maximo` notificações mais recentes do usuário (ordem da caixa de entrada)."""
+    notificacao = models.Notificacao
+    # Primeira notificação fora do limite, pelo índice (id_usuario, data, id)
+    corte = db.execute(
+        select(notificacao.data, notificacao.id)
+        .where(notificacao.id_usuario == id_usuario)
+        .order_by(notificacao.data.desc(), notificacao.id.desc())
+        .offset(maximo).limit(1)
+    ).first()
+    if corte is None:
+        return 0
+    return _remover_em_lotes(db, notificacao, and_(
+        notificacao.id_usuario == id_usuario,
+        or_(notificacao.data < corte.data, and_(notificacao.data == corte.data, notificacao.id <= corte.id))
+    ))
+
+
+def aplicar_retencao() -> dict:
+    """Executa as regras de retenção uma vez, com sessão própria. Retorna os totais removidos."""
+    removidas = {"por_idade": 0, "por_limite": 0, "broadcasts": 0}
+    db = SessionLocal()
+    try:
+        if settings.NOTIFICACOES_RETENCAO_DIAS > 0:
+            limite = datetime.now() - timedelta(days=settings.NOTIFICACOES_RETENCAO_DIAS)
+            removidas["por_idade"] = _remover_em_lotes(db, models.Notificacao, models.Notificacao.data < limite)
+            removidas["broadcasts"] = _remover_em_lotes(
+                db, models.NotificacaoBroadcast, models.NotificacaoBroadcast.data < limite
+            )
+
+        maximo = settings.NOTIFICACOES_MAX_POR_USUARIO
+        if maximo > 0:
+            acima_do_limite = list(db.scalars(
+                select(models.Notificacao.id_usuario)
+                .group_by(models.Notificacao.id_usuario)
+                .having(func.count() > maximo)
+            ))
+            for id_usuario in acima_do_limite:
+                removidas["por_limite"] += _remover_excedentes_usuario(db, id_usuario, maximo)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    ultima_execucao.clear()
+    ultima_execucao.update({"executada_em": datetime.now().isoformat(), "removidas": removidas})
+    return removidas
+
+
+async def executar_retencao_periodica():
+    """Laço do job: aplica a retenção a cada NOTIFICACOES_RETENCAO_INTERVALO segundos (numa
+    thread, para não bloquear o event loop com as consultas síncronas)."""
+    while True:
+        try:
+            await asyncio.to_thread(aplicar_retencao)
+        except Exception as e:
+            print(f"Erro na retenção de notificações: {e}")
+        await asyncio.sleep(settings.NOTIFICACOES_RETENCAO_INTERVALO)
@@ -0,0 +1,106 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.core import security
+from src.core.config import settings
+
+
+class Relogio:
+    # Substitui time.time do módulo para controlar a validade das entradas do cache
+    def __init__(self):
+        self.agora = time.time()
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(security.time, "time", relogio)
+    return relogio
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio(monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_CACHE_MAX", 2)
+    monkeypatch.setattr(settings, "TOKEN_CACHE_TTL", 300)
+    security._cache_tokens.clear()
+    security.metricas_cache_tokens.update(hits=0, misses=0)
+    yield
+    security._cache_tokens.clear()
+
+
+def token(email: str, expira_em: timedelta | None = None) -> str:
+    return security.create_access_token(email, expires_delta=expira_em, uid=1, role="usuario")
+
+
+def test_segunda_decodificacao_vem_do_cache(relogio):
+    t = token("a@x.br")
+    primeiro = security.decode_token_cache(t)
+    segundo = security.decode_token_cache(t)
+
+    assert primeiro == segundo == security.decode_token(t)
+    assert security.metricas_cache_tokens == {"hits": 1, "misses": 1}
+
+
+def test_alterar_payload_nao_altera_o_cache(relogio):
+    t = token("a@x.br")
+    payload = security.decode_token_cache(t)
+    payload.sub = "outro@x.br"
+    security.decode_token_cache(t).uid = 99
+
+    novo = security.decode_token_cache(t)
+    assert novo.sub == "a@x.br"
+    assert novo.uid == 1
+
+
+def test_lru_descarta_o_menos_usado(relogio):
+    a, b, c = token("a@x.br"), token("b@x.br"), token("c@x.br")
+    security.decode_token_cache(a)
+    security.decode_token_cache(b)
+    security.decode_token_cache(a)  # a passa a ser o mais recente
+    security.decode_token_cache(c)  # b sai
+
+    assert len(security._cache_tokens) == 2
+    security.metricas_cache_tokens.update(hits=0, misses=0)
+    security.decode_token_cache(a)
+    security.decode_token_cache(b)
+    assert security.metricas_cache_tokens == {"hits": 1, "misses": 1}
+
+
+def test_entrada_expira_apos_ttl(relogio):
+    t = token("a@x.br")
+    security.decode_token_cache(t)
+
+    relogio.agora += settings.TOKEN_CACHE_TTL - 1
+    security.decode_token_cache(t)
+    assert security.metricas_cache_tokens["hits"] == 1
+
+    relogio.agora += 2
+    security.decode_token_cache(t)
+    assert security.metricas_cache_tokens["misses"] == 2
+
+
+def test_entrada_nao_passa_do_exp_do_token(relogio):
+    t = token("a@x.br", expira_em=timedelta(seconds=30))
+    payload = security.decode_token_cache(t)
+
+    _, expira_em = security._cache_tokens[next(iter(security._cache_tokens))]
+    assert expira_em == payload.exp
+
+    relogio.agora = payload.exp
+    security.decode_token_cache(t)
+    assert security.metricas_cache_tokens == {"hits": 0, "misses": 2}
+
+
+def test_token_invalido_nao_entra_no_cache(relogio):
+    for _ in range(2):
+        with pytest.raises(HTTPException) as erro:
+            security.decode_token_cache("nao.e.jwt")
+        assert erro.value.status_code == 401
+    assert len(security._cache_tokens) == 0
+    assert security.metricas_cache_tokens["misses"] == 2
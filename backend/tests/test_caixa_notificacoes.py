@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.models import models
+from src.services import service_notifications
+from src.services.service_notifications import (
+    _ORIGEM_BROADCAST, _ORIGEM_PESSOAL, _apos_cursor, codificar_cursor_notificacao,
+    decodificar_cursor_notificacao, listar_notificacoes_por_usuario,
+)
+
+MANHA, TARDE, NOITE = datetime(2025, 5, 2, 9), datetime(2025, 5, 2, 15), datetime(2025, 5, 2, 21)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    sessao = sessionmaker(bind=engine)()
+    yield sessao
+    sessao.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def caixa(db):
+    # Usuário 1 (aluno.uece.br), convidado do evento 10, com 3 pessoais e 3 broadcasts que o atingem
+    db.add(models.Usuario(id=1, nome="Ana", email="ana@aluno.uece.br"))
+    db.add(models.Usuario(id=2, nome="Bia", email="bia@ufc.br"))
+    db.add(models.Convidado(id_evento=10, id_usuario=1))
+    db.add_all([
+        models.Notificacao(id=1, id_usuario=1, data=MANHA, mensagem="p1"),
+        models.Notificacao(id=2, id_usuario=1, data=TARDE, mensagem="p2"),
+        models.Notificacao(id=3, id_usuario=1, data=TARDE, mensagem="p3"),
+        models.Notificacao(id=4, id_usuario=2, data=NOITE, mensagem="outro usuário"),
+        models.NotificacaoBroadcast(id=1, data=TARDE, mensagem="b1", alvo_tipo="evento", alvo_id=10),
+        models.NotificacaoBroadcast(id=2, data=NOITE, mensagem="b2", alvo_tipo="dominio", alvo_dominio="br.uece"),
+        models.NotificacaoBroadcast(id=3, data=MANHA, mensagem="b3", alvo_tipo="evento", alvo_id=11),
+        models.NotificacaoBroadcast(id=4, data=MANHA, mensagem="b4", alvo_tipo="dominio", alvo_dominio="br.ufc"),
+        models.NotificacaoBroadcast(id=5, data=MANHA, mensagem="b5", alvo_tipo="dominio",
+                                    alvo_dominio="br.uece.aluno"),
+        models.LeituraBroadcast(id_usuario=1, ultimo_id_lido=1),
+    ])
+    db.commit()
+    return db
+
+
+# Ordem decrescente por (data, origem, id): na mesma data, pessoais antes de broadcasts
+ORDEM_ESPERADA = ["b2", "p3", "p2", "b1", "p1", "b5"]
+
+
+def test_cursor_ida_e_volta():
+    chave = (datetime(2025, 5, 2, 15, 30, 12), _ORIGEM_BROADCAST, 42)
+    assert decodificar_cursor_notificacao(codificar_cursor_notificacao(chave)) == chave
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "", "MjAyNS0wNS0wMnwx", "bGl4b3xhfGI="])
+def test_cursor_invalido_retorna_400(cursor):
+    with pytest.raises(HTTPException) as erro:
+        decodificar_cursor_notificacao(cursor)
+    assert erro.value.status_code == 400
+
+
+@pytest.mark.parametrize("origem,esperados", [
+    # Mesma fonte do cursor: data anterior, ou mesma data com id menor
+    (_ORIGEM_PESSOAL, [1, 2]),
+    # Fonte que vem depois na ordem decrescente (broadcast < pessoal): inclui a mesma data
+    (_ORIGEM_BROADCAST, [1, 3, 4, 5]),
+])
+def test_apos_cursor_por_origem(caixa, origem, esperados):
+    modelo = models.Notificacao if origem == _ORIGEM_PESSOAL else models.NotificacaoBroadcast
+    apos = (TARDE, _ORIGEM_PESSOAL, 3)
+
+    ids = caixa.scalars(select(modelo.id).where(_apos_cursor(modelo, origem, apos)).order_by(modelo.id)).all()
+    assert ids == esperados
+
+
+def test_apos_cursor_de_broadcast_exclui_pessoais_da_mesma_data(caixa):
+    apos = (TARDE, _ORIGEM_BROADCAST, 1)
+    notificacao = models.Notificacao
+    ids = caixa.scalars(
+        select(notificacao.id).where(notificacao.id_usuario == 1, _apos_cursor(notificacao, _ORIGEM_PESSOAL, apos))
+    ).all()
+    assert ids == [1]
+
+
+def test_intercala_pessoais_e_broadcasts_em_ordem(caixa):
+    notificacoes, cursor = listar_notificacoes_por_usuario(caixa, 1)
+
+    assert [n.mensagem for n in notificacoes] == ORDEM_ESPERADA
+    assert cursor is None
+    lidas = {n.mensagem: n.lida for n in notificacoes if getattr(n, "broadcast", False)}
+    assert lidas == {"b1": True, "b2": False, "b5": False}
+
+
+@pytest.mark.parametrize("limite", [1, 2, 4, 5])
+def test_paginas_percorrem_a_caixa_sem_repetir(caixa, limite):
+    mensagens, cursor = [], None
+    while True:
+        pagina, cursor = listar_notificacoes_por_usuario(caixa, 1, limite=limite, cursor=cursor)
+        assert len(pagina) <= limite
+        mensagens.extend(n.mensagem for n in pagina)
+        if cursor is None:
+            break
+
+    assert mensagens == ORDEM_ESPERADA
+
+
+def test_usuario_sem_cadastro_recebe_so_pessoais(caixa, monkeypatch):
+    monkeypatch.setattr(service_notifications, "_leitura_usuario", lambda db, id_usuario: None)
+    notificacoes, _ = listar_notificacoes_por_usuario(caixa, 1)
+    assert [n.mensagem for n in notificacoes] == ["p3", "p2", "p1"]
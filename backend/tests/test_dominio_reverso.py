@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from src.models import models
+from src.models.models import inverter_dominio
+from src.services.service_events import _filtro_dominio
+
+
+@pytest.mark.parametrize("email,esperado", [
+    ("vitor@uece.br", "br.uece"),
+    ("vitor@aluno.uece.br", "br.uece.aluno"),
+    ("Vitor@Aluno.UECE.br", "br.uece.aluno"),
+    ("nome@estranho@ufc.br", "br.ufc"),
+    ("@uece.br", "br.uece"),
+    ("localhost@maquina", "maquina"),
+])
+def test_inverter_dominio(email, esperado):
+    assert inverter_dominio(email) == esperado
+
+
+@pytest.mark.parametrize("email", [None, "", "sem-arroba.uece.br"])
+def test_inverter_dominio_sem_email_valido(email):
+    assert inverter_dominio(email) is None
+
+
+def test_usuario_preenche_dominio_reverso_ao_definir_email():
+    usuario = models.Usuario(email="ana@aluno.uece.br")
+    assert usuario.dominio_reverso == "br.uece.aluno"
+
+    usuario.email = "ana@ufc.br"
+    assert usuario.dominio_reverso == "br.ufc"
+
+
+def test_filtro_dominio_inclui_subdominios_e_so_eles():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        emails = ["a@uece.br", "b@aluno.uece.br", "c@x.aluno.uece.br", "d@uecex.br",
+                  "e@uece.br.com", "f@ufc.br", "g@uece_br"]
+        db.add_all(models.Usuario(email=email) for email in emails)
+        db.commit()
+
+        def encontrados(dominio):
+            return db.scalars(select(models.Usuario.email).where(_filtro_dominio(dominio)).order_by(models.Usuario.email)).all()
+
+        assert encontrados("uece.br") == ["a@uece.br", "b@aluno.uece.br", "c@x.aluno.uece.br"]
+        assert encontrados("aluno.uece.br") == ["b@aluno.uece.br", "c@x.aluno.uece.br"]
+        assert encontrados("UECE.BR") == ["a@uece.br", "b@aluno.uece.br", "c@x.aluno.uece.br"]
+        assert encontrados("br") == ["a@uece.br", "b@aluno.uece.br", "c@x.aluno.uece.br", "d@uecex.br", "f@ufc.br"]
+    engine.dispose()
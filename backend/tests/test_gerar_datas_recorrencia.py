@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+
+import pytest
+
+from src.services.service_events import gerar_datas_recorrencia
+
+
+def datas_dia_a_dia(primeiro_dia: date, ultimo_dia: date, dias_semana: str):
+    # Referência: o laço antigo, percorrendo todos os dias do intervalo
+    datas = []
+    dia = primeiro_dia
+    while dia <= ultimo_dia:
+        if str(dia.weekday()) in dias_semana:
+            datas.append(dia)
+        dia += timedelta(days=1)
+    return datas
+
+
+@pytest.mark.parametrize("dias_semana", ["0123456", "01234", "2", "024", "6", "15"])
+@pytest.mark.parametrize("primeiro_dia,ultimo_dia", [
+    (date(2025, 1, 1), date(2025, 1, 1)),
+    (date(2025, 1, 1), date(2025, 1, 10)),
+    (date(2025, 2, 3), date(2025, 7, 4)),
+    (date(2024, 2, 25), date(2026, 3, 2)),
+])
+def test_mesmas_datas_que_laco_dia_a_dia(primeiro_dia, ultimo_dia, dias_semana):
+    geradas = gerar_datas_recorrencia(primeiro_dia, ultimo_dia, dias_semana).astype(object).tolist()
+    assert geradas == datas_dia_a_dia(primeiro_dia, ultimo_dia, dias_semana)
+
+
+def test_intervalo_vazio():
+    assert len(gerar_datas_recorrencia(date(2025, 1, 10), date(2025, 1, 1), "0123456")) == 0
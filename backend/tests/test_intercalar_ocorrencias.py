@@ -0,0 +1,94 @@
+from datetime import date, datetime, time
+
+from src.models import models
+from src.services.service_events import _intercalar_ocorrencias, chave_ocorrencia
+
+
+def evento(id_evento: int, dias_semana: str | None, hora: int = 10) -> models.Evento:
+    # Semanas de 06/01/2025 (segunda) a 19/01/2025 (domingo)
+    return models.Evento(
+        id=id_evento, nome=f"evento {id_evento}", categoria="reuniao", recorrencia="semanal",
+        data_inicio=datetime(2025, 1, 6, hora), data_termino=datetime(2025, 1, 19, 23),
+        horario_inicio=time(hora), horario_termino=time(hora + 1), dias_semana=dias_semana,
+        local_padrao="sala 1",
+    )
+
+
+def linha(id_linha: int, id_evento: int, data: datetime, data_original: datetime | None = None):
+    return models.OcorrenciaEvento(
+        id=id_linha, id_evento=id_evento, data=data, data_original=data_original,
+        local="sala 2", cancelada=False,
+    )
+
+
+def chaves(ocorrencias):
+    return [chave_ocorrencia(oc) for oc in ocorrencias]
+
+
+def test_regras_de_varios_eventos_saem_em_ordem_de_chave():
+    eventos = [evento(2, "0"), evento(1, "02")]
+    ocorrencias = list(_intercalar_ocorrencias(eventos, [], [], None, None, None))
+
+    assert chaves(ocorrencias) == sorted(chaves(ocorrencias))
+    assert [(oc.data.date(), oc.id_evento) for oc in ocorrencias] == [
+        (date(2025, 1, 6), 1), (date(2025, 1, 6), 2), (date(2025, 1, 8), 1),
+        (date(2025, 1, 13), 1), (date(2025, 1, 13), 2), (date(2025, 1, 15), 1),
+    ]
+
+
+def test_excecao_movida_substitui_a_data_da_regra():
+    # A ocorrência de segunda 06/01 foi movida para quinta 09/01
+    movida = linha(7, 1, datetime(2025, 1, 9, 14), data_original=datetime(2025, 1, 6, 10))
+    ocorrencias = list(_intercalar_ocorrencias(
+        [evento(1, "0")], [(1, movida.data_original)], [movida], None, None, None
+    ))
+
+    assert [oc.data for oc in ocorrencias] == [datetime(2025, 1, 9, 14), datetime(2025, 1, 13, 10)]
+    assert ocorrencias[0] is movida
+
+
+def test_excecao_cancelada_remove_a_data_da_regra():
+    # Canceladas entram só nas datas substituídas (a consulta de linhas não as traz)
+    ocorrencias = list(_intercalar_ocorrencias(
+        [evento(1, "0")], [(1, datetime(2025, 1, 13, 10))], [], None, None, None
+    ))
+
+    assert [oc.data for oc in ocorrencias] == [datetime(2025, 1, 6, 10)]
+
+
+def test_substituicao_vale_so_para_o_proprio_evento():
+    ocorrencias = list(_intercalar_ocorrencias(
+        [evento(1, "0"), evento(2, "0")], [(1, datetime(2025, 1, 6, 10))], [], None, None, None
+    ))
+
+    assert [(oc.data.date(), oc.id_evento) for oc in ocorrencias] == [
+        (date(2025, 1, 6), 2), (date(2025, 1, 13), 1), (date(2025, 1, 13), 2),
+    ]
+
+
+def test_evento_antigo_usa_apenas_as_linhas_gravadas():
+    linhas = [linha(3, 5, datetime(2025, 1, 7, 9)), linha(4, 5, datetime(2025, 1, 14, 9))]
+    ocorrencias = list(_intercalar_ocorrencias(
+        [evento(5, None), evento(1, "1", hora=8)], [], linhas, None, None, None
+    ))
+
+    assert chaves(ocorrencias) == [
+        (datetime(2025, 1, 7, 8), 1, 0), (datetime(2025, 1, 7, 9), 5, 3),
+        (datetime(2025, 1, 14, 8), 1, 0), (datetime(2025, 1, 14, 9), 5, 4),
+    ]
+
+
+def test_janela_limita_as_datas_geradas():
+    ocorrencias = list(_intercalar_ocorrencias(
+        [evento(1, "0123456")], [], [], date(2025, 1, 10), date(2025, 1, 12), None
+    ))
+
+    assert [oc.data.date() for oc in ocorrencias] == [date(2025, 1, 10), date(2025, 1, 11), date(2025, 1, 12)]
+
+
+def test_cursor_pula_o_que_ja_foi_entregue():
+    eventos = [evento(1, "0"), evento(2, "0")]
+    todas = chaves(_intercalar_ocorrencias(eventos, [], [], None, None, None))
+
+    restantes = chaves(_intercalar_ocorrencias(eventos, [], [], None, None, todas[1]))
+    assert restantes == todas[2:]
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.service_events import _paginar, codificar_cursor, decodificar_cursor
+
+
+def pares(quantidade: int):
+    # (chave, info) como produzidos pelo feed de ocorrências
+    return [((datetime(2025, 1, 6, 10) + timedelta(days=i), 1, i), f"ocorrencia {i}") for i in range(quantidade)]
+
+
+def test_cursor_ida_e_volta():
+    chave = (datetime(2025, 3, 4, 7, 30), 12, 0)
+    cursor = codificar_cursor(chave)
+
+    assert decodificar_cursor(cursor) == chave
+    assert "+" not in cursor and "/" not in cursor  # base64 urlsafe: seguro em query string
+
+
+@pytest.mark.parametrize("cursor", ["nao-e-base64!", "", "MjAyNS0wMS0wNnwx", "bGl4b3xhfGI="])
+def test_cursor_invalido_retorna_400(cursor):
+    with pytest.raises(HTTPException) as erro:
+        decodificar_cursor(cursor)
+    assert erro.value.status_code == 400
+
+
+def test_paginar_sem_limite_entrega_tudo():
+    assert _paginar(iter(pares(3)), None) == (["ocorrencia 0", "ocorrencia 1", "ocorrencia 2"], None)
+
+
+def test_paginar_sem_proxima_pagina_quando_cabe_no_limite():
+    assert _paginar(iter(pares(3)), 3) == (["ocorrencia 0", "ocorrencia 1", "ocorrencia 2"], None)
+
+
+def test_paginar_cursor_aponta_para_a_ultima_entregue():
+    todas = pares(5)
+    pagina, cursor = _paginar(iter(todas), 2)
+
+    assert pagina == ["ocorrencia 0", "ocorrencia 1"]
+    assert decodificar_cursor(cursor) == todas[1][0]
+
+
+def test_paginar_nao_consome_alem_do_necessario():
+    consumidas = []
+
+    def fonte():
+        for par in pares(100):
+            consumidas.append(par)
+            yield par
+
+    _paginar(fonte(), 2)
+    assert len(consumidas) == 3
@@ -0,0 +1,153 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.core import ttl_store
+from src.core.ttl_store import Armazenamento, ArmazenamentoMemoria, ArmazenamentoSQL
+from src.models import models
+
+
+class Relogio:
+    # Substitui time.monotonic do módulo para controlar a expiração
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = Relogio()
+    monkeypatch.setattr(ttl_store.time, "monotonic", relogio)
+    return relogio
+
+
+def test_backend_incompleto_falha_ao_instanciar():
+    class SemConsumir(Armazenamento):
+        def definir(self, chave, valor, ttl_segundos):
+            pass
+
+        def pegar(self, chave):
+            return None
+
+        def remover(self, chave):
+            pass
+
+    with pytest.raises(TypeError):
+        SemConsumir("x")
+
+
+def test_memoria_expira_pelo_ttl(relogio):
+    armazenamento = ArmazenamentoMemoria("t", max_itens=10)
+    armazenamento.definir("a", {"v": 1}, 10)
+    armazenamento.definir("b", {"v": 2}, 20)
+
+    relogio.agora += 10
+    assert armazenamento.pegar("a") is None
+    assert armazenamento.pegar("b") == {"v": 2}
+    assert len(armazenamento) == 1
+
+    relogio.agora += 10
+    assert armazenamento.pegar("b") is None
+    assert len(armazenamento) == 0
+
+
+def test_memoria_redefinir_renova_o_ttl(relogio):
+    armazenamento = ArmazenamentoMemoria("t", max_itens=10)
+    armazenamento.definir("a", {"v": 1}, 10)
+    relogio.agora += 5
+    armazenamento.definir("a", {"v": 2}, 10)
+
+    # A entrada antiga do heap vence aqui, mas não remove o valor novo
+    relogio.agora += 6
+    assert armazenamento.pegar("a") == {"v": 2}
+    relogio.agora += 4
+    assert armazenamento.pegar("a") is None
+
+
+def test_memoria_compacta_o_heap_de_chaves_sobrescritas(relogio):
+    armazenamento = ArmazenamentoMemoria("t", max_itens=10)
+    for i in range(1000):
+        armazenamento.definir("a", {"v": i}, 60)
+
+    assert len(armazenamento) == 1
+    assert len(armazenamento._expiracoes) <= 2 * 1 + 64 + 1
+    assert armazenamento.pegar("a") == {"v": 999}
+
+
+def test_memoria_descarta_os_mais_antigos_acima_do_limite(relogio):
+    armazenamento = ArmazenamentoMemoria("t", max_itens=3)
+    for chave in "abcd":
+        armazenamento.definir(chave, {"chave": chave}, 60)
+
+    assert armazenamento.pegar("a") is None
+    assert [armazenamento.pegar(chave)["chave"] for chave in "bcd"] == ["b", "c", "d"]
+
+    # Redefinir move a chave para o fim da fila de descarte
+    armazenamento.definir("b", {"chave": "b"}, 60)
+    armazenamento.definir("e", {"chave": "e"}, 60)
+    assert armazenamento.pegar("c") is None
+    assert armazenamento.pegar("b") is not None
+
+
+def test_memoria_prefixos_independentes(relogio):
+    codigos = ArmazenamentoMemoria("codigo", max_itens=10)
+    tokens = ArmazenamentoMemoria("token", max_itens=10)
+    codigos.definir("x", {"v": 1}, 60)
+    assert tokens.pegar("x") is None
+
+
+def _consumir_em_paralelo(armazenamento, chave, threads=16) -> list:
+    resultados = []
+    barreira = threading.Barrier(threads)
+
+    def consumir():
+        barreira.wait()
+        resultados.append(armazenamento.consumir(chave))
+
+    trabalhadores = [threading.Thread(target=consumir) for _ in range(threads)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    return resultados
+
+
+def test_memoria_consumir_entrega_uma_unica_vez():
+    armazenamento = ArmazenamentoMemoria("t", max_itens=10)
+    for tentativa in range(20):
+        armazenamento.definir("codigo", {"tentativa": tentativa}, 60)
+        resultados = _consumir_em_paralelo(armazenamento, "codigo")
+        assert [r for r in resultados if r is not None] == [{"tentativa": tentativa}]
+
+
+@pytest.fixture
+def sessao_sql(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ttl.db'}", connect_args={"timeout": 30})
+    models.ArmazenamentoTTL.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_sql_expira_e_remove(sessao_sql):
+    armazenamento = ArmazenamentoSQL("t", sessao=sessao_sql)
+    armazenamento.definir("a", {"v": 1}, 60)
+    armazenamento.definir("vencida", {"v": 2}, -1)
+
+    assert armazenamento.pegar("a") == {"v": 1}
+    assert armazenamento.pegar("vencida") is None
+    assert armazenamento.consumir("vencida") is None
+
+    armazenamento.remover("a")
+    assert armazenamento.pegar("a") is None
+
+
+def test_sql_consumir_entrega_uma_unica_vez(sessao_sql):
+    armazenamento = ArmazenamentoSQL("t", sessao=sessao_sql)
+    for tentativa in range(5):
+        armazenamento.definir("codigo", {"tentativa": tentativa}, 60)
+        resultados = _consumir_em_paralelo(armazenamento, "codigo", threads=8)
+        assert [r for r in resultados if r is not None] == [{"tentativa": tentativa}]
@@ -0,0 +1,37 @@
+import pytest
+
+from src.services.service_import import _validar_horario
+
+
+def test_horario_valido():
+    info = _validar_horario("24-AB-manha")
+
+    assert info["turno"] == "manha"
+    assert info["blocos"] == ["A", "B"]
+    assert info["dias_semana"] == ["2", "4"]
+    assert info["dias_semana_regra"] == "02"
+    assert info["dias_nomes"] == ["SEG", "QUA"]
+
+
+def test_regra_ordena_os_dias():
+    info = _validar_horario("735-CD-noite")
+
+    assert info["dias_semana_regra"] == "135"
+    assert info["dias_nomes"] == ["SAB", "TER", "QUI"]
+
+
+@pytest.mark.parametrize("horario,mensagem", [
+    ("24AB-manha", "fora do formato"),
+    ("24-AB-manha-extra", "fora do formato"),
+    ("", "fora do formato"),
+    ("24-AB-madrugada", "Turno inválido"),
+    ("18-AB-manha", "Dias inválidos"),
+    ("-AB-manha", "Dias inválidos"),
+    ("242-AB-manha", "Dias repetidos"),
+    ("24--tarde", "Blocos inválidos"),
+    ("24-AE-noite", "Blocos inválidos"),
+    ("24-ab-manha", "Blocos inválidos"),
+])
+def test_horario_invalido(horario, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        _validar_horario(horario)